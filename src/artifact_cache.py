@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Script: artifact_cache.py
+Version: 1.0.0
+Purpose: Content-hash keyed cache manifest so --all runs skip PDFs whose inputs and stage version are unchanged.
+
+The manifest lives in the extracted_text folder as .cache_manifest.json:
+
+    {
+      "files":  {"<pdf name>": {"size": ..., "mtime_ns": ..., "sha256": "..."}},
+      "stages": {"<stage>": {"<pdf name>": {"sha256": "...", "version": "..."}}}
+    }
+
+File size and mtime are remembered next to each hash so an unchanged PDF is not
+re-hashed on every run; the hash is only recomputed when either of them moves.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+MANIFEST_NAME = ".cache_manifest.json"
+HASH_CHUNK = 1024 * 1024
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_manifest(cache_dir):
+    path = Path(cache_dir) / MANIFEST_NAME
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        manifest = {}
+    manifest.setdefault("files", {})
+    manifest.setdefault("stages", {})
+    return manifest
+
+def save_manifest(manifest, cache_dir):
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = cache_dir / MANIFEST_NAME
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+def pdf_digest(manifest, pdf_path):
+    """Return the content hash of pdf_path, reusing the stored hash while size and mtime match."""
+    pdf_path = Path(pdf_path)
+    stat = pdf_path.stat()
+    known = manifest["files"].get(pdf_path.name)
+    if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+        return known["sha256"]
+    sha256 = file_sha256(pdf_path)
+    manifest["files"][pdf_path.name] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256}
+    return sha256
+
+def is_fresh(manifest, stage, version, pdf_path, outputs):
+    """True when stage already ran at this version on this exact PDF content and its outputs still exist."""
+    entry = manifest["stages"].get(stage, {}).get(Path(pdf_path).name)
+    if not entry or entry["version"] != version:
+        return False
+    if not all(Path(p).exists() for p in outputs):
+        return False
+    return entry["sha256"] == pdf_digest(manifest, pdf_path)
+
+def record(manifest, stage, version, pdf_path):
+    manifest["stages"].setdefault(stage, {})[Path(pdf_path).name] = {
+        "sha256": pdf_digest(manifest, pdf_path),
+        "version": version,
+    }
+
+def filter_stale(manifest, stage, version, pdf_paths, outputs_for, force=False):
+    """
+    Return the PDFs that stage still has to process.
+    outputs_for(pdf_path) lists the artifacts the stage writes for that PDF.
+    """
+    if force:
+        return list(pdf_paths)
+    stale = [p for p in pdf_paths if not is_fresh(manifest, stage, version, p, outputs_for(p))]
+    skipped = len(pdf_paths) - len(stale)
+    if skipped:
+        print(f"⏭️ Skipping {skipped} unchanged PDF(s) (cache hit for {stage} {version})")
+    return stale
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Script: batch_pool.py
+Version: 1.0.0
+Purpose: Process-pool batch executor shared by the --all modes of the PDF stages.
+
+- Largest PDFs are dispatched first so one big book does not become the tail of the run
+- One aggregate progress bar for the whole batch; worker output is silenced
+- An exception in a stage is reported for that PDF only
+- A hard worker crash (e.g. a segfault inside MuPDF) breaks a ProcessPoolExecutor, so the
+  PDFs left unfinished are re-run one per pool: only the PDF that really crashes fails
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from tqdm import tqdm
+
+import metrics
+
+def default_jobs():
+    return os.cpu_count() or 1
+
+def add_argument(parser):
+    parser.add_argument("--jobs", "-j", type=int, default=default_jobs(),
+                        help="PDFs processed in parallel in --all mode (default: all cores; 1 = sequential)")
+
+def _init_worker(metrics_path):
+    # Per-page bars and status prints from many workers would interleave; the parent reports instead
+    devnull = open(os.devnull, "w")
+    sys.stdout = devnull
+    sys.stderr = devnull
+    if metrics_path:
+        metrics.enable(metrics_path)
+
+def _size(path):
+    try:
+        return Path(path).stat().st_size
+    except OSError:
+        return 0
+
+def _run_pool(func, items, workers, args, results, bar):
+    """Run items in one pool; returns the items left unfinished if the pool broke."""
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(metrics.sink_path(),)) as pool:
+        futures = {pool.submit(func, item, *args): item for item in items}
+        try:
+            for future in as_completed(futures):
+                item = futures[future]
+                try:
+                    results[item] = {"pdf": item, "ok": True, "result": future.result(), "error": None}
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    results[item] = {"pdf": item, "ok": False, "result": None, "error": f"{type(e).__name__}: {e}"}
+                    bar.write(f"❌ {Path(item).name}: {results[item]['error']}")
+                bar.update(1)
+        except BrokenProcessPool:
+            return [item for item in items if item not in results]
+    return []
+
+def run_batch(func, pdf_paths, jobs=None, desc="Processing PDFs", args=()):
+    """
+    Call func(pdf_path, *args) for every PDF in worker processes.
+    func and args must be picklable (module-level functions, plain values).
+    Returns one result dict per PDF ({pdf, ok, result, error}) in input order.
+    """
+    pdf_paths = list(pdf_paths)
+    if not pdf_paths:
+        return []
+    jobs = max(1, min(jobs or default_jobs(), len(pdf_paths)))
+    ordered = sorted(pdf_paths, key=_size, reverse=True)
+    results = {}
+
+    with tqdm(total=len(ordered), desc=f"{desc} ({jobs} jobs)", unit="pdf") as bar:
+        unfinished = _run_pool(func, ordered, jobs, args, results, bar)
+        if unfinished:
+            bar.write(f"⚠️ A worker crashed; re-running {len(unfinished)} PDF(s) in isolation")
+        for item in unfinished:
+            if _run_pool(func, [item], 1, args, results, bar):
+                results[item] = {"pdf": item, "ok": False, "result": None, "error": "worker process crashed"}
+                bar.write(f"❌ {Path(item).name}: worker process crashed")
+                bar.update(1)
+
+    failed = sum(1 for r in results.values() if not r["ok"])
+    print(f"✅ Batch complete: {len(results) - failed} succeeded, {failed} failed")
+    return [results[p] for p in pdf_paths]
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Script: benchmark_pipeline.py
+Version: 1.0.1
+Purpose: Benchmark every pipeline stage on synthetic PDFs and record time, pages/sec, peak RSS and output size.
+
+Synthetic PDFs are generated with PyMuPDF from a configurable page count, font mix,
+outline depth, TOC layout and back-of-book index, so runs are reproducible and comparable.
+Each stage runs in a fresh child process, so its peak RSS is not inflated by earlier stages.
+
+Usage:
+  python benchmark_pipeline.py [--pages 50 500] [--fonts 3] [--outline-depth 3]
+                               [--toc-pages 2] [--toc-layout dotted] [--repeat 3]
+                               [--stages extract_text convert_to_md] [--output FILE]
+                               [--compare BASELINE.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+SCRIPT_NAME = "benchmark_pipeline.py"
+SCRIPT_VERSION = "1.0.1"
+SCRIPT_PURPOSE = "Benchmark every pipeline stage on synthetic PDFs"
+
+# Paths
+BASE_DIR = Path(__file__).resolve().parent
+RESULTS_DIR = BASE_DIR / "../data/benchmarks"
+
+# Stage order matters: later stages read what earlier ones wrote
+STAGE_ORDER = [
+    "extract_text", "detect_headings", "extract_outline", "parse_visual_toc", "convert_to_md",
+    "clean_md_output", "segment_paragraphs", "split_sections", "extract_index",
+]
+
+# Base-14 fonts: body text first, then heading faces
+FONT_MIX = ["helv", "tiro", "cour", "hebo", "tibo"]
+BODY_SIZE = 10
+HEADING_SIZES = [22, 17, 13]
+WORDS = (
+    "the party travels north along the old road toward the ruined keep where bandits "
+    "gather beneath broken towers while the wizard studies ancient maps of the flanaess "
+    "and the cleric tends wounded adventurers before nightfall brings wolves from the forest"
+).split()
+INDEX_TERMS = ["Greyhawk", "Dyvers", "Furyondy", "Iuz", "Keoland", "Nyrond", "Veluna", "Wild Coast"]
+
+# ─── Synthetic documents ───────────────────────────────────────────────────────
+
+def make_synthetic_pdf(path, pages, fonts=3, outline_depth=3, toc_pages=2, toc_layout="dotted",
+                       index_pages=1, seed=0):
+    """Write a PDF with TOC pages, headed body pages, an outline of the given depth and an index."""
+    rng = random.Random(seed)
+    faces = FONT_MIX[:max(1, min(fonts, len(FONT_MIX)))]
+    doc = fitz.open()
+    toc = []
+
+    body_pages = max(1, pages - toc_pages - index_pages)
+    chapters = max(1, body_pages // 10)
+
+    for t in range(toc_pages):
+        page = doc.new_page()
+        y = 72
+        page.insert_text((72, y), "Contents", fontsize=HEADING_SIZES[0], fontname=faces[-1])
+        for c in range(t * 40, min(chapters, (t + 1) * 40)):
+            y += 16
+            target = toc_pages + 1 + c * 10
+            if toc_layout == "dotted":
+                line = f"Chapter {c + 1} {'.' * 20} {target}"
+            else:
+                line = f"{c + 1}. Chapter {c + 1}    {target}"
+            page.insert_text((72, y), line, fontsize=BODY_SIZE, fontname=faces[0])
+
+    for b in range(body_pages):
+        page = doc.new_page()
+        y = 60
+        if b % 10 == 0:
+            chapter = b // 10 + 1
+            page.insert_text((72, y), f"Chapter {chapter}", fontsize=HEADING_SIZES[0], fontname=faces[-1])
+            toc.append([1, f"Chapter {chapter}", doc.page_count])
+            y += 30
+        for depth in range(2, outline_depth + 1):
+            if b % (10 // depth) == 0:
+                title = f"Section {b + 1}.{depth}"
+                size = HEADING_SIZES[min(depth - 1, len(HEADING_SIZES) - 1)]
+                page.insert_text((72, y), title, fontsize=size, fontname=faces[-1])
+                if toc and toc[-1][0] >= depth - 1:
+                    toc.append([depth, title, doc.page_count])
+                y += size + 8
+        while y < 760:
+            words = [rng.choice(WORDS) for _ in range(12)]
+            if rng.random() < 0.05:
+                words.insert(rng.randrange(len(words)), rng.choice(INDEX_TERMS))
+            page.insert_text((72, y), " ".join(words), fontsize=BODY_SIZE, fontname=rng.choice(faces))
+            y += 14
+
+    for _ in range(index_pages):
+        page = doc.new_page()
+        y = 72
+        page.insert_text((72, y), "Index", fontsize=HEADING_SIZES[0], fontname=faces[-1])
+        for term in sorted(INDEX_TERMS):
+            y += 16
+            target = rng.randint(toc_pages + 1, toc_pages + body_pages)
+            page.insert_text((72, y), f"{term}{'.' * 12}{target}", fontsize=BODY_SIZE, fontname=faces[0])
+
+    if outline_depth > 0:
+        doc.set_toc([entry for entry in toc if entry[0] <= outline_depth])
+    doc.save(path)
+    doc.close()
+
+# ─── Stage execution (child process) ───────────────────────────────────────────
+
+def _stage_call(stage, pdf_path, work):
+    """Run one stage with explicit paths inside the benchmark workspace; returns the files it wrote."""
+    stem = pdf_path.stem
+    text_dir = work / "extracted_text"
+    md_dir = work / "converted_md"
+    text_dir.mkdir(exist_ok=True)
+    md_dir.mkdir(exist_ok=True)
+
+    if stage == "extract_text":
+        from extract_text import extract_text_from_pdf
+        # Repeats must measure a full extraction, not the unchanged-page splice
+        extract_text_from_pdf(pdf_path, text_dir, incremental=False)
+        return [text_dir / f"{stem}.txt", text_dir / f"{stem}.pages.json"]
+    if stage == "detect_headings":
+        from detect_headings import detect_headings_from_pdf
+        detect_headings_from_pdf(pdf_path, text_dir, incremental=False)
+        return [text_dir / f"{stem}.headings.json"]
+    if stage == "extract_outline":
+        from extract_outline import extract_outline
+        extract_outline(str(pdf_path), output_dir=str(text_dir))
+        return [text_dir / f"{stem}.outline.json"]
+    if stage == "parse_visual_toc":
+        from parse_visual_toc import extract_visual_toc
+        extract_visual_toc(pdf_path, output_dir=text_dir)
+        return [text_dir / f"{stem}.visual_toc.txt"]
+    if stage == "convert_to_md":
+        from convert_to_md import convert_file
+        convert_file(stem, str(text_dir), str(md_dir))
+        return [md_dir / f"{stem}.md"]
+    if stage == "clean_md_output":
+        from clean_md_output import process_file
+        return [process_file(md_dir / f"{stem}.md")]
+    if stage == "segment_paragraphs":
+        from segment_paragraphs import process_file
+        process_file(text_dir / f"{stem}.txt", text_dir)
+        return [text_dir / f"{stem}.segmented.txt"]
+    if stage == "split_sections":
+        from split_sections import split_file
+        split_file(md_dir / f"{stem}.md", 2, work / "split")
+        return sorted((work / "split" / stem).glob("*"))
+    if stage == "extract_index":
+        from extract_index import process_file
+        process_file(text_dir / f"{stem}.txt", output_dir=work / "index_terms")
+        return [work / "index_terms" / f"{stem}.index_terms.json", work / "index_terms" / f"{stem}.index_terms.md"]
+    raise ValueError(f"Unknown stage: {stage}")
+
+def run_stage_isolated(stage, pdf_path, work):
+    """Child-process entry point: time one stage and report its peak RSS and output size."""
+    sys.path.insert(0, str(BASE_DIR))
+    from metrics import peak_rss_mb
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        started = time.perf_counter()
+        outputs = _stage_call(stage, Path(pdf_path), Path(work))
+        seconds = time.perf_counter() - started
+    return {
+        "seconds": seconds,
+        "peak_rss_mb": peak_rss_mb(),
+        "output_bytes": sum(p.stat().st_size for p in outputs if p and p.exists()),
+    }
+
+def run_stage(stage, pdf_path, work):
+    # A fresh spawned process per stage keeps each stage's peak RSS independent
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(run_stage_isolated, stage, str(pdf_path), str(work)).result()
+
+# ─── Results ───────────────────────────────────────────────────────────────────
+
+def benchmark(page_counts, stages, repeat, pdf_options):
+    results = []
+    with tempfile.TemporaryDirectory(prefix="pdfmd_bench_") as tmp:
+        tmp = Path(tmp)
+        for pages in page_counts:
+            pdf_path = tmp / f"synthetic_{pages}p.pdf"
+            make_synthetic_pdf(pdf_path, pages, **pdf_options)
+            print(f"📄 {pdf_path.name} ({pdf_path.stat().st_size / 1024:.0f} KB)")
+            for _ in range(repeat):
+                work = tmp / "work"
+                shutil.rmtree(work, ignore_errors=True)
+                work.mkdir()
+                for stage in stages:
+                    sample = run_stage(stage, pdf_path, work)
+                    key = (pdf_path.name, stage)
+                    best = next((r for r in results if (r["document"], r["stage"]) == key), None)
+                    if best is None:
+                        best = {"document": pdf_path.name, "pages": pages, "stage": stage, "seconds": None}
+                        results.append(best)
+                    # Keep the fastest repeat; it is the least disturbed by other load on the machine
+                    if best["seconds"] is None or sample["seconds"] < best["seconds"]:
+                        best.update(sample)
+                        best["pages_per_sec"] = round(pages / sample["seconds"], 1) if sample["seconds"] else None
+            for r in results:
+                if r["document"] == pdf_path.name:
+                    r["seconds"] = round(r["seconds"], 4)
+                    print(f"  ▶️ {r['stage']:20} {r['seconds']:8.3f}s  {r['pages_per_sec'] or 0:9.1f} pages/s  "
+                          f"{r['peak_rss_mb']:7.1f} MB  {r['output_bytes']:>10} bytes")
+    return results
+
+def compare(results, baseline_path):
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    old = {(r["document"], r["stage"]): r for r in baseline.get("results", [])}
+    print(f"\n📊 Compared with {Path(baseline_path).name}:")
+    for r in results:
+        before = old.get((r["document"], r["stage"]))
+        if not before or not before["seconds"]:
+            continue
+        change = (r["seconds"] - before["seconds"]) / before["seconds"] * 100
+        marker = "🟢" if change <= -5 else "🔴" if change >= 5 else "⚪"
+        print(f"  {marker} {r['document']:24} {r['stage']:20} {before['seconds']:8.3f}s → {r['seconds']:8.3f}s "
+              f"({change:+.1f}%)  RSS {before['peak_rss_mb']} → {r['peak_rss_mb']} MB")
+
+def main():
+    parser = argparse.ArgumentParser(description=SCRIPT_PURPOSE)
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 500], help="Synthetic page counts (default: 50 500)")
+    parser.add_argument("--fonts", type=int, default=3, help=f"Number of font faces to mix (1-{len(FONT_MIX)})")
+    parser.add_argument("--outline-depth", type=int, default=3, help="Outline depth; 0 writes no outline")
+    parser.add_argument("--toc-pages", type=int, default=2, help="Printed TOC pages at the front")
+    parser.add_argument("--toc-layout", choices=["dotted", "numbered"], default="dotted", help="Printed TOC line style")
+    parser.add_argument("--index-pages", type=int, default=1, help="Back-of-book index pages")
+    parser.add_argument("--stages", nargs="+", choices=STAGE_ORDER, default=STAGE_ORDER,
+                        help="Stages to run (prerequisite stages must be included)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per stage; the fastest is kept")
+    parser.add_argument("--output", help="Results JSON path (default: ../data/benchmarks/bench_<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    parser.add_argument("--version", "-v", action="version", version=f"{SCRIPT_NAME} v{SCRIPT_VERSION}")
+    args = parser.parse_args()
+
+    print(f"🛠 {SCRIPT_NAME} - v{SCRIPT_VERSION}")
+    print(f"📘 Purpose: {SCRIPT_PURPOSE}")
+
+    # Silence per-page progress bars in the stage processes
+    os.environ["TQDM_DISABLE"] = "1"
+    stages = [s for s in STAGE_ORDER if s in args.stages]
+    pdf_options = {
+        "fonts": args.fonts,
+        "outline_depth": args.outline_depth,
+        "toc_pages": args.toc_pages,
+        "toc_layout": args.toc_layout,
+        "index_pages": args.index_pages,
+    }
+    results = benchmark(args.pages, stages, max(1, args.repeat), pdf_options)
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "script_version": SCRIPT_VERSION,
+        "python": platform.python_version(),
+        "pymupdf": fitz.VersionBind,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {"pages": args.pages, "repeat": args.repeat, **pdf_options},
+        "results": results,
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f"bench_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\n✅ Saved results: {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
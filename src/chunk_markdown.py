@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Script: chunk_markdown.py
+Version: 1.0.2
+Purpose: Pack converted Markdown into token-budgeted chunks with heading breadcrumbs for LLM ingestion.
+
+The Markdown is streamed block by block (a block is a heading line or a run of non-blank
+lines). Blocks are packed greedily into chunks of at most --max-tokens; a block that is
+larger on its own is split at line, then word boundaries. Every chunk starts with a header
+line holding its breadcrumbs (document > chapter > section at the chunk's first block),
+so a chunk read on its own still says where it belongs. A chunk never ends on a bare
+heading, and a new heading starts a new chunk once the current one is half full.
+
+Token counts come from a pluggable length function (--tokenizer):
+- heuristic (default): max(chars / 4, words * 4 / 3), no dependencies
+- tiktoken[:encoding]: exact counts if tiktoken is installed
+- module:function: any callable taking a string and returning a token count
+
+Outputs ../data/chunks/<stem>.chunks.jsonl, one JSON object per chunk:
+    {"id": "<stem>-0001", "document": "<stem>", "breadcrumbs": [...], "tokens": 812, "text": "..."}
+
+Dependencies:
+- tqdm (batch mode, via batch_pool.py)
+- tiktoken (optional)
+"""
+
+import argparse
+import importlib
+import json
+import math
+import re
+import sys
+from pathlib import Path
+
+import batch_pool
+import metrics
+from md_corpus import corpus_files, document_name
+
+SCRIPT_NAME = "chunk_markdown.py"
+SCRIPT_VERSION = "1.0.2"
+SCRIPT_PURPOSE = "Pack Markdown into token-budgeted chunks with heading breadcrumbs"
+
+BASE_DIR = Path(__file__).resolve().parent
+INPUT_DIR = BASE_DIR / "../data/converted_md"
+OUTPUT_DIR = BASE_DIR / "../data/chunks"
+
+DEFAULT_MAX_TOKENS = 800
+BREADCRUMB_SEPARATOR = " > "
+_HEADING = re.compile(r"(#{1,6})(?: |$)")
+_FENCE = re.compile(r"\s*(```|~~~)")
+
+# ─── Tokenizers ────────────────────────────────────────────────────────────────
+
+def heuristic_tokens(text):
+    """Fast estimate for English prose: about 4 characters or 3/4 of a word per token."""
+    return math.ceil(max(len(text) / 4, len(text.split()) * 4 / 3))
+
+def load_tokenizer(spec="heuristic"):
+    """Resolve a --tokenizer spec to a function str -> token count."""
+    if spec in (None, "", "heuristic"):
+        return heuristic_tokens
+    if spec.split(":")[0] == "tiktoken":
+        try:
+            import tiktoken
+        except ImportError:
+            raise SystemExit("❌ --tokenizer tiktoken needs tiktoken (install via 'pip install tiktoken')")
+        encoding = tiktoken.get_encoding(spec.split(":", 1)[1] if ":" in spec else "cl100k_base")
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    module_name, _, attribute = spec.partition(":")
+    if not attribute:
+        raise SystemExit(f"❌ Unknown tokenizer: {spec} (use heuristic, tiktoken[:encoding] or module:function)")
+    return getattr(importlib.import_module(module_name), attribute)
+
+# ─── Streaming ─────────────────────────────────────────────────────────────────
+
+def iter_blocks(lines):
+    """
+    Yield (heading level or 0, text) blocks from Markdown lines: each heading line on its own,
+    everything else grouped into runs of non-blank lines. Lines inside code fences are never headings.
+    """
+    buffer = []
+    in_fence = False
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if _FENCE.match(line):
+            in_fence = not in_fence
+        heading = None if in_fence else _HEADING.match(line)
+        if heading or (not line.strip() and not in_fence):
+            if buffer:
+                yield 0, "\n".join(buffer)
+                buffer = []
+            if heading:
+                yield len(heading.group(1)), line
+        else:
+            buffer.append(line)
+    if buffer:
+        yield 0, "\n".join(buffer)
+
+def _pack(units, joiner, budget, count_tokens):
+    """Greedily join units while the running token count stays within budget."""
+    pieces = []
+    current = []
+    size = 0
+    for unit in units:
+        tokens = count_tokens(unit)
+        if current and size + tokens > budget:
+            pieces.append(joiner.join(current))
+            current = []
+            size = 0
+        current.append(unit)
+        size += tokens + 1
+    if current:
+        pieces.append(joiner.join(current))
+    return pieces
+
+def split_oversized(text, budget, count_tokens):
+    """Split a block larger than the budget at line boundaries, then a too-long line at word boundaries."""
+    pieces = []
+    for piece in _pack(text.split("\n"), "\n", budget, count_tokens):
+        if count_tokens(piece) > budget:
+            pieces.extend(_pack(piece.split(" "), " ", budget, count_tokens))
+        else:
+            pieces.append(piece)
+    return pieces
+
+class Chunker:
+    """Greedy packer: add() blocks in document order; it returns the chunks each block completes."""
+
+    def __init__(self, document, max_tokens=DEFAULT_MAX_TOKENS, count_tokens=heuristic_tokens):
+        self.document = document
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens
+        self.path = []     # (level, heading text) of the headings enclosing the current position
+        self.blocks = []   # (level, text, breadcrumbs) of the chunk being built
+        self.tokens = 0
+        self.budget = max_tokens
+        self.number = 0
+
+    def header(self, breadcrumbs):
+        return BREADCRUMB_SEPARATOR.join([self.document] + list(breadcrumbs))
+
+    def _append(self, block):
+        if not self.blocks:
+            # The header line and the blank line after it count against the budget
+            self.budget = max(1, self.max_tokens - self.count_tokens(self.header(block[2]) + "\n\n"))
+        self.blocks.append(block)
+        self.tokens += self.count_tokens(block[1]) + 1
+
+    def flush(self):
+        if not self.blocks:
+            return []
+        self.number += 1
+        breadcrumbs = list(self.blocks[0][2])
+        text = self.header(breadcrumbs) + "\n\n" + "\n\n".join(block[1] for block in self.blocks)
+        self.blocks = []
+        self.tokens = 0
+        return [{
+            "id": f"{self.document}-{self.number:04d}",
+            "document": self.document,
+            "breadcrumbs": breadcrumbs,
+            "tokens": self.count_tokens(text),
+            "text": text,
+        }]
+
+    def add(self, level, text):
+        """Add one block (heading level or 0, text); returns the chunks it completes."""
+        done = []
+        if level:
+            self.path = [entry for entry in self.path if entry[0] < level] + [(level, text[level:].strip())]
+            # Start sections on a fresh chunk unless the current one is still mostly empty
+            if self.tokens >= self.budget / 2:
+                done += self.flush()
+        block = (level, text, tuple(heading for _, heading in self.path))
+        tokens = self.count_tokens(text)
+
+        if self.blocks and self.tokens + tokens > self.budget:
+            # Trailing headings move to the next chunk: a chunk never ends on a bare heading
+            carried = []
+            while self.blocks and self.blocks[-1][0]:
+                carried.insert(0, self.blocks.pop())
+            done += self.flush()
+            for carried_block in carried:
+                self._append(carried_block)
+
+        if not level and tokens > self.budget - self.tokens:
+            pieces = split_oversized(text, self.budget - self.tokens if self.blocks else self.budget, self.count_tokens)
+            if len(pieces) > 1:
+                for piece in pieces:
+                    done += self.add(0, piece)
+                return done
+            # A single unsplittable word beyond the budget: let it overflow
+        self._append(block)
+        return done
+
+    def finish(self):
+        return self.flush()
+
+def iter_chunks(lines, document, max_tokens=DEFAULT_MAX_TOKENS, count_tokens=heuristic_tokens):
+    """Yield chunk dicts for Markdown lines as they stream past."""
+    chunker = Chunker(document, max_tokens, count_tokens)
+    for level, text in iter_blocks(lines):
+        yield from chunker.add(level, text)
+    yield from chunker.finish()
+
+# ─── Files ─────────────────────────────────────────────────────────────────────
+
+def chunk_file(md_path, output_dir=OUTPUT_DIR, max_tokens=DEFAULT_MAX_TOKENS, tokenizer="heuristic"):
+    """Write <document>.chunks.jsonl; tokenizer is a --tokenizer spec so this runs in worker processes."""
+    md_path = Path(md_path)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    document = document_name(md_path)
+    out_path = output_dir / f"{document}.chunks.jsonl"
+    count_tokens = load_tokenizer(tokenizer)
+
+    chunks = 0
+    tokens = 0
+    with metrics.document(SCRIPT_NAME, md_path.name, md_path) as doc_metrics:
+        with open(md_path, "r", encoding="utf-8") as src, open(out_path, "w", encoding="utf-8") as out:
+            for chunk in iter_chunks(src, document, max_tokens, count_tokens):
+                out.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+                chunks += 1
+                tokens += chunk["tokens"]
+        doc_metrics.wrote(out_path)
+    print(f"✅ {document}: {chunks} chunks, {tokens} tokens → {out_path.name}")
+    return {"chunks": chunks, "tokens": tokens}
+
+def main():
+    parser = argparse.ArgumentParser(description=SCRIPT_PURPOSE)
+    parser.add_argument("filename", nargs="?", help="Markdown file to chunk (from converted_md/)")
+    parser.add_argument("--all", action="store_true", help="Chunk every document in converted_md/")
+    parser.add_argument("--max-tokens", type=int, default=DEFAULT_MAX_TOKENS,
+                        help=f"Token budget per chunk, header included (default: {DEFAULT_MAX_TOKENS})")
+    parser.add_argument("--tokenizer", default="heuristic",
+                        help="heuristic (default), tiktoken[:encoding] or module:function")
+    batch_pool.add_argument(parser)
+    metrics.add_argument(parser)
+    parser.add_argument("--version", "-v", action="version", version=f"{SCRIPT_NAME} v{SCRIPT_VERSION}")
+    args = parser.parse_args()
+    metrics.configure(args)
+    load_tokenizer(args.tokenizer)  # fail fast on a bad spec
+
+    print(f"🛠 {SCRIPT_NAME} - v{SCRIPT_VERSION}")
+    print(f"📘 Purpose: {SCRIPT_PURPOSE}")
+
+    if args.all:
+        files = corpus_files()
+        if not files:
+            print("❌ No Markdown files found in converted_md/")
+            sys.exit(1)
+        options = (OUTPUT_DIR, args.max_tokens, args.tokenizer)
+        if args.jobs > 1 and len(files) > 1:
+            results = batch_pool.run_batch(chunk_file, files, args.jobs, "✂️ Chunking", options)
+            totals = [r["result"] for r in results if r["ok"]]
+        else:
+            totals = [chunk_file(f, *options) for f in files]
+        print(f"📦 Corpus: {sum(t['chunks'] for t in totals)} chunks, "
+              f"{sum(t['tokens'] for t in totals)} tokens from {len(totals)} documents")
+        return
+
+    if args.filename:
+        md_path = Path(args.filename)
+        if not md_path.exists():
+            md_path = INPUT_DIR / args.filename
+        if not md_path.exists():
+            print(f"❌ File not found: {args.filename}")
+            sys.exit(1)
+        chunk_file(md_path, OUTPUT_DIR, args.max_tokens, args.tokenizer)
+        return
+
+    files = corpus_files()
+    if not files:
+        print("❌ No Markdown files found in converted_md/")
+        return
+    print("\n📄 Available Markdown files:")
+    for i, file in enumerate(files):
+        print(f"[{i}] {file.name}")
+    choice = input("\nEnter number: ").strip()
+    try:
+        chunk_file(files[int(choice)], OUTPUT_DIR, args.max_tokens, args.tokenizer)
+    except (ValueError, IndexError):
+        print("❌ Invalid selection.")
+
+if __name__ == "__main__":
+    main()
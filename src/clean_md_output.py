@@ -1,48 +1,139 @@
 """
 Script: clean_md_output.py
-Version: 1.0.2
+Version: 1.2.0
 Purpose: Post-process Markdown files to normalize spacing, fix lists, clean tables, and tidy headings.
+
+Cleaning is a single streaming pass: each input line is read once, matched against all
+RULES compiled into one pattern and written out, so memory stays bounded by the I/O block
+and the longest line.
+Spacing normalization (blank-line collapsing, trailing whitespace, no leading/trailing
+blank lines) is done by the engine itself; RULES holds the per-line rewrites and can be
+extended or replaced (process_file(..., rules=...)).
 """
 
 import os
 import argparse
+import re
+from collections import namedtuple
 from pathlib import Path
 from tqdm import tqdm
 
-def normalize_spacing(text):
-    lines = text.splitlines()
-    cleaned = []
-    last_blank = False
+import metrics
+
+Rule = namedtuple("Rule", "name pattern replacement")
+
+RULES = [
+    # Exactly one space after the heading hashes: "##Title" / "##\tTitle" -> "## Title"
+    Rule("heading_space", r"^(#+)(\s*)", lambda m: m.group(1) + " "),
+    # Any bullet glyph followed by whitespace becomes a Markdown dash
+    Rule("list_marker", r"^[\-•*]\s+", "- "),
+]
+
+# A bullet left alone on its line (PDF text often splits it from its item) is joined with
+# the next non-blank line, as the list_marker rule does when whitespace follows it
+BARE_LIST_MARKERS = frozenset("-•*")
+LIST_MARKER = "- "
+
+def compile_rules(rules=RULES):
+    """
+    Compile the rules into one alternation, so each line is scanned once whatever the number of
+    rules, and return a function cleaning one line. A line is rewritten by the first rule that
+    matches it (earliest position, then list order); replacements may be templates or callables.
+    """
+    if not rules:
+        return lambda line: line
+    # An anchor inside each alternative makes the engine retry every position; hoist a shared one
+    anchored = all(rule.pattern.startswith("^") for rule in rules)
+    parts = []
+    by_group = {}
+    group = 1
+    for rule in rules:
+        pattern = re.compile(rule.pattern)
+        parts.append(f"({rule.pattern[1:] if anchored else rule.pattern})")
+        by_group[group] = (pattern.sub, rule.replacement)
+        group += 1 + pattern.groups
+    search = re.compile(("^(?:{})" if anchored else "{}").format("|".join(parts))).search
+
+    def apply(line):
+        match = search(line)
+        if match is None:
+            return line
+        # The rule's wrapping group closes last, so it is the match's lastindex
+        sub, replacement = by_group[match.lastindex]
+        return sub(replacement, line)
+
+    return apply
+
+def clean_lines(lines, rules=RULES):
+    """
+    Yield cleaned output lines for an iterable of input lines (without line endings).
+    Runs of blank lines collapse to one, trailing whitespace is dropped, leading and
+    trailing blank lines are removed and the first line loses its indentation.
+    """
+    apply = compile_rules(rules)
+    started = False
+    blank_pending = False
+    bare = None  # (text before the marker, marker) while a bare bullet waits for its item
+
     for line in lines:
-        if line.strip() == "":
-            if not last_blank:
-                cleaned.append("")
-                last_blank = True
+        line = line.rstrip()
+        if not line:
+            blank_pending = started
+            continue
+        if not started:
+            line = line.lstrip()
+        cleaned = apply(line)
+
+        if bare is not None:
+            prefix, _ = bare
+            # The blank lines between a bare bullet and its item are absorbed
+            if cleaned in BARE_LIST_MARKERS:
+                bare = (prefix + LIST_MARKER, cleaned)
+            else:
+                bare = None
+                yield prefix + LIST_MARKER + cleaned.lstrip()
+            blank_pending = False
+            continue
+
+        if blank_pending:
+            yield ""
+            blank_pending = False
+        started = True
+        if cleaned in BARE_LIST_MARKERS:
+            bare = ("", cleaned)
         else:
-            cleaned.append(line.rstrip())
-            last_blank = False
-    return "\n".join(cleaned).strip()
-
-def clean_headings(text):
-    import re
-    lines = text.splitlines()
-    return "\n".join([re.sub(r'^(#+)(\s*)', lambda m: m.group(1) + ' ', line) for line in lines])
-
-def fix_list_markers(text):
-    import re
-    return re.sub(r'^[\-•*]\s+', '- ', text, flags=re.MULTILINE)
-
-def process_file(md_path):
-    with open(md_path, "r", encoding="utf-8") as f:
-        content = f.read()
-
-    content = normalize_spacing(content)
-    content = clean_headings(content)
-    content = fix_list_markers(content)
-
-    out_path = md_path.with_name(md_path.stem + "_cleaned.md")
-    with open(out_path, "w", encoding="utf-8") as f:
-        f.write(content)
+            yield cleaned
+
+    if bare is not None:
+        prefix, marker = bare
+        yield prefix + marker
+
+# Lines are read and written in blocks of about this many characters
+IO_BLOCK = 1 << 16
+
+def _read_lines(f):
+    # str.splitlines() semantics: form feeds and other Unicode line breaks also end a line
+    while block := f.readlines(IO_BLOCK):
+        yield from "".join(block).splitlines()
+
+def process_file(md_path, rules=RULES):
+    with metrics.document("clean_md_output.py", md_path.name, md_path) as doc_metrics:
+        out_path = md_path.with_name(md_path.stem + "_cleaned.md")
+        with open(md_path, "r", encoding="utf-8") as src, open(out_path, "w", encoding="utf-8") as out:
+            separator = ""
+            block = []
+            size = 0
+            for line in clean_lines(_read_lines(src), rules):
+                block.append(line)
+                size += len(line)
+                if size >= IO_BLOCK:
+                    out.write(separator + "\n".join(block))
+                    separator = "\n"
+                    block = []
+                    size = 0
+            if block:
+                out.write(separator + "\n".join(block))
+        doc_metrics.wrote(out_path)
     return out_path
 
 def resolve_md_file(filename, fallback_dir):
@@ -58,8 +149,10 @@ def main():
     parser = argparse.ArgumentParser(description="Post-process Markdown files to normalize and clean formatting.")
     parser.add_argument("file", nargs="?", help="Markdown filename (searched in ../data/converted_md/ if not found)")
     parser.add_argument("--all", action="store_true", help="Process all .md files in ../data/converted_md/")
-    parser.add_argument("--version", "-v", action="version", version="clean_md_output.py v1.0.2")
+    parser.add_argument("--version", "-v", action="version", version="clean_md_output.py v1.2.0")
+    metrics.add_argument(parser)
     args = parser.parse_args()
+    metrics.configure(args)
 
     base_dir = Path(__file__).resolve().parent
     target_dir = base_dir / "../data/converted_md"
@@ -97,5 +190,5 @@ def main():
             print(f"⚠️ Error processing {md_path.name}: {e}")
 
 if __name__ == "__main__":
-    print("🧼 clean_md_output.py v1.0.2 – Markdown Post-Processor")
+    print("🧼 clean_md_output.py v1.2.0 – Markdown Post-Processor")
     main()
@@ -1,27 +1,43 @@
 
-# 🛠 convert_to_md.py - v2.0.9
+# 🛠 convert_to_md.py - v2.6.1
 # Purpose: Convert extracted text and structure metadata into well-formatted Markdown
 # Changelog:
+# - normalize_heading moved to md_corpus.py, so search_index.py is imported directly (no import cycle)
+# - Headings merged from wrapped lines (heading_consolidation.py) match the consecutive body lines they span;
+#   shadow repeats of a matched heading line right after it are dropped instead of taking later headings
+# - Updates the search index (search_index.py) for each converted file once the index exists; --no-index skips it
+# - --paragraphs also rejoins words hyphenated across line breaks (segment_paragraphs.Dehyphenator)
+# - Adds --paragraphs: body text is reflowed into paragraphs via segment_paragraphs.iter_paragraphs (no .segmented.txt)
+# - Adds --metrics FILE for per-document timing/memory JSON lines
+# - Streams the .txt line by line and emits matched headings inline with the body text
+# - Outline entries (which use "title") are read correctly
 # - Adds support for outline/heading entries that are plain strings (not dicts)
 # - Maintains compatibility with dict-based structure data
 
 import os
 import json
+from collections import defaultdict, deque
+from itertools import groupby
 from pathlib import Path
 
+import metrics
+import search_index
+from md_corpus import normalize_heading
+from segment_paragraphs import file_dehyphenator, iter_paragraphs
+
 INPUT_DIR = "../data/extracted_text"
 OUTPUT_DIR = "../data/converted_md"
 
-def load_structure(base_name):
+def load_structure(base_name, input_dir=INPUT_DIR):
     for ext in ["headings.json", "outline.json", "visual_toc.json"]:
-        path = os.path.join(INPUT_DIR, f"{base_name}.{ext}")
+        path = os.path.join(input_dir, f"{base_name}.{ext}")
         if os.path.exists(path):
             with open(path, "r") as f:
                 try:
                     data = json.load(f)
                     if isinstance(data, list):
                         return [
-                            {"text": h["text"] if isinstance(h, dict) and "text" in h else h,
+                            {"text": heading_text(h),
                              "level": h.get("level", 1) if isinstance(h, dict) else 1}
                             for h in data
                         ], ext.split(".")[0]
@@ -29,29 +45,132 @@ def load_structure(base_name):
                     print(f"⚠️ Skipping invalid JSON in: {path}")
     return None, "fallback"
 
-def write_markdown(base_name, lines, headings, source):
-    md_path = os.path.join(OUTPUT_DIR, f"{base_name}.md")
-    with open(md_path, "w") as md_file:
+def heading_text(entry):
+    if isinstance(entry, dict):
+        return entry.get("text", entry.get("title", ""))
+    return entry
+
+def build_heading_index(headings):
+    """Map normalized heading text → queue of heading entries, consumed in document order."""
+    index = defaultdict(deque)
+    for heading in headings:
+        key = normalize_heading(heading["text"])
+        if key:
+            index[key].append(heading)
+    return index
+
+def heading_markdown(heading):
+    level = min(max(int(heading.get("level", 1)), 1), 6)
+    return f"\n{'#' * level} {heading['text'].strip()}\n\n"
+
+def heading_prefixes(heading_index):
+    """Normalized word prefixes of multi-word headings: the first lines of a heading that wraps."""
+    prefixes = set()
+    for key in heading_index:
+        words = key.split(" ")
+        prefixes.update(" ".join(words[:i]) for i in range(1, len(words)))
+    return prefixes
+
+def tag_lines(lines, heading_index):
+    """
+    Yield (heading or None, line): a line whose normalized text matches a pending heading takes it.
+    Lines that start a heading are held until the following lines complete it (the heading then
+    replaces all of them, yielded as one event) or rule it out (they are passed through).
+    Repeats of the line that completed a heading, right after it (shadowed text), are dropped:
+    the headings file keeps one entry per shadowed heading.
+    """
+    prefixes = heading_prefixes(heading_index)
+    held = []
+    held_key = ""
+    repeat_key = None
+    for line in lines:
+        key = normalize_heading(line)
+        if key and key == repeat_key:
+            continue
+        repeat_key = None
+        if held:
+            combined = f"{held_key} {key}"
+            queue = heading_index.get(combined)
+            if key and queue:
+                yield queue.popleft(), "".join(held) + line
+                held = []
+                repeat_key = key
+                continue
+            if key and combined in prefixes:
+                held.append(line)
+                held_key = combined
+                continue
+            for held_line in held:
+                yield None, held_line
+            held = []
+        queue = heading_index.get(key)
+        if queue:
+            yield queue.popleft(), line
+            repeat_key = key
+        elif key in prefixes:
+            held = [line]
+            held_key = key
+        else:
+            yield None, line
+    for held_line in held:
+        yield None, held_line
+
+def iter_markdown(lines, heading_index):
+    """
+    Merge body lines with headings in one pass. A body line whose normalized text matches a
+    pending heading is replaced by that heading; everything else is passed through unchanged.
+    """
+    for heading, line in tag_lines(lines, heading_index):
+        yield line if heading is None else heading_markdown(heading)
+
+def iter_markdown_paragraphs(lines, heading_index, dehyphenator=None):
+    """
+    Like iter_markdown, but each run of body lines between headings is reflowed into paragraphs
+    as it streams past; only the paragraph being built is held in memory.
+    """
+    for is_heading, events in groupby(tag_lines(lines, heading_index), key=lambda event: event[0] is not None):
+        if is_heading:
+            for heading, _ in events:
+                yield heading_markdown(heading)
+        else:
+            for paragraph in iter_paragraphs((line for _, line in events), dehyphenator):
+                yield paragraph + "\n\n"
+
+def write_markdown(base_name, txt_path, headings, source, output_dir=OUTPUT_DIR, paragraphs=False):
+    md_path = os.path.join(output_dir, f"{base_name}.md")
+    if paragraphs:
+        dehyphenator = file_dehyphenator(txt_path)
+        merge = lambda lines, heading_index: iter_markdown_paragraphs(lines, heading_index, dehyphenator)
+    else:
+        merge = iter_markdown
+    with open(txt_path, "r", encoding="utf-8") as txt_file, open(md_path, "w", encoding="utf-8") as md_file:
         if headings:
+            heading_index = build_heading_index(headings)
             md_file.write(f"<!-- Structure used: {source} -->\n\n")
-            for heading in headings:
-                text = heading["text"]
-                level = heading.get("level", 1)
-                md_file.write(f"{'#' * level} {text}\n\n")
+            md_file.writelines(merge(txt_file, heading_index))
+            unmatched = sum(len(queue) for queue in heading_index.values())
+            if unmatched:
+                print(f"⚠️ {unmatched} of {len(headings)} headings not found in the text")
+        elif paragraphs:
+            md_file.writelines(merge(txt_file, {}))
         else:
-            md_file.writelines(lines)
+            md_file.writelines(txt_file)
     print(f"✅ Converted {base_name} → {base_name}.md (Structure: {source})")
 
-def convert_file(base_name):
-    txt_path = os.path.join(INPUT_DIR, f"{base_name}.txt")
+def convert_file(base_name, input_dir=INPUT_DIR, output_dir=OUTPUT_DIR, paragraphs=False, search_db=None):
+    txt_path = os.path.join(input_dir, f"{base_name}.txt")
     if not os.path.exists(txt_path):
         print(f"❌ Text file missing: {txt_path}")
         return
-    with open(txt_path, "r") as f:
-        lines = f.readlines()
 
-    headings, source = load_structure(base_name)
-    write_markdown(base_name, lines, headings, source)
+    md_path = os.path.join(output_dir, f"{base_name}.md")
+    with metrics.document("convert_to_md.py", base_name, txt_path) as doc_metrics:
+        headings, source = load_structure(base_name, input_dir)
+        write_markdown(base_name, txt_path, headings, source, output_dir, paragraphs)
+        doc_metrics.wrote(md_path)
+    if search_db:
+        sections = search_index.update_document(md_path, search_db, input_dir)
+        print(f"🔎 Search index updated: {sections} sections")
 
 def list_available():
     files = Path(INPUT_DIR).glob("*.txt")
@@ -61,12 +180,23 @@ def main():
     import argparse
     parser = argparse.ArgumentParser(description="Convert extracted text to Markdown")
     parser.add_argument("filename", nargs="?", help="PDF base name (no extension)")
-    parser.add_argument("--version", "-v", action="version", version="2.0.9")
+    parser.add_argument("--paragraphs", action="store_true",
+                        help="Reflow body text into paragraphs (as segment_paragraphs.py does) instead of copying lines")
+    parser.add_argument("--no-index", action="store_true",
+                        help="Do not update the search index (search_index.py) with the converted file")
+    parser.add_argument("--version", "-v", action="version", version="2.6.1")
+    metrics.add_argument(parser)
     args = parser.parse_args()
+    metrics.configure(args)
+
+    search_db = None
+    if not args.no_index:
+        if search_index.index_exists():
+            search_db = search_index.DB_PATH
 
     if args.filename:
         base = Path(args.filename).stem
-        convert_file(base)
+        convert_file(base, paragraphs=args.paragraphs, search_db=search_db)
     else:
         files = list_available()
         print("Choose a PDF to convert to Markdown:")
@@ -77,7 +207,7 @@ def main():
             return
         try:
             index = int(choice) - 1
-            convert_file(files[index])
+            convert_file(files[index], paragraphs=args.paragraphs, search_db=search_db)
         except (ValueError, IndexError):
             print("❌ Invalid selection")
 
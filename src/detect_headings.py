@@ -1,18 +1,29 @@
 #!/usr/bin/env python3
 """ 
-detect_headings.py - v1.0.2
+detect_headings.py - v1.10.3
 
 Purpose:
-Detect and extract headings from a PDF file based on font size heuristics.
+Detect and extract headings from a PDF file based on font size relative to the body text.
 
 Key Features:
 - Accepts single filename (positional)
-- Supports --all batch processing
+- Supports --all batch processing over a process pool (--jobs N; unchanged PDFs are skipped via the cache manifest; --force to rebuild)
 - Fallback to interactive selection
 - Compatible with interactive_pipeline.py
+- Heading levels come from size clusters relative to body text (heading_classifier.py)
+- Supports --metrics FILE for per-document timing/memory JSON lines
+- Re-runs on a revised PDF rescan only pages whose fingerprint changed; per-page state is kept
+  in <stem>.headings.pages.json (--force for a full rescan)
+- Noise candidates (stray letters, fragments, body sentences) are dropped before the JSON is
+  written (heading_filter.py; --keep-noise to keep them), and so are running headers/footers
+  found from the top and bottom lines of every page (running_headers.py)
+- Shadow copies are dropped and multi-span headings (drop caps, wrapped titles) merged into one
+  entry with its bbox before filtering (heading_consolidation.py)
+- Headings of multi-column pages come in column reading order (layout_order.py)
 
 Dependencies:
 - PyMuPDF
+- NumPy
 - tqdm
 """
 
@@ -20,44 +31,164 @@ import argparse
 import fitz  # PyMuPDF
 from pathlib import Path
 from tqdm import tqdm
+from collections import Counter
 import json
 import sys
 
+import batch_pool
+import metrics
+from artifact_cache import filter_stale, load_manifest, record, save_manifest
+from heading_classifier import (SpanTable, assign_levels, body_size_from_histogram, char_histograms,
+                                heading_candidates)
+from heading_filter import filter_headings
+from layout_order import order_page_dict
+from page_text import page_fingerprints
+from running_headers import RunningHeaders, edge_lines, page_lines
+
 SCRIPT_NAME = "detect_headings.py"
-VERSION = "1.0.2"
+VERSION = "1.10.3"
 INPUT_DIR = Path("../data/input_pdfs")
 OUTPUT_DIR = Path("../data/extracted_text")
+STATE_VERSION = 5
 
-def detect_headings_from_pdf(pdf_path, output_dir):
-    doc = fitz.open(pdf_path)
-    headings = []
-
-    for page in tqdm(doc, desc=f"🔎 Scanning {pdf_path.name}", unit="page"):
-        blocks = page.get_text("dict")["blocks"]
-        for block in blocks:
-            for line in block.get("lines", []):
-                for span in line.get("spans", []):
-                    text = span.get("text", "").strip()
-                    size = span.get("size", 0)
-                    if text and len(text) < 100 and size >= 14:  # heuristic
-                        headings.append({"text": text, "size": size})
-
-    output_path = output_dir / (pdf_path.stem + ".headings.json")
+def write_headings(headings, output_path):
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(headings, f, indent=2)
-    doc.close()
     print(f"✅ Saved: {output_path}")
 
+def state_path(output_path):
+    return output_path.with_name(output_path.name.replace(".headings.json", ".headings.pages.json"))
+
+def load_state(output_path):
+    """
+    Per-page state of the previous run: {"body_size", "pages": [{"fingerprint", "histogram", "headings", "edges"}]}.
+    Returns None when there is no usable state (or no headings file it belongs to).
+    """
+    try:
+        if not output_path.exists():
+            return None
+        with open(state_path(output_path), "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if state.get("version") != STATE_VERSION:
+        return None
+    for page in state["pages"]:
+        page["histogram"] = {float(size): chars for size, chars in page["histogram"].items()}
+        page["edges"] = [tuple(edge) for edge in page["edges"]]
+    return state
+
+def write_state(output_path, body, pages):
+    with open(state_path(output_path), "w", encoding="utf-8") as f:
+        json.dump({"version": STATE_VERSION, "body_size": body, "pages": pages}, f)
+
+def pages_body_size(histograms):
+    """Body text size of a document from its per-page {size: chars} histograms."""
+    totals = Counter()
+    for histogram in histograms.values():
+        totals.update(histogram)
+    return body_size_from_histogram(totals)
+
+def state_pages(fingerprints, histograms, page_headings, running):
+    """
+    Page entries for write_state(): page_headings maps page numbers to their unfiltered
+    candidates, running is the RunningHeaders the edge lines were collected in.
+    """
+    return [{
+        "fingerprint": fingerprint,
+        "histogram": {str(size): chars for size, chars in histograms.get(i + 1, {}).items()},
+        "headings": page_headings.get(i + 1, []),  # levels are re-ranked on every run
+        "edges": running.pages.get(i + 1, []),
+    } for i, fingerprint in enumerate(fingerprints)]
+
+def _scan(doc, indexes, spans, running, doc_metrics, desc):
+    for i in doc_metrics.pages(tqdm(indexes, desc=desc, unit="page")):
+        page = doc[i]
+        page_dict = order_page_dict(page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT))
+        spans.add_page(page_dict, i + 1)
+        running.add_page(i + 1, edge_lines(page_lines(page_dict), page.rect.height))
+
+def detect_headings_from_pdf(pdf_path, output_dir, doc=None, incremental=True, keep_noise=False):
+    """
+    Write output_dir/<stem>.headings.json. With incremental, pages whose fingerprint matches the
+    previous run keep their stored headings and only changed pages are scanned; levels are then
+    re-ranked over the whole document. If the edit moves the body text size, every page is rescanned.
+    Noise candidates are filtered out unless keep_noise; the page state keeps every candidate.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    owns_doc = doc is None
+    if owns_doc:
+        doc = fitz.open(pdf_path)
+    spans = SpanTable()
+    running = RunningHeaders()
+    output_path = output_dir / (pdf_path.stem + ".headings.json")
+    desc = f"🔎 Scanning {pdf_path.name}"
+
+    with metrics.document(SCRIPT_NAME, pdf_path.name, pdf_path) as doc_metrics:
+        fingerprints = page_fingerprints(doc)
+        state = load_state(output_path) if incremental else None
+        stored = {page["fingerprint"]: page for page in state["pages"]} if state else {}
+        changed = [i for i, fingerprint in enumerate(fingerprints) if fingerprint not in stored]
+        if state:
+            print(f"♻️ {len(fingerprints) - len(changed)} of {len(fingerprints)} pages unchanged; rescanning {len(changed)}")
+        _scan(doc, changed, spans, running, doc_metrics, desc)
+
+        histograms = char_histograms(spans)
+        for i, fingerprint in enumerate(fingerprints):
+            if fingerprint in stored:
+                histograms[i + 1] = stored[fingerprint]["histogram"]
+                running.add_page(i + 1, stored[fingerprint]["edges"])
+        body = pages_body_size(histograms)
+
+        if state and body != state["body_size"] and len(changed) < len(fingerprints):
+            # Stored candidates were chosen against the old body size; they are no longer valid
+            print(f"⚠️ Body text size changed ({state['body_size']} → {body}); rescanning every page")
+            stored = {}
+            unchanged = sorted(set(range(len(fingerprints))) - set(changed))
+            _scan(doc, unchanged, spans, running, doc_metrics, desc)
+
+        if owns_doc:
+            doc.close()
+
+        by_page = {}
+        for heading in heading_candidates(spans, body):
+            by_page.setdefault(heading["page"], []).append(heading)
+        page_headings = {}
+        for i, fingerprint in enumerate(fingerprints):
+            if fingerprint in stored:
+                page_headings[i + 1] = [dict(h, page=i + 1) for h in stored[fingerprint]["headings"]]
+            else:
+                page_headings[i + 1] = by_page.get(i + 1, [])
+        headings = [heading for number in sorted(page_headings) for heading in page_headings[number]]
+        pages = state_pages(fingerprints, histograms, page_headings, running)
+        if not keep_noise:
+            running_texts = running.running_texts(running.running_keys(len(fingerprints)))
+            headings, dropped = filter_headings(headings, running_texts)
+            if dropped:
+                reasons = ", ".join(f"{count} {reason}" for reason, count in dropped.most_common())
+                print(f"🧹 Dropped {sum(dropped.values())} noise headings ({reasons})")
+        assign_levels(headings)
+        write_headings(headings, output_path)
+        write_state(output_path, body, pages)
+        doc_metrics.wrote(output_path, state_path(output_path))
+
 def main():
     parser = argparse.ArgumentParser(description="Detect headings from PDF by font size")
     parser.add_argument("filename", nargs="?", help="PDF file to process (from input_pdfs/)")
     parser.add_argument("--all", action="store_true", help="Process all PDFs in the input folder")
+    parser.add_argument("--force", action="store_true",
+                        help="Ignore the cache manifest and page fingerprints; rescan every page")
+    parser.add_argument("--keep-noise", action="store_true",
+                        help="Keep heading candidates the noise filter would drop (stray letters, running headers)")
+    batch_pool.add_argument(parser)
+    metrics.add_argument(parser)
     parser.add_argument("--version", "-v", action="store_true", help="Show version info and exit")
 
     args = parser.parse_args()
+    metrics.configure(args)
 
     print(f"🛠 {SCRIPT_NAME} - v{VERSION}")
-    print("📘 Purpose: Detect headings from PDFs using font size heuristics")
+    print("📘 Purpose: Detect headings from PDFs by font size relative to body text")
     print(f"📥 Expected input:   {INPUT_DIR.resolve()}")
     print(f"📤 Expected output:  {OUTPUT_DIR.resolve()}")
 
@@ -69,8 +200,22 @@ def main():
         if not files:
             print("❌ No PDF files found in input folder.")
             sys.exit(1)
-        for pdf_path in files:
-            detect_headings_from_pdf(pdf_path, OUTPUT_DIR)
+        manifest = load_manifest(OUTPUT_DIR)
+        outputs_for = lambda p: [OUTPUT_DIR / (p.stem + ".headings.json")]
+        # Filtered and unfiltered output are cached as different versions
+        cache_version = VERSION + ("+noise" if args.keep_noise else "")
+        stale = filter_stale(manifest, SCRIPT_NAME, cache_version, files, outputs_for, args.force)
+        if args.jobs > 1 and len(stale) > 1:
+            for result in batch_pool.run_batch(detect_headings_from_pdf, stale, args.jobs, "🔎 Detecting headings",
+                                               (OUTPUT_DIR, None, not args.force, args.keep_noise)):
+                if result["ok"]:
+                    record(manifest, SCRIPT_NAME, cache_version, result["pdf"])
+            save_manifest(manifest, OUTPUT_DIR)
+            return
+        for pdf_path in stale:
+            detect_headings_from_pdf(pdf_path, OUTPUT_DIR, incremental=not args.force, keep_noise=args.keep_noise)
+            record(manifest, SCRIPT_NAME, cache_version, pdf_path)
+            save_manifest(manifest, OUTPUT_DIR)
         return
 
     if args.filename:
@@ -78,7 +223,7 @@ def main():
         if not pdf_path.exists():
             print(f"❌ File not found: {pdf_path}")
             sys.exit(1)
-        detect_headings_from_pdf(pdf_path, OUTPUT_DIR)
+        detect_headings_from_pdf(pdf_path, OUTPUT_DIR, incremental=not args.force, keep_noise=args.keep_noise)
         return
 
     # Interactive fallback
@@ -93,7 +238,7 @@ def main():
     choice = input("\nEnter number: ").strip()
     try:
         selected = files[int(choice)]
-        detect_headings_from_pdf(selected, OUTPUT_DIR)
+        detect_headings_from_pdf(selected, OUTPUT_DIR, incremental=not args.force, keep_noise=args.keep_noise)
     except (ValueError, IndexError):
         print("❌ Invalid selection.")
 
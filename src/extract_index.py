@@ -1,19 +1,40 @@
 #!/usr/bin/env python3
 """
 Script: extract_index.py
-Version: 1.0.0
+Version: 1.2.2
 Purpose: Extract index terms and page numbers from .txt files for tagging or glossary use.
 Author: ChatGPT for Hoody's PDF → Markdown Project
+
+Only index pages are parsed: among the last --tail pages (read through the .pages.json
+sidecar), a page counts as an index page when most of its lines end in page references.
+Recognized entry forms:
+    Term ........ 123                 dotted leaders
+    Term, 12, 45-47, 103              comma-separated pages and ranges
+    Term. See Other Term              cross-references (see / see also, ; between targets)
+    Term, 12; see also Other Term
+      see also Other Term             a cross-reference line: belongs to the entry above
+      sub-entry, 56                   indented, dash-prefixed or lowercase: belongs to the entry above
+Wrapped lines (ending in a comma or a range dash) are joined before parsing, and a line of
+page numbers alone continues the previous entry.
+
+Entries in <stem>.index_terms.json:
+    {"term": "Greyhawk", "page": 45, "end": 47}        one per page reference ("end" for ranges)
+    {"term": "history", "page": 56, "parent": "Greyhawk"}
+    {"term": "Oerth", "see": ["Flanaess"], "also": false}
 """
 
 import sys
 import re
 import json
+from itertools import groupby
 from pathlib import Path
 from tqdm import tqdm
 
+import metrics
+from page_text import PagedText, has_page_index
+
 SCRIPT_NAME = "extract_index.py"
-SCRIPT_VERSION = "1.0.0"
+SCRIPT_VERSION = "1.2.2"
 SCRIPT_PURPOSE = "Extract index terms and page numbers from text"
 
 # Paths
@@ -21,13 +42,37 @@ BASE_DIR = Path(__file__).resolve().parent
 TEXT_DIR = BASE_DIR / "../data/extracted_text"
 OUTPUT_DIR = BASE_DIR / "../data/extracted_text/index_terms"
 
+# Index page detection: back-of-book indexes live in the last pages
+INDEX_TAIL_PAGES = 30
+MIN_INDEX_DENSITY = 0.5
+MIN_INDEX_LINES = 5
+
+_LOCATOR = r"\d{1,4}(?:\s*[-–—]\s*\d{1,4})?"
+_LOCATORS = rf"{_LOCATOR}(?:\s*,\s*{_LOCATOR})*"
+_SEE = r"[.;,]?\s*\(?(?P<see>see(?:\s+also)?)\s+(?P<targets>[^)]+?)\)?\.?"
+# A term is everything up to the locators and holds a letter; the non-letters in front of its
+# first letter are matched greedily, so only one lazy quantifier scans the line
+_TERM = r"(?P<term>[\W\d_]*[^\W\d_].*?)"
+ENTRY_PATTERN = re.compile(
+    rf"^{_TERM}(?:\s*\.{{2,}}\s*|\s*,\s*|\s+)(?P<pages>{_LOCATORS})\s*,?(?:{_SEE})?$", re.I)
+SEE_PATTERN = re.compile(rf"^{_TERM}{_SEE}$", re.I)
+# A cross-reference on a line of its own belongs to the entry above, however it is indented
+SEE_LINE = re.compile(rf"^{_SEE}$", re.I)
+LOCATOR_LINE = re.compile(rf"^,?\s*(?P<pages>{_LOCATORS})\s*,?$")
+LOCATOR = re.compile(r"(\d{1,4})(?:\s*[-–—]\s*(\d{1,4}))?")
+SUB_ENTRY_MARK = re.compile(r"^[-–—•]\s*")
+# Letter dividers and the index title are not terms
+SKIP_LINE = re.compile(r"^(?:[A-Z]|index)$", re.I)
+
 def parse_args():
     return {
         "show_help": "--help" in sys.argv or "-h" in sys.argv,
         "show_version": "--version" in sys.argv or "-v" in sys.argv,
         "run_all": "--all" in sys.argv,
         "verbose": "--verbose" in sys.argv,
-        "target_file": next((sys.argv[i + 1] for i, arg in enumerate(sys.argv) if arg == "--file"), None)
+        "target_file": next((sys.argv[i + 1] for i, arg in enumerate(sys.argv) if arg == "--file"), None),
+        "tail_pages": int(next((sys.argv[i + 1] for i, arg in enumerate(sys.argv) if arg == "--tail"), INDEX_TAIL_PAGES)),
+        "metrics": next((sys.argv[i + 1] for i, arg in enumerate(sys.argv) if arg == "--metrics"), None)
     }
 
 def print_header():
@@ -45,42 +90,208 @@ Options:
   --file <filename>     Process a single .txt file
   --all                 Process all .txt files in extracted_text
   --verbose             Print extracted terms to screen
+  --tail <n>            Look for index pages among the last n pages (default: 30)
+  --metrics <file>      Append per-document timing/memory metrics as JSON lines
   --version, -v         Show script version
   --help, -h            Show this help message
 """)
 
+def parse_locators(text):
+    """'12, 45-47, 103' → [(12, None), (45, 47), (103, None)]; abbreviated ranges like 123-7 are expanded."""
+    locators = []
+    for start, end in LOCATOR.findall(text):
+        if end and int(end) < int(start):
+            end = start[:len(start) - len(end)] + end
+        locators.append((int(start), int(end) if end and int(end) != int(start) else None))
+    return locators
+
+def could_be_entry(text):
+    """Cheap pre-check: an entry ends in a page locator or carries a see reference."""
+    return text.rstrip().rstrip(",").rstrip()[-1:].isdigit() or "see" in text.lower()
+
+def match_entry(text):
+    """ENTRY_PATTERN or SEE_PATTERN match of a stripped line, or None."""
+    if not could_be_entry(text):
+        return None
+    return ENTRY_PATTERN.match(text) or SEE_PATTERN.match(text)
+
+def is_index_line(line):
+    line = SUB_ENTRY_MARK.sub("", line.strip())
+    return bool(LOCATOR_LINE.match(line) or SEE_LINE.match(line) or match_entry(line))
+
+def is_index_page(text):
+    lines = [line for line in text.splitlines() if line.strip()]
+    if len(lines) < MIN_INDEX_LINES:
+        return False
+    return sum(1 for line in lines if is_index_line(line)) / len(lines) >= MIN_INDEX_DENSITY
+
+class IndexParser:
+    """Line-by-line index parser; keeps the current parent entry across lines and pages."""
+
+    def __init__(self, verbose=False):
+        self.verbose = verbose
+        self.entries = []
+        self.parent = None
+        self.parent_indent = 0
+        self.last = None    # (term, parent) a bare page-number line continues
+        self.held = None    # (text, indent) of a line wrapped after a comma or range dash
+
+    def page_break(self):
+        # Numbers at the top of the next page are page numbers, not a continued entry
+        if self.held:
+            self._parse(*self.held)
+            self.held = None
+        self.last = None
+
+    def feed(self, line):
+        if not line.strip():
+            return
+        indent = len(line) - len(line.lstrip())
+        if self.held and (indent > self.held[1] or SUB_ENTRY_MARK.match(line.strip())):
+            # A sub-entry below a term ending in a comma, not the rest of a wrapped line
+            self._parse(*self.held)
+            self.held = None
+        if self.held:
+            text, indent = self.held[0] + " " + line.strip(), self.held[1]
+            self.held = None
+        else:
+            text = line.strip()
+        if text.endswith((",", "-", "–", "—")):
+            self.held = (text, indent)
+            return
+        self._parse(text, indent)
+
+    def finish(self):
+        self.page_break()
+        return self.entries
+
+    def _add(self, entry):
+        if self.verbose:
+            target = f"p.{entry['page']}" if "page" in entry else f"see {'; '.join(entry['see'])}"
+            print(f"  ➤ {entry['term']} → {target}")
+        self.entries.append(entry)
+
+    def _parse(self, text, indent):
+        if SKIP_LINE.match(text):
+            return
+        continued = LOCATOR_LINE.match(text)
+        if continued:
+            if self.last:
+                self._add_pages(*self.last, continued.group("pages"))
+            return
+        marked = bool(SUB_ENTRY_MARK.match(text))
+        text = SUB_ENTRY_MARK.sub("", text)
+        see_line = SEE_LINE.match(text) if not text[-1:].isdigit() else None
+        if see_line:
+            # Refers to the last entry, or to the term heading the sub-entries when it had no pages
+            term, parent = self.last or (self.parent, None)
+            if term:
+                self._add_see(term, parent, see_line)
+            return
+        match = match_entry(text)
+        if not match:
+            # A term without pages heads the sub-entries below it
+            self.parent = text.rstrip(",.:;")
+            self.parent_indent = indent
+            self.last = None
+            return
+
+        term = match.group("term").strip().rstrip(",.:;")
+        if self.parent and (marked or indent > self.parent_indent or term[:1].islower()):
+            parent = self.parent
+        else:
+            parent = None
+            self.parent = term
+            self.parent_indent = indent
+        pages = match.groupdict().get("pages")
+        if pages:
+            self._add_pages(term, parent, pages)
+        if match.group("see"):
+            self._add_see(term, parent, match)
+        self.last = (term, parent)
+
+    def _add_see(self, term, parent, match):
+        entry = {"term": term, "see": [t.strip() for t in match.group("targets").split(";") if t.strip()],
+                 "also": "also" in match.group("see").lower()}
+        if parent:
+            entry["parent"] = parent
+        self._add(entry)
+
+    def _add_pages(self, term, parent, pages):
+        for start, end in parse_locators(pages):
+            entry = {"term": term, "page": start}
+            if end:
+                entry["end"] = end
+            if parent:
+                entry["parent"] = parent
+            self._add(entry)
+
 def extract_index_entries(lines, verbose=False):
-    entries = []
-    pattern = re.compile(r"^(.*?)\.{2,}\s*(\d{1,4})$")
+    """Parse index lines (one page's worth or a whole index) into entries."""
+    parser = IndexParser(verbose)
     for line in lines:
-        match = pattern.match(line.strip())
-        if match:
-            term = match.group(1).strip()
-            page = match.group(2).strip()
-            if verbose:
-                print(f"  ➤ {term} → p.{page}")
-            entries.append({"term": term, "page": int(page)})
-    return entries
-
-def write_outputs(stem, entries):
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    json_path = OUTPUT_DIR / f"{stem}.index_terms.json"
-    md_path = OUTPUT_DIR / f"{stem}.index_terms.md"
+        parser.feed(line)
+    return parser.finish()
+
+def find_index_pages(paged, tail_pages=INDEX_TAIL_PAGES):
+    """Page numbers among the last tail_pages pages that look like index pages."""
+    first = max(1, paged.page_count - tail_pages + 1)
+    return [number for number, text in paged.iter_pages(first) if is_index_page(text)]
+
+def extract_from_pages(paged, pages, verbose=False):
+    parser = IndexParser(verbose)
+    for number in pages:
+        for line in paged.page(number).splitlines():
+            parser.feed(line)
+        parser.page_break()
+    return parser.finish()
+
+def write_outputs(stem, entries, output_dir=OUTPUT_DIR):
+    output_dir.mkdir(parents=True, exist_ok=True)
+    json_path = output_dir / f"{stem}.index_terms.json"
+    md_path = output_dir / f"{stem}.index_terms.md"
 
     # Save JSON
     with open(json_path, "w", encoding="utf-8") as f:
         json.dump(entries, f, indent=2)
 
-    # Save Markdown
+    # Save Markdown: one bullet per term, sub-entries nested under their parent
     with open(md_path, "w", encoding="utf-8") as f:
-        for entry in entries:
-            f.write(f"- **{entry['term']}** — page {entry['page']}\n")
+        heading = None
+        for (term, parent), group in groupby(entries, key=lambda e: (e["term"], e.get("parent"))):
+            refs = []
+            for entry in group:
+                if "page" in entry:
+                    refs.append(f"{entry['page']}–{entry['end']}" if "end" in entry else str(entry["page"]))
+                else:
+                    refs.append(("see also " if entry["also"] else "see ") + "; ".join(entry["see"]))
+            pages = [r for r in refs if not r.startswith("see")]
+            text = ", ".join(pages)
+            if pages:
+                text = ("page " if len(pages) == 1 and "–" not in pages[0] else "pages ") + text
+            text = "; ".join([text] * bool(pages) + [r for r in refs if r.startswith("see")])
+            if parent and parent != heading:
+                f.write(f"- **{parent}**\n")
+            heading = parent or term
+            indent = "  " if parent else ""
+            f.write(f"{indent}- **{term}** — {text}\n")
 
-def process_file(filepath: Path, verbose=False):
-    lines = filepath.read_text(encoding="utf-8").splitlines()
-    entries = extract_index_entries(lines, verbose=verbose)
-    write_outputs(filepath.stem, entries)
-    print(f"✅ Extracted {len(entries)} index entries from {filepath.name}")
+def process_file(filepath: Path, verbose=False, output_dir=OUTPUT_DIR, tail_pages=INDEX_TAIL_PAGES):
+    with metrics.document(SCRIPT_NAME, filepath.name, filepath) as doc_metrics:
+        if has_page_index(filepath):
+            with PagedText(filepath) as paged:
+                pages = find_index_pages(paged, tail_pages)
+                entries = extract_from_pages(paged, pages, verbose=verbose)
+                doc_metrics.add_pages(len(pages))
+            where = f"index pages {', '.join(map(str, pages))}" if pages else "no index pages found"
+        else:
+            print(f"⚠️ No page sidecar for {filepath.name}; parsing the whole text (re-run extract_text.py)")
+            lines = filepath.read_text(encoding="utf-8").splitlines()
+            entries = extract_index_entries(lines, verbose=verbose)
+            where = "whole text"
+        write_outputs(filepath.stem, entries, output_dir)
+        doc_metrics.wrote(output_dir / f"{filepath.stem}.index_terms.json", output_dir / f"{filepath.stem}.index_terms.md")
+    print(f"✅ Extracted {len(entries)} index entries from {filepath.name} ({where})")
 
 def main():
     args = parse_args()
@@ -93,6 +304,8 @@ def main():
         return
 
     print_header()
+    if args["metrics"]:
+        metrics.enable(args["metrics"])
 
     files = []
     if args["run_all"]:
@@ -109,7 +322,7 @@ def main():
         return
 
     for file in tqdm(files, desc="Extracting index", unit="file"):
-        process_file(file, verbose=args["verbose"])
+        process_file(file, verbose=args["verbose"], tail_pages=args["tail_pages"])
 
 if __name__ == "__main__":
     main()
@@ -1,8 +1,10 @@
 
 #!/usr/bin/env python3
 """
-extract_outline.py - v1.0.0
+extract_outline.py - v1.4.0
 Purpose: Extract the PDF's outline (bookmarks) and save as outline.json
+--metrics FILE appends per-document timing/memory JSON lines
+--all runs PDFs over a process pool (--jobs N, see batch_pool.py) and skips PDFs whose content hash and script version match the cache manifest (--force to rebuild)
 """
 
 import os
@@ -11,30 +13,45 @@ import argparse
 import json
 from tqdm import tqdm
 
+import batch_pool
+import metrics
+from artifact_cache import filter_stale, load_manifest, record, save_manifest
+
 SCRIPT_NAME = "extract_outline.py"
-VERSION = "v1.0.0"
+VERSION = "v1.4.0"
 
 INPUT_DIR = "../data/input_pdfs"
 OUTPUT_DIR = "../data/extracted_text"
 
-def extract_outline(pdf_path):
-    filename = os.path.splitext(os.path.basename(pdf_path))[0]
-    output_path = os.path.join(OUTPUT_DIR, f"{filename}.outline.json")
-
-    doc = fitz.open(pdf_path)
+def outline_entries(doc):
+    """Return the bookmark outline of an open document as JSON-ready dicts."""
     outline = doc.get_toc(simple=True)  # [ [level, title, page], ... ]
-    doc.close()
-
-    json_ready = [
+    return [
         {"level": item[0], "title": item[1], "page": item[2]}
         for item in outline
     ]
 
+def write_outline(entries, output_path):
     with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(json_ready, f, indent=2)
+        json.dump(entries, f, indent=2)
 
     print(f"✅ Extracted outline: {os.path.basename(output_path)}")
 
+def extract_outline(pdf_path, doc=None, output_dir=OUTPUT_DIR):
+    filename = os.path.splitext(os.path.basename(pdf_path))[0]
+    output_path = os.path.join(output_dir, f"{filename}.outline.json")
+
+    with metrics.document(SCRIPT_NAME, os.path.basename(pdf_path), pdf_path) as doc_metrics:
+        if doc is None:
+            doc = fitz.open(pdf_path)
+            json_ready = outline_entries(doc)
+            doc.close()
+        else:
+            json_ready = outline_entries(doc)
+
+        write_outline(json_ready, output_path)
+        doc_metrics.wrote(output_path)
+
 def list_pdfs():
     files = [f for f in os.listdir(INPUT_DIR) if f.lower().endswith(".pdf")]
     return sorted(files)
@@ -47,15 +64,30 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("file", nargs="?", help="PDF filename to extract outline from")
     parser.add_argument("--all", action="store_true", help="Extract from all PDFs")
+    parser.add_argument("--force", action="store_true", help="Ignore the cache manifest and reprocess every PDF")
+    batch_pool.add_argument(parser)
+    metrics.add_argument(parser)
     parser.add_argument("--version", "-v", action="version", version=VERSION)
 
     args = parser.parse_args()
+    metrics.configure(args)
 
     pdfs = list_pdfs()
 
     if args.all:
-        for f in tqdm(pdfs, desc="Extracting outlines"):
-            extract_outline(os.path.join(INPUT_DIR, f))
+        manifest = load_manifest(OUTPUT_DIR)
+        paths = [os.path.join(INPUT_DIR, f) for f in pdfs]
+        outputs_for = lambda p: [os.path.join(OUTPUT_DIR, f"{os.path.splitext(os.path.basename(p))[0]}.outline.json")]
+        stale = filter_stale(manifest, SCRIPT_NAME, VERSION, paths, outputs_for, args.force)
+        if args.jobs > 1 and len(stale) > 1:
+            for result in batch_pool.run_batch(extract_outline, stale, args.jobs, "Extracting outlines"):
+                if result["ok"]:
+                    record(manifest, SCRIPT_NAME, VERSION, result["pdf"])
+        else:
+            for pdf_path in tqdm(stale, desc="Extracting outlines"):
+                extract_outline(pdf_path)
+                record(manifest, SCRIPT_NAME, VERSION, pdf_path)
+        save_manifest(manifest, OUTPUT_DIR)
     elif args.file:
         target = os.path.join(INPUT_DIR, args.file)
         if not os.path.exists(target):
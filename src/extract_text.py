@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """ 
-extract_text.py - v1.6.4
+extract_text.py - v1.15.1
 
 Purpose:
 Extract raw text from a PDF using PyMuPDF. Supports both single-file and --all batch mode.
@@ -8,44 +8,255 @@ Extract raw text from a PDF using PyMuPDF. Supports both single-file and --all b
 Key Features:
 - Accepts filename as positional argument
 - Supports --all, --help, --version, -v
-- Outputs to ../data/extracted_text/
+- Supports --workers N to extract page shards in parallel processes
+- --all spreads PDFs over a process pool (--jobs N, default all cores; see batch_pool.py)
+- --all skips PDFs whose content hash and script version match the cache manifest (--force to rebuild)
+- Supports --metrics FILE for per-document timing/memory JSON lines
+- Outputs to ../data/extracted_text/ (.txt plus a .pages.json page-offset sidecar, see page_text.py)
+- Re-runs on a revised PDF re-extract only pages whose fingerprint changed (--force for a full re-extract)
+- --ocr replaces image-only scanned pages with Tesseract OCR text (see ocr_pages.py; cached per page)
+- --strip-headers drops running headers, footers and page numbers (see running_headers.py)
+- Text blocks are written in reading order, column by column on multi-column pages
+  (see layout_order.py); --stream-order keeps PyMuPDF's content-stream order
 
 Dependencies:
 - PyMuPDF
 - tqdm
+- Tesseract (only for --ocr)
 """
 
 import argparse
 import fitz  # PyMuPDF
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from tqdm import tqdm
+import os
 import sys
+import time
+
+import batch_pool
+import metrics
+import ocr_pages
+from layout_order import READING_ORDER, order_page_dict, page_text
+from running_headers import RunningHeaders, edge_lines, page_lines
+from artifact_cache import filter_stale, load_manifest, record, save_manifest
+from page_text import PagedText, PagedTextWriter, load_page_index, page_fingerprints, sidecar_path
 
 SCRIPT_NAME = "extract_text.py"
-VERSION = "1.6.4"
+VERSION = "1.15.1"
 INPUT_DIR = Path("../data/input_pdfs")
 OUTPUT_DIR = Path("../data/extracted_text")
 
-def extract_text_from_pdf(pdf_path, output_dir):
+# Shards per worker: more, smaller shards keep workers busy when page cost is uneven
+SHARDS_PER_WORKER = 4
+
+_worker_doc = None
+_worker_layout = True
+
+def _open_worker_doc(pdf_path, layout=True):
+    # Runs once in each worker process so every shard reuses the same open document
+    global _worker_doc, _worker_layout
+    _worker_doc = fitz.open(pdf_path)
+    _worker_layout = layout
+
+def _page_text(page, layout=True):
+    return page_text(page) if layout else page.get_text()
+
+def _extract_shard(page_range):
+    start, stop = page_range
+    return [_page_text(_worker_doc[i], _worker_layout) for i in range(start, stop)]
+
+def _page_lines(page, layout=True):
+    """Text lines of a page plus its edge lines (for running header detection), from one dict decode."""
+    page_dict = page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)
+    lines = page_lines(order_page_dict(page_dict) if layout else page_dict)
+    return [text for text, _, _ in lines], edge_lines(lines, page.rect.height)
+
+def _extract_shard_lines(page_range):
+    start, stop = page_range
+    return [_page_lines(_worker_doc[i], _worker_layout) for i in range(start, stop)]
+
+def make_shards(page_count, shard_count):
+    """Split range(page_count) into contiguous (start, stop) ranges of near-equal size."""
+    shard_count = max(1, min(shard_count, page_count))
+    size, extra = divmod(page_count, shard_count)
+    shards = []
+    start = 0
+    for i in range(shard_count):
+        stop = start + size + (1 if i < extra else 0)
+        shards.append((start, stop))
+        start = stop
+    return shards
+
+def _extract_pages_parallel(pdf_path, page_count, workers, out, fingerprints, doc_metrics, ocr_texts, layout):
+    shards = make_shards(page_count, workers * SHARDS_PER_WORKER)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_open_worker_doc,
+                             initargs=(str(pdf_path), layout)) as pool, \
+            tqdm(total=page_count, desc=f"📄 Extracting {pdf_path.name} ({workers} workers)", unit="page") as bar:
+        # map() yields shard results in submission order, so pages are stitched back in order
+        for (start, _), texts in zip(shards, pool.map(_extract_shard, shards)):
+            for offset, text in enumerate(texts):
+                out.write_page(ocr_texts.get(start + offset, text), fingerprints[start + offset])
+            bar.update(len(texts))
+            doc_metrics.add_pages(len(texts))
+
+def _extract_stripped(doc, pdf_path, workers, out, doc_metrics, ocr_texts, layout):
+    """
+    Decode every page once into lines, find running headers/footers over the whole document,
+    then write the pages without them. Page lines are held until the end, as the running lines
+    are only known once every page has been seen.
+    """
+    page_count = len(doc)
+    running = RunningHeaders()
+    pages = []
+    desc = f"📄 Extracting {pdf_path.name}"
+    if workers > 1 and page_count > 1:
+        shards = make_shards(page_count, workers * SHARDS_PER_WORKER)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_open_worker_doc,
+                                 initargs=(str(pdf_path), layout)) as pool, \
+                tqdm(total=page_count, desc=f"{desc} ({workers} workers)", unit="page") as bar:
+            for shard in pool.map(_extract_shard_lines, shards):
+                pages.extend(shard)
+                bar.update(len(shard))
+                doc_metrics.add_pages(len(shard))
+    else:
+        pages = [_page_lines(page, layout) for page in doc_metrics.pages(tqdm(doc, desc=desc, unit="page"))]
+    for i, (_, edges) in enumerate(pages):
+        running.add_page(i + 1, edges)
+
+    keys = running.running_keys(page_count)
+    stripped = 0
+    for i, (lines, _) in enumerate(pages):
+        if i in ocr_texts:
+            # OCR text has no layout to find running lines in
+            out.write_page(ocr_texts[i])
+            continue
+        drop = running.running_lines(i + 1, keys)
+        stripped += len(drop)
+        # No fingerprints: a later incremental run must not splice stripped pages into an unstripped .txt
+        out.write_page("".join(line + "\n" for index, line in enumerate(lines) if index not in drop))
+    print(f"✂️ Stripped {stripped} running header/footer lines ({len(keys)} patterns)")
+
+def _open_previous(output_path, reading_order):
+    """
+    The previous .txt as PagedText when its sidecar carries page fingerprints and its pages
+    are in the given reading order, else None.
+    """
+    entries = load_page_index(output_path)
+    if not output_path.exists() or not entries or any("fingerprint" not in e for e in entries):
+        return None
+    previous = PagedText(output_path)
+    if previous.reading_order != reading_order:
+        previous.close()
+        return None
+    return previous
+
+def _splice_pages(doc, pdf_path, previous, out, fingerprints, doc_metrics, ocr_texts, layout):
+    """Copy pages whose fingerprint is in the previous output; extract the rest."""
+    # Keyed by fingerprint rather than position, so inserted or deleted pages do not shift the match
+    previous_pages = {entry["fingerprint"]: entry["page"] for entry in previous.pages}
+    changed = {i for i, fingerprint in enumerate(fingerprints) if fingerprint not in previous_pages}
+    print(f"♻️ {len(fingerprints) - len(changed)} of {len(fingerprints)} pages unchanged; re-extracting {len(changed)}")
+    # OCR pages are always rewritten: the previous run may have been without --ocr
+    changed |= set(ocr_texts)
+    texts = {i: ocr_texts[i] if i in ocr_texts else _page_text(doc[i], layout)
+             for i in doc_metrics.pages(tqdm(sorted(changed), desc=f"📄 Extracting {pdf_path.name}", unit="page"))}
+    for i, fingerprint in enumerate(fingerprints):
+        if i in changed:
+            out.write_page(texts[i], fingerprint)
+        else:
+            out.write_page_bytes(previous.page_bytes(previous_pages[fingerprint]), fingerprint)
+
+def extract_text_from_pdf(pdf_path, output_dir, workers=1, doc=None, incremental=True, ocr=False, ocr_workers=1,
+                          strip_headers=False, layout=True):
+    """
+    Extract text to output_dir/<stem>.txt. Pass an open doc to reuse it; the caller keeps ownership.
+    With incremental, pages whose fingerprint matches the previous output are copied from it
+    instead of being extracted again. With ocr, image-only pages get OCR text (ocr_pages.py)
+    computed across ocr_workers processes. With strip_headers, running headers, footers and page
+    numbers are left out (always a full extraction). With layout, text blocks are written in
+    reading order (layout_order.py) instead of content-stream order.
+    """
     output_dir.mkdir(parents=True, exist_ok=True)
     output_path = output_dir / (pdf_path.stem + ".txt")
+    # Written next to the output and swapped in at the end: the previous .txt stays readable meanwhile
+    partial_path = output_dir / (pdf_path.stem + ".partial.txt")
 
-    doc = fitz.open(pdf_path)
-    with open(output_path, "w", encoding="utf-8") as out:
-        for page in tqdm(doc, desc=f"📄 Extracting {pdf_path.name}", unit="page"):
-            text = page.get_text()
-            out.write(text)
-            out.write("\n")
-    doc.close()
+    started = time.perf_counter()
+    owns_doc = doc is None
+    if owns_doc:
+        doc = fitz.open(pdf_path)
+    page_count = len(doc)
+    reading_order = READING_ORDER if layout else None
+    previous = _open_previous(output_path, reading_order) if incremental and not strip_headers else None
+    try:
+        with metrics.document(SCRIPT_NAME, pdf_path.name, pdf_path) as doc_metrics:
+            fingerprints = page_fingerprints(doc)
+            ocr_texts = {}
+            if ocr:
+                flagged = ocr_pages.image_pages(doc)
+                if flagged:
+                    print(f"🔍 {len(flagged)} of {page_count} pages are image-only; running OCR")
+                    ocr_texts = ocr_pages.ocr_pages(pdf_path, flagged, fingerprints, ocr_workers, doc)
+            with PagedTextWriter(partial_path, reading_order) as out:
+                if strip_headers:
+                    _extract_stripped(doc, pdf_path, workers, out, doc_metrics, ocr_texts, layout)
+                elif previous is not None:
+                    _splice_pages(doc, pdf_path, previous, out, fingerprints, doc_metrics, ocr_texts, layout)
+                elif workers > 1 and page_count > 1:
+                    _extract_pages_parallel(pdf_path, page_count, workers, out, fingerprints, doc_metrics, ocr_texts,
+                                            layout)
+                else:
+                    for page in doc_metrics.pages(tqdm(doc, desc=f"📄 Extracting {pdf_path.name}", unit="page")):
+                        text = ocr_texts[page.number] if page.number in ocr_texts else _page_text(page, layout)
+                        out.write_page(text, fingerprints[page.number])
+            if previous is not None:
+                previous.close()
+                previous = None
+            os.replace(partial_path, output_path)
+            os.replace(sidecar_path(partial_path), sidecar_path(output_path))
+            doc_metrics.wrote(output_path, sidecar_path(output_path))
+    finally:
+        if previous is not None:
+            previous.close()
+        partial_path.unlink(missing_ok=True)
+        if owns_doc:
+            doc.close()
+    elapsed = time.perf_counter() - started
+    rate = page_count / elapsed if elapsed > 0 else 0.0
     print(f"✅ Saved: {output_path}")
+    print(f"⏱ {page_count} pages in {elapsed:.2f}s ({rate:.1f} pages/sec)")
 
 def main():
     parser = argparse.ArgumentParser(description="Extract raw text from PDFs")
     parser.add_argument("filename", nargs="?", help="PDF file to process (from input_pdfs/)")
     parser.add_argument("--all", action="store_true", help="Process all PDFs in the input folder")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes for page-sharded extraction (default: 1)")
+    parser.add_argument("--force", action="store_true",
+                        help="Ignore the cache manifest and page fingerprints; re-extract every page")
+    parser.add_argument("--ocr", action="store_true",
+                        help="OCR image-only pages with Tesseract (pool of --workers processes, default all cores)")
+    parser.add_argument("--strip-headers", action="store_true",
+                        help="Leave out running headers, footers and page numbers repeated across pages")
+    parser.add_argument("--stream-order", action="store_true",
+                        help="Keep PyMuPDF's content-stream block order instead of column reading order")
+    batch_pool.add_argument(parser)
+    metrics.add_argument(parser)
     parser.add_argument("--version", "-v", action="store_true", help="Show version info and exit")
 
     args = parser.parse_args()
+    metrics.configure(args)
+    workers = max(1, args.workers)
+    if args.ocr and not ocr_pages.tesseract_available():
+        print("⚠️ Tesseract not found (install it or set TESSDATA_PREFIX); continuing without OCR")
+        args.ocr = False
+    # OCR dominates the cost of a scanned PDF, so it gets every core unless --workers says otherwise
+    ocr_workers = workers if args.workers > 1 else batch_pool.default_jobs()
+    # OCR, stripped and stream-order output differ from plain extraction, so they are cached as separate versions
+    cache_version = (VERSION + ("+ocr" if args.ocr else "") + ("+strip" if args.strip_headers else "")
+                     + ("+stream" if args.stream_order else ""))
+    layout = not args.stream_order
 
     print(f"🛠 {SCRIPT_NAME} - v{VERSION}")
     print("📘 Purpose: Extract raw text from a PDF file using PyMuPDF")
@@ -61,8 +272,24 @@ def main():
         if not files:
             print("❌ No PDF files found in input folder.")
             sys.exit(1)
-        for pdf_path in files:
-            extract_text_from_pdf(pdf_path, OUTPUT_DIR)
+        manifest = load_manifest(OUTPUT_DIR)
+        outputs_for = lambda p: [OUTPUT_DIR / (p.stem + ".txt"), sidecar_path(OUTPUT_DIR / (p.stem + ".txt"))]
+        stale = filter_stale(manifest, SCRIPT_NAME, cache_version, files, outputs_for, args.force)
+        if args.jobs > 1 and len(stale) > 1:
+            # Document-level parallelism replaces page sharding and the OCR pool here; pools are not nested
+            for result in batch_pool.run_batch(extract_text_from_pdf, stale, args.jobs, "📄 Extracting",
+                                               (OUTPUT_DIR, 1, None, not args.force, args.ocr, 1,
+                                                args.strip_headers, layout)):
+                if result["ok"]:
+                    record(manifest, SCRIPT_NAME, cache_version, result["pdf"])
+            save_manifest(manifest, OUTPUT_DIR)
+            return
+        for pdf_path in stale:
+            extract_text_from_pdf(pdf_path, OUTPUT_DIR, workers, incremental=not args.force,
+                                  ocr=args.ocr, ocr_workers=ocr_workers, strip_headers=args.strip_headers,
+                                  layout=layout)
+            record(manifest, SCRIPT_NAME, cache_version, pdf_path)
+            save_manifest(manifest, OUTPUT_DIR)
         return
 
     if args.filename:
@@ -70,7 +297,9 @@ def main():
         if not pdf_path.exists():
             print(f"❌ File not found: {pdf_path}")
             sys.exit(1)
-        extract_text_from_pdf(pdf_path, OUTPUT_DIR)
+        extract_text_from_pdf(pdf_path, OUTPUT_DIR, workers, incremental=not args.force,
+                              ocr=args.ocr, ocr_workers=ocr_workers, strip_headers=args.strip_headers,
+                              layout=layout)
         return
 
     # Interactive fallback if no args
@@ -85,7 +314,9 @@ def main():
     choice = input("\nEnter number: ").strip()
     try:
         selected = files[int(choice)]
-        extract_text_from_pdf(selected, OUTPUT_DIR)
+        extract_text_from_pdf(selected, OUTPUT_DIR, workers, incremental=not args.force,
+                              ocr=args.ocr, ocr_workers=ocr_workers, strip_headers=args.strip_headers,
+                              layout=layout)
     except (ValueError, IndexError):
         print("❌ Invalid selection.")
 
@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
 """
 Script: fix_headings.py
-Version: 1.1.0
+Version: 1.2.0
 Purpose: Validate and optionally fix malformed headings.json files with size→level fallback
+Levels for size-only entries are ranked from the sizes found in the file itself (heading_classifier.py)
 Author: ChatGPT for Hoody's PDF → Markdown Project
 """
 
@@ -11,8 +12,10 @@ import json
 from pathlib import Path
 from tqdm import tqdm
 
+from heading_classifier import levels_for_sizes
+
 SCRIPT_NAME = "fix_headings.py"
-SCRIPT_VERSION = "1.1.0"
+SCRIPT_VERSION = "1.2.0"
 SCRIPT_PURPOSE = "Validate and optionally fix malformed headings.json files (with size→level fallback)"
 
 # Paths
@@ -49,9 +52,24 @@ Options:
   --help, -h            Show this help message
 """)
 
-def size_to_level(size):
+def size_ladder(entries):
+    """Map every valid size in the file to a level by ranking the distinct sizes (largest = 1)."""
+    sizes = []
+    for entry in entries:
+        if isinstance(entry, dict) and "size" in entry:
+            try:
+                sizes.append(float(entry["size"]))
+            except (TypeError, ValueError):
+                continue
+    if not sizes:
+        return {}
+    return dict(zip(sizes, levels_for_sizes(sizes).tolist()))
+
+def size_to_level(size, ladder=None):
     try:
         size = float(size)
+        if ladder:
+            return ladder.get(size)
         if size >= 20: return 1
         elif size >= 16: return 2
         elif size >= 14: return 3
@@ -74,6 +92,7 @@ def validate_and_fix(path: Path, fix: bool = False, verbose: bool = False):
 
     fixed = []
     errors = 0
+    ladder = size_ladder(data)
     for entry in data:
         if not isinstance(entry, dict):
             errors += 1
@@ -93,7 +112,7 @@ def validate_and_fix(path: Path, fix: bool = False, verbose: bool = False):
             except:
                 level = None
         elif "size" in entry:
-            level = size_to_level(entry["size"])
+            level = size_to_level(entry["size"], ladder)
 
         if level is None:
             errors += 1
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Script: heading_classifier.py
+Version: 1.3.0
+Purpose: Classify heading spans by font-size clusters relative to the document's body text size.
+
+SpanTable collects every span's text, size, flags, font, page and bbox in one pass over
+the document. classify() then works on NumPy arrays: the body size is the size that carries
+the most characters, candidates are spans noticeably larger than body text, and heading
+levels are assigned by ranking the distinct candidate size clusters (largest = level 1).
+No fixed point-size thresholds, so it adapts to each document's typography.
+
+classify() is built from smaller steps (char_histograms, body_size_from_histogram,
+heading_candidates, assign_levels) so detect_headings.py can rescan only changed pages
+and splice their candidates into the stored ones before re-ranking levels. Candidates can
+be filtered before levels are ranked (pdf_analysis.py passes heading_filter.py's filter).
+Candidates come out consolidated (heading_consolidation.py): shadow copies dropped, drop caps
+and wrapped title lines merged into one heading with the union of their bboxes.
+
+Dependencies:
+- NumPy
+"""
+
+import numpy as np
+
+from heading_consolidation import consolidate_headings
+
+# A span is a heading candidate when its size is at least this multiple of the body size
+HEADING_SIZE_RATIO = 1.2
+# Sizes are clustered to this granularity (points) before ranking
+SIZE_STEP = 0.5
+MAX_HEADING_CHARS = 100
+MAX_LEVEL = 6
+# Bit 4 of the span flags marks bold text in PyMuPDF
+BOLD_FLAG = 16
+
+class SpanTable:
+    """Column store of the spans of one document, filled page by page."""
+
+    def __init__(self):
+        self.texts = []
+        self.sizes = []
+        self.flags = []
+        self.fonts = []
+        self.pages = []
+        self.bboxes = []
+        self.spaces = []  # (leading, trailing) whitespace of the span text, for joining pieces
+
+    def add_page(self, page_dict, page_number):
+        """Append all non-empty spans of a get_text("dict") layout; page_number is 1-based."""
+        for block in page_dict["blocks"]:
+            for line in block.get("lines", []):
+                for span in line.get("spans", []):
+                    raw = span.get("text", "")
+                    text = raw.strip()
+                    if text:
+                        self.texts.append(text)
+                        self.sizes.append(span.get("size", 0))
+                        self.flags.append(span.get("flags", 0))
+                        self.fonts.append(span.get("font", ""))
+                        self.pages.append(page_number)
+                        self.bboxes.append(span["bbox"])
+                        self.spaces.append((raw[0].isspace(), raw[-1].isspace()))
+
+    def __len__(self):
+        return len(self.texts)
+
+def quantize_sizes(sizes):
+    return np.round(np.asarray(sizes, dtype=np.float64) / SIZE_STEP) * SIZE_STEP
+
+def body_size(sizes, char_counts):
+    """Font size that carries the most characters in the document."""
+    values, inverse = np.unique(quantize_sizes(sizes), return_inverse=True)
+    weights = np.bincount(inverse, weights=char_counts)
+    return float(values[np.argmax(weights)])
+
+def levels_for_sizes(sizes):
+    """Rank distinct size clusters (largest first) into heading levels 1..MAX_LEVEL."""
+    quantized = quantize_sizes(sizes)
+    values, inverse = np.unique(-quantized, return_inverse=True)  # descending order
+    return np.minimum(inverse + 1, MAX_LEVEL)
+
+def _char_counts(table):
+    return np.fromiter((len(t) for t in table.texts), dtype=np.int64, count=len(table))
+
+def char_histograms(table: SpanTable):
+    """Characters per quantized size on each page: {page: {size: chars}}."""
+    if not len(table):
+        return {}
+    keys = np.stack([np.asarray(table.pages, dtype=np.float64), quantize_sizes(table.sizes)], axis=1)
+    values, inverse = np.unique(keys, axis=0, return_inverse=True)
+    weights = np.bincount(inverse.ravel(), weights=_char_counts(table))
+    histograms = {}
+    for (page, size), chars in zip(values.tolist(), weights.tolist()):
+        histograms.setdefault(int(page), {})[size] = int(chars)
+    return histograms
+
+def body_size_from_histogram(histogram):
+    """body_size() over merged {size: chars} counts; ties go to the smaller size, as np.argmax does."""
+    if not histogram:
+        return None
+    return max(sorted(histogram), key=lambda size: histogram[size])
+
+def heading_candidates(table: SpanTable, body):
+    """
+    Consolidated heading dicts for the spans that qualify against a body size; levels are
+    left to assign_levels(). Pieces never merge across pages, so each page's candidates
+    depend on that page alone.
+    """
+    if not len(table) or body is None:
+        return []
+    sizes = np.asarray(table.sizes, dtype=np.float64)
+    mask = (quantize_sizes(sizes) >= body * HEADING_SIZE_RATIO) & (_char_counts(table) < MAX_HEADING_CHARS)
+    idx = np.flatnonzero(mask)
+    bold = (np.asarray(table.flags, dtype=np.int64)[idx] & BOLD_FLAG) != 0
+    candidates = [
+        {
+            "text": table.texts[i],
+            "size": table.sizes[i],
+            "level": None,
+            "page": table.pages[i],
+            "font": table.fonts[i],
+            "bold": bool(is_bold),
+            "bbox": [round(v, 1) for v in table.bboxes[i]],
+        }
+        for i, is_bold in zip(idx.tolist(), bold.tolist())
+    ]
+    spaces = [table.spaces[i] for i in idx.tolist()]
+    return consolidate_headings(candidates, spaces, lambda size: round(size / SIZE_STEP) * SIZE_STEP)
+
+def assign_levels(headings):
+    """Set each heading's level by ranking the size clusters of the whole list (in place)."""
+    if headings:
+        levels = levels_for_sizes([h["size"] for h in headings])
+        for heading, level in zip(headings, levels.tolist()):
+            heading["level"] = int(level)
+    return headings
+
+def classify(table: SpanTable, candidate_filter=None):
+    """
+    Return heading dicts ({text, size, level, page, font, bold, bbox}) in document order.
+    candidate_filter, if given, maps the candidate list to the ones to keep before levels are ranked.
+    """
+    if not len(table):
+        return []
+    body = body_size(table.sizes, _char_counts(table))
+    candidates = heading_candidates(table, body)
+    if candidate_filter is not None:
+        candidates = candidate_filter(candidates)
+    return assign_levels(candidates)
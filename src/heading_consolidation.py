@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Script: heading_consolidation.py
+Version: 1.0.0
+Purpose: Merge heading candidates that are pieces of one heading and drop their shadow copies.
+
+heading_classifier.py finds candidates span by span, so one visible heading can turn into
+several candidates:
+- shadow or outline effects draw the same text 2-4 times, a fraction of a point apart,
+  sometimes split differently ("Enco" + "unter Eight" next to "Encounter Eight")
+- drop caps and small caps set the first letter larger than the rest ("L" + "IVING")
+- a title wraps onto a second line ("Adventure Summary and" + "Background")
+
+consolidate_headings() walks the candidates once, in document order, page by page:
+1. Shadow copies: a candidate whose text and bbox fall within a recently kept candidate is
+   dropped; one that covers a kept candidate replaces it. Exact repeats are found through a
+   hash map of the texts in a sliding window of the last SHADOW_WINDOW kept candidates.
+2. Pieces on one line: consecutive candidates in the same font, side by side on one text
+   line, are joined (without a space when they touch, as in "L" + "IVING").
+3. Wrapped lines: consecutive candidates in the same font and size, one right below the
+   other and overlapping horizontally, are joined with a space.
+Each step looks at a bounded number of neighbours, so the pass is linear in the candidates.
+Merged headings keep the page, font and bold flag of their first piece, the largest size
+and the union of the bboxes.
+"""
+
+from collections import deque
+
+# Kept candidates a new one is compared with when looking for shadow copies
+SHADOW_WINDOW = 8
+# How far a shadow copy's bbox may stick out of the text it repeats, as a share of the font
+# size: shadows are offset by a fraction of a point, but a copy drawn with a trailing space
+# is wider by that space
+SHADOW_TOLERANCE = 0.3
+# Largest horizontal gap between pieces of one line, as a share of the font size (about a word space)
+MAX_WORD_GAP = 0.6
+# Gaps above this share of the font size are word breaks when neither piece had a space at its edge
+SPACE_GAP = 0.15
+# Largest gap between a heading line and its wrapped continuation, as a share of the font size
+MAX_LINE_GAP = 0.6
+
+def _key(text):
+    return " ".join(text.lower().split())
+
+def _inside(inner, outer):
+    """True when the inner heading's bbox lies within the outer one's."""
+    tolerance = SHADOW_TOLERANCE * max(inner["size"], outer["size"])
+    inner, outer = inner["bbox"], outer["bbox"]
+    return (inner[0] >= outer[0] - tolerance and inner[1] >= outer[1] - tolerance
+            and inner[2] <= outer[2] + tolerance and inner[3] <= outer[3] + tolerance)
+
+def _union(a, b):
+    return [round(min(a[0], b[0]), 1), round(min(a[1], b[1]), 1),
+            round(max(a[2], b[2]), 1), round(max(a[3], b[3]), 1)]
+
+def drop_shadows(headings, spaces):
+    """
+    Keep one heading per shadowed text; returns (headings, spaces) in document order.
+    spaces[i] is (leading, trailing) whitespace of heading i's span text, carried along.
+    """
+    kept = []            # [heading, spaces] pairs; None where a heading was replaced
+    window = deque()     # indexes into kept, most recent last
+    by_text = {}         # text key → indexes in window with that text
+    page = None
+
+    def forget(index):
+        key = _key(kept[index][0]["text"])
+        by_text[key].remove(index)
+        if not by_text[key]:
+            del by_text[key]
+
+    for heading, edge_spaces in zip(headings, spaces):
+        if heading["page"] != page:
+            page = heading["page"]
+            window.clear()
+            by_text.clear()
+        key = _key(heading["text"])
+        if any(_inside(heading, kept[i][0]) or _inside(kept[i][0], heading) for i in by_text.get(key, ())):
+            continue
+        covered = []
+        duplicate = False
+        for i in window:
+            other = kept[i][0]
+            other_key = _key(other["text"])
+            if key in other_key and _inside(heading, other):
+                duplicate = True
+                break
+            if other_key in key and _inside(other, heading):
+                covered.append(i)
+        if duplicate:
+            continue
+        if covered:
+            # The new candidate is the full text of earlier pieces: it takes the first one's place
+            index = covered[0]
+            for i in covered:
+                forget(i)
+                window.remove(i)
+            for i in covered[1:]:
+                kept[i] = None
+            kept[index] = [heading, edge_spaces]
+        else:
+            index = len(kept)
+            kept.append([heading, edge_spaces])
+        window.append(index)
+        by_text.setdefault(key, []).append(index)
+        if len(window) > SHADOW_WINDOW:
+            forget(window.popleft())
+
+    kept = [entry for entry in kept if entry is not None]
+    return [heading for heading, _ in kept], [edge_spaces for _, edge_spaces in kept]
+
+def _same_line(a, b):
+    (ax0, ay0, ax1, ay1), (bx0, by0, bx1, by1) = a["bbox"], b["bbox"]
+    size = min(a["size"], b["size"])
+    overlap = min(ay1, by1) - max(ay0, by0)
+    gap = bx0 - ax1
+    return overlap >= 0.5 * min(ay1 - ay0, by1 - by0) and -0.5 * size <= gap <= MAX_WORD_GAP * size
+
+def _wrapped(a, b, quantize):
+    (ax0, ay0, ax1, ay1), (bx0, by0, bx1, by1) = a["bbox"], b["bbox"]
+    gap = by0 - ay1
+    return (quantize(a["size"]) == quantize(b["size"])
+            and -0.25 * b["size"] <= gap <= MAX_LINE_GAP * b["size"]
+            and min(ax1, bx1) > max(ax0, bx0))
+
+def consolidate_headings(headings, spaces, quantize=lambda size: size):
+    """
+    Merge the pieces of each heading and drop shadow copies (see the module docstring).
+    headings are candidate dicts with "bbox", in document order; spaces[i] tells whether
+    heading i's span text had whitespace at its (start, end). quantize maps a font size to
+    its size cluster, so wrapped lines are only joined within one cluster.
+    """
+    headings, spaces = drop_shadows(headings, spaces)
+    merged = []
+    trailing_space = False
+    for heading, (leading, trailing) in zip(headings, spaces):
+        previous = merged[-1] if merged else None
+        if previous is None or previous["page"] != heading["page"] or previous["font"] != heading["font"]:
+            joiner = None
+        elif _same_line(previous, heading):
+            gap = heading["bbox"][0] - previous["bbox"][2]
+            spaced = trailing_space or leading or gap > SPACE_GAP * min(previous["size"], heading["size"])
+            joiner = " " if spaced else ""
+        elif _wrapped(previous, heading, quantize):
+            joiner = " "
+        else:
+            joiner = None
+        if joiner is None:
+            merged.append(dict(heading))
+        else:
+            previous["text"] = previous["text"] + joiner + heading["text"]
+            previous["size"] = max(previous["size"], heading["size"])
+            previous["bbox"] = _union(previous["bbox"], heading["bbox"])
+        trailing_space = trailing
+    return merged
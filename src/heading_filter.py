@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Script: heading_filter.py
+Version: 1.1.2
+Purpose: Drop heading candidates that are OCR or layout noise before detect_headings.py writes them.
+
+Each candidate is judged on cheap features, with no extra pass over the PDF:
+- letter count and the share of letters among its characters (drops "O", "TO", "–S", ".")
+- dictionary hits against a precomputed frozenset (drops word fragments like "reyhawk")
+- sentence shape: lowercase start, trailing comma, too many words (body text set large)
+- running headers/footers: candidates matching a running line of their page (running_headers.py)
+
+The dictionary is a fixed list of common English and setting words shipped with this module,
+so the same PDF gives the same headings on every machine.
+"""
+
+import re
+from collections import Counter
+
+from running_headers import line_key
+
+MIN_HEADING_LETTERS = 3
+MIN_ALPHA_RATIO = 0.4
+MAX_HEADING_WORDS = 12
+
+COMMON_WORDS = frozenset("""
+a about above across after again against all along also an and another any are around as at away
+back be because been before behind being below between beyond both but by can could day days
+down during each east end even every few first for from further great had has have he her here
+him his how i if in into is it its last left less like little long made main many may me more
+most much must my near new next no nor north not now of off old on once one only or other our
+out over own part per right same see she should since so some south still such than that the
+their them then there these they this those through to too two under until up upon us very was
+way we well were west what when where which while who whom why will with within without would
+yet you your
+adventure adventures age ages appendix armor army background battle beauty beyond book campaign
+chapter character characters city class classes combat conclusion contents council credits
+cult dark death desert development dungeon east empire encounter encounters equipment
+experience faction factions fall forest foreword gift gods guide history house houses index
+introduction kingdom kingdoms land lands lord lords magic map maps monster monsters mountain
+mountains note notes people peoples player players preface prologue races realm realms
+reference rules ruler rulers sea section setting skills spell spells structure summary
+synopsis table tables tactics temple the tier tower town treasure war wars weapons world
+""".split())
+
+_WORD = re.compile(r"[^\W\d_]+")
+
+def is_running(heading, running_texts):
+    """True when the heading's text is a running line of its page, or a run of whole words in one."""
+    # Heading-sized running lines keep their digits (running_headers.edge_lines), so try both keys
+    keys = {line_key(heading["text"]), line_key(heading["text"], keep_digits=True)} - {""}
+    return any(f" {key} " in f" {line} " for key in keys for line in running_texts.get(heading["page"], ()))
+
+def noise_reason(text, words=None):
+    """Why a heading text is noise (a short label), or None when it looks like a real heading."""
+    text = text.strip()
+    visible = [char for char in text if not char.isspace()]
+    letters = sum(char.isalpha() for char in visible)
+    if letters < MIN_HEADING_LETTERS:
+        return "too short"
+    if letters / len(visible) < MIN_ALPHA_RATIO:
+        return "symbols"
+    words = _WORD.findall(text) if words is None else words
+    if len(words) > MAX_HEADING_WORDS or text.endswith((",", ";")):
+        return "sentence"
+    known = COMMON_WORDS
+    if text[0].islower():
+        # A lowercase start is either a sentence carried over from the line above or a word fragment
+        if len(words) > 1:
+            return "sentence"
+        if words[0].lower() not in known:
+            return "fragment"
+    if not any(word.lower() in known or word[0].isupper() for word in words):
+        return "not words"
+    return None
+
+def filter_headings(headings, running_texts=None):
+    """
+    Return (kept headings, Counter of drop reasons); headings keep their order.
+    running_texts is RunningHeaders.running_texts(): {page: running line keys}.
+    """
+    running_texts = running_texts or {}
+    kept = []
+    dropped = Counter()
+    for heading in headings:
+        reason = "running header" if is_running(heading, running_texts) else noise_reason(heading["text"])
+        if reason:
+            dropped[reason] += 1
+        else:
+            kept.append(heading)
+    return kept, dropped
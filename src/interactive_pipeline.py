@@ -1,15 +1,18 @@
 # ✅ Script name: interactive_pipeline.py
-# ✅ Version: v1.0.0
+# ✅ Version: v1.1.0
 # ✅ Purpose: Guide user interactively through converting a single PDF to Markdown
-# ✅ Dependencies: extract_text.py, detect_headings.py, convert_to_md.py
+# ✅ Dependencies: pipeline_runner.py (extract_text.py, detect_headings.py, convert_to_md.py)
 
 import os
 import sys
-import subprocess
 import argparse
 from pathlib import Path
 
-SCRIPT_VERSION = "v1.0.0"
+import fitz  # PyMuPDF
+
+from pipeline_runner import run_stage
+
+SCRIPT_VERSION = "v1.1.0"
 
 # Set base directory relative to this script's location
 BASE_DIR = Path(__file__).resolve().parent
@@ -41,16 +44,17 @@ def ask_continue(prompt):
     response = input(f"{prompt} [Y/n]: ").strip().lower()
     return response in ["", "y", "yes"]
 
-def run_step(step_num, step_total, label, command, progress_enabled):
+def run_step(step_num, step_total, label, stage, pdf_path, doc, progress_enabled):
     if progress_enabled:
         blocks = ["🟩" if i < step_num else "⬜" for i in range(step_total)]
         print(f"\n➡️  [{'✅' * (step_num - 1)}{''.join(blocks)}] {label}...\n")
     else:
         print(f"\n➡️  {label}...\n")
 
-    result = subprocess.run(command, shell=True)
-    if result.returncode != 0:
-        print(f"❌ {label} failed. Exiting.\n")
+    result = run_stage(stage, pdf_path, doc)
+    if not result["ok"]:
+        print(f"❌ {label} failed: {result['error']}. Exiting.\n")
+        doc.close()
         sys.exit(1)
 
 def main():
@@ -65,27 +69,23 @@ def main():
     pdfs = list_pdfs()
     filename = get_user_choice(pdfs)
     base = Path(filename).stem
-
-    # Step 1: Extract Text
-    if ask_continue("Step 1: Extract text from PDF?"):
-        run_step(1, 3, "Extracting text", f"python3 extract_text.py \"{filename}\"", not args.no_progress)
-    else:
-        print("\n❌ Conversion canceled by user.\n")
-        sys.exit(0)
-
-    # Step 2: Detect Headings
-    if ask_continue("Step 2: Detect headings from extracted text?"):
-        run_step(2, 3, "Detecting headings", f"python3 detect_headings.py \"{filename}\"", not args.no_progress)
-    else:
-        print("\n❌ Conversion canceled by user.\n")
-        sys.exit(0)
-
-    # Step 3: Convert to Markdown
-    if ask_continue("Step 3: Convert to Markdown?"):
-        run_step(3, 3, "Converting to markdown", f"python3 convert_to_md.py \"{filename}\"", not args.no_progress)
-    else:
-        print("\n❌ Conversion canceled by user.\n")
-        sys.exit(0)
+    pdf_path = INPUT_DIR / filename
+    progress = not args.no_progress
+
+    # One open document is shared by every step
+    doc = fitz.open(pdf_path)
+    steps = [
+        ("Step 1: Extract text from PDF?", "Extracting text", "extract_text"),
+        ("Step 2: Detect headings from extracted text?", "Detecting headings", "detect_headings"),
+        ("Step 3: Convert to Markdown?", "Converting to markdown", "convert_to_md"),
+    ]
+    for step_num, (prompt, label, stage) in enumerate(steps, 1):
+        if not ask_continue(prompt):
+            print("\n❌ Conversion canceled by user.\n")
+            doc.close()
+            sys.exit(0)
+        run_step(step_num, len(steps), label, stage, pdf_path, doc, progress)
+    doc.close()
 
     print("\n📦 All steps completed successfully!")
     print("\n🧾 Summary of output files:")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Script: layout_order.py
+Version: 1.0.0
+Purpose: Put the text blocks of a page in reading order, column by column, on multi-column layouts.
+
+PyMuPDF returns blocks in content-stream order, which on two-column modules often
+interleaves the columns. reading_order() works on the block bboxes only:
+- fast path: when every block crosses the vertical centre line of the text area the page
+  is a single column and the stream order is kept, without clustering
+- columns: the left edges of the narrower blocks are clustered; clusters whose blocks add
+  up to MIN_COLUMN_HEIGHT of the text area's height are column candidates, and the tallest
+  ones at least MIN_COLUMN_SHARE of the text width apart are the columns
+- blocks reaching into the next column (titles, full-width tables, page numbers) split the
+  page into horizontal bands; within a band whose columns sit side by side, the blocks are
+  read column by column, top to bottom, then the spanning block follows; footer blocks
+  (inside the bottom EDGE_BAND of the page) count as spanning, so they come last
+Bands whose columns do not overlap vertically keep their stream order, so odd single-column
+layouts (indented or centred blocks) are never shuffled.
+
+page_text() gives page.get_text() output in reading order from the cheap "blocks" decode;
+order_page_dict() reorders a get_text("dict") layout for code that needs lines and spans.
+"""
+
+import bisect
+
+from running_headers import EDGE_BAND
+
+# Blocks wider than this share of the text area cannot be column blocks
+MAX_COLUMN_SHARE = 0.6
+# Column left edges are at least this share of the text area apart
+MIN_COLUMN_SHARE = 0.25
+# Left edges closer than this share of the text area (to the previous edge) form one cluster
+EDGE_CLUSTER_SHARE = 0.05
+# The blocks starting at a column's left edge are at least this share of the text area's height
+MIN_COLUMN_HEIGHT = 0.15
+# Slack (share of the text width) when comparing block edges with column edges
+EDGE_TOLERANCE = 0.02
+
+# Recorded in the .pages.json sidecar of text written in this order (page_text.py)
+READING_ORDER = "columns"
+
+def column_starts(bboxes, left, width, height):
+    """Left edges of the columns of a page (one entry for a single column)."""
+    starts = sorted((x0, y1 - y0) for x0, y0, x1, y1 in bboxes if x1 - x0 <= MAX_COLUMN_SHARE * width)
+    # [total block height, left edge of the tallest block, its height, last x0]; the tallest
+    # block sets the edge, so a table cell starting just left of a column does not move it
+    clusters = []
+    for x0, block_height in starts:
+        if clusters and x0 - clusters[-1][3] <= EDGE_CLUSTER_SHARE * width:
+            cluster = clusters[-1]
+            cluster[0] += block_height
+            if block_height > cluster[2]:
+                cluster[1:3] = [x0, block_height]
+            cluster[3] = x0
+        else:
+            clusters.append([block_height, x0, block_height, x0])
+    # Tallest first: a stray narrow block never displaces a real column edge
+    columns = []
+    for total, x0, _, _ in sorted(clusters, key=lambda cluster: -cluster[0]):
+        if total >= MIN_COLUMN_HEIGHT * height and all(abs(x0 - other) >= MIN_COLUMN_SHARE * width for other in columns):
+            columns.append(x0)
+    columns.sort()
+    if not columns or columns[0] > left + MIN_COLUMN_SHARE * width:
+        columns.insert(0, left)
+    return columns
+
+def _side_by_side(band, column_of, bboxes):
+    """True when blocks of different columns in a band overlap vertically."""
+    extents = {}
+    for i in band:
+        top, bottom = extents.get(column_of[i], (bboxes[i][1], bboxes[i][3]))
+        extents[column_of[i]] = (min(top, bboxes[i][1]), max(bottom, bboxes[i][3]))
+    spans = sorted(extents.values())
+    return any(next_top < bottom for (_, bottom), (next_top, _) in zip(spans, spans[1:]))
+
+def reading_order(bboxes, page_height=None):
+    """Indexes of the (x0, y0, x1, y1) block bboxes in reading order; page_height enables the footer rule."""
+    count = len(bboxes)
+    if count < 2:
+        return list(range(count))
+    left = min(bbox[0] for bbox in bboxes)
+    right = max(bbox[2] for bbox in bboxes)
+    width = right - left
+    centre = (left + right) / 2
+    if width <= 0 or all(x0 <= centre <= x1 for x0, _, x1, _ in bboxes):
+        return list(range(count))
+    top = min(bbox[1] for bbox in bboxes)
+    bottom = max(bbox[3] for bbox in bboxes)
+    columns = column_starts(bboxes, left, width, bottom - top)
+    if len(columns) < 2:
+        return list(range(count))
+
+    tolerance = EDGE_TOLERANCE * width
+    footer = page_height * (1 - EDGE_BAND) if page_height else bottom + 1
+    column_of = []
+    spanning = []
+    for i, (x0, y0, x1, y1) in enumerate(bboxes):
+        column = max(bisect.bisect_right(columns, x0 + tolerance) - 1, 0)
+        column_of.append(column)
+        if (column + 1 < len(columns) and x1 > columns[column + 1] + tolerance) or y0 >= footer:
+            spanning.append(i)
+    spanning.sort(key=lambda i: (bboxes[i][1], i))
+    # Band k holds the column blocks starting above spanning block k; blocks level with it
+    # (the other cells of a table row) stay in front of it
+    cuts = [bboxes[i][1] for i in spanning]
+    bands = [[] for _ in range(len(spanning) + 1)]
+    is_spanning = set(spanning)
+    for i, (_, y0, _, _) in enumerate(bboxes):
+        if i not in is_spanning:
+            bands[bisect.bisect_left(cuts, y0)].append(i)
+
+    order = []
+    for k, band in enumerate(bands):
+        if _side_by_side(band, column_of, bboxes):
+            band = sorted(band, key=lambda i: (column_of[i], bboxes[i][1], i))
+        order.extend(band)
+        if k < len(spanning):
+            order.append(spanning[k])
+    return order
+
+def order_blocks(blocks, page_height=None):
+    """Text blocks of get_text("blocks") in reading order (image blocks are left out)."""
+    blocks = [block for block in blocks if block[6] == 0]
+    return [blocks[i] for i in reading_order([block[:4] for block in blocks], page_height)]
+
+def page_text(page):
+    """page.get_text() output with the blocks in reading order."""
+    return "".join(block[4] for block in order_blocks(page.get_text("blocks"), page.rect.height))
+
+def order_page_dict(page_dict):
+    """A get_text("dict") layout with its text blocks in reading order (other keys shared)."""
+    blocks = [block for block in page_dict["blocks"] if "lines" in block]
+    ordered = [blocks[i] for i in reading_order([block["bbox"] for block in blocks], page_dict.get("height"))]
+    return dict(page_dict, blocks=ordered)
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Script: link_index_terms.py
+Version: 1.0.1
+Purpose: Find every occurrence of the extracted index terms in the text and write a reverse index.
+
+Loads <stem>.index_terms.json (from extract_index.py), builds one Aho-Corasick automaton
+over all terms and scans the document text once, so the cost grows with the length of the
+text plus the number of matches, not with the number of terms. Matching ignores case,
+treats any run of whitespace (including line breaks) as a single space and only accepts
+whole words.
+
+The .txt is read page by page through its .pages.json sidecar (page_text.py), so every
+occurrence gets its page number; without a sidecar, or with --md, the file is scanned as a
+whole and occurrences carry offsets only.
+
+Output (<stem>.term_links.json, next to the index terms):
+    {"source": "x.txt", "terms": [{"term": "Greyhawk", "index_pages": [12],
+      "count": 2, "occurrences": [{"page": 12, "offset": 311}, ...]}, ...]}
+Offsets are character offsets into the page (or into the file when there are no pages).
+"""
+
+import json
+import sys
+from collections import deque
+from pathlib import Path
+from tqdm import tqdm
+
+import metrics
+from page_text import PagedText, has_page_index
+
+SCRIPT_NAME = "link_index_terms.py"
+SCRIPT_VERSION = "1.0.1"
+SCRIPT_PURPOSE = "Link index terms back to every page they occur on"
+
+# Paths
+BASE_DIR = Path(__file__).resolve().parent
+TEXT_DIR = BASE_DIR / "../data/extracted_text"
+MD_DIR = BASE_DIR / "../data/converted_md"
+TERMS_DIR = BASE_DIR / "../data/extracted_text/index_terms"
+OUTPUT_DIR = TERMS_DIR
+
+def parse_args():
+    return {
+        "show_help": "--help" in sys.argv or "-h" in sys.argv,
+        "show_version": "--version" in sys.argv or "-v" in sys.argv,
+        "run_all": "--all" in sys.argv,
+        "use_md": "--md" in sys.argv,
+        "target_file": next((sys.argv[i + 1] for i, arg in enumerate(sys.argv) if arg == "--file"), None),
+        "metrics": next((sys.argv[i + 1] for i, arg in enumerate(sys.argv) if arg == "--metrics"), None)
+    }
+
+def print_header():
+    print(f"🛠 {SCRIPT_NAME} - v{SCRIPT_VERSION}")
+    print(f"📘 Purpose: {SCRIPT_PURPOSE}")
+
+def print_help():
+    print_header()
+    print("""
+Usage:
+  python link_index_terms.py --file filename.index_terms.json [--md]
+  python link_index_terms.py --all [--md]
+
+Options:
+  --file <filename>     Link the terms of one index_terms.json
+  --all                 Link every index_terms.json in extracted_text/index_terms
+  --md                  Scan converted_md/<stem>.md instead of extracted_text/<stem>.txt
+  --metrics <file>      Append per-document timing/memory metrics as JSON lines
+  --version, -v         Show script version
+  --help, -h            Show this help message
+""")
+
+def normalize_term(term):
+    return " ".join(term.split()).lower()
+
+class TermAutomaton:
+    """
+    Aho-Corasick automaton over normalized terms. States are ints; goto[state] maps a
+    character to the next state, fail[state] is the longest proper suffix state and
+    output[state] lists the (term id, length) pairs that end there, suffix matches included.
+    """
+
+    def __init__(self, terms):
+        self.terms = list(terms)
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for term_id, term in enumerate(self.terms):
+            state = 0
+            for char in term:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = next_state
+            self.output[state].append((term_id, len(term)))
+        self.max_length = max((len(term) for term in self.terms), default=0)
+        self._link()
+
+    def _link(self):
+        # Breadth-first, so a state's failure target is always finished before the state itself
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def find(self, text):
+        """
+        Yield (term id, start, end) for whole-word, case-insensitive matches in text.
+        Whitespace runs in text match a single space in a term; start/end index into text.
+        """
+        goto, fail, output = self.goto, self.fail, self.output
+        lowered = text.lower()
+        if len(lowered) != len(text):  # a few characters lowercase to two
+            lowered = "".join(char.lower()[:1] for char in text)
+        # Text index of each character fed to the automaton, to map match lengths back to starts
+        fed = deque(maxlen=self.max_length or 1)
+        state = 0
+        previous_space = True
+        for index, char in enumerate(lowered):
+            if char.isspace():
+                if previous_space:
+                    continue
+                char = " "
+                previous_space = True
+            else:
+                previous_space = False
+            fed.append(index)
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                end = index + 1
+                if end < len(text) and text[end].isalnum():
+                    continue
+                for term_id, length in output[state]:
+                    start = fed[-length]
+                    if start == 0 or not text[start - 1].isalnum():
+                        yield term_id, start, end
+
+def load_terms(terms_path):
+    """
+    Index entries grouped by normalized term: {term: {"term": first spelling, "index_pages": [...]}}.
+    Sub-entries ("history" under "Greyhawk") are qualifiers, not searchable terms: their pages count for the parent.
+    """
+    with open(terms_path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    grouped = {}
+    for entry in entries:
+        term = entry.get("parent") or entry["term"]
+        key = normalize_term(term)
+        if not key:
+            continue
+        group = grouped.setdefault(key, {"term": term.strip(), "index_pages": []})
+        if entry.get("page") is not None and entry["page"] not in group["index_pages"]:
+            group["index_pages"].append(entry["page"])
+    return grouped
+
+def iter_source_pages(source_path):
+    """Yield (page number or None, text): pages through the sidecar when there is one."""
+    if source_path.suffix == ".txt" and has_page_index(source_path):
+        with PagedText(source_path) as paged:
+            yield from paged.iter_pages()
+    else:
+        yield None, source_path.read_text(encoding="utf-8")
+
+def link_terms(grouped, pages):
+    """Scan (page, text) pairs once; returns the reverse index entries in term order."""
+    automaton = TermAutomaton(grouped)
+    occurrences = [[] for _ in automaton.terms]
+    for page, text in pages:
+        for term_id, start, _ in automaton.find(text):
+            occurrences[term_id].append({"page": page, "offset": start} if page is not None else {"offset": start})
+    links = []
+    for term_id, key in enumerate(automaton.terms):
+        links.append({
+            "term": grouped[key]["term"],
+            "index_pages": grouped[key]["index_pages"],
+            "count": len(occurrences[term_id]),
+            "occurrences": occurrences[term_id],
+        })
+    return links
+
+def source_for(stem, use_md=False):
+    return MD_DIR / f"{stem}.md" if use_md else TEXT_DIR / f"{stem}.txt"
+
+def process_file(terms_path: Path, use_md=False, output_dir=OUTPUT_DIR):
+    stem = terms_path.name[:-len(".index_terms.json")]
+    source_path = source_for(stem, use_md)
+    if not source_path.exists():
+        print(f"❌ Source text not found: {source_path}")
+        return
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / f"{stem}.term_links.json"
+
+    with metrics.document(SCRIPT_NAME, source_path.name, source_path) as doc_metrics:
+        grouped = load_terms(terms_path)
+        links = link_terms(grouped, doc_metrics.pages(iter_source_pages(source_path)))
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump({"source": source_path.name, "terms": links}, f, indent=2, ensure_ascii=False)
+        doc_metrics.wrote(output_path)
+
+    found = sum(1 for link in links if link["count"])
+    total = sum(link["count"] for link in links)
+    print(f"✅ {stem}: {found}/{len(links)} terms found, {total} occurrences → {output_path.name}")
+
+def main():
+    args = parse_args()
+
+    if args["show_help"]:
+        print_help()
+        return
+    if args["show_version"]:
+        print(f"{SCRIPT_NAME} v{SCRIPT_VERSION}")
+        return
+
+    print_header()
+    if args["metrics"]:
+        metrics.enable(args["metrics"])
+
+    files = []
+    if args["run_all"]:
+        files = sorted(TERMS_DIR.glob("*.index_terms.json"))
+    elif args["target_file"]:
+        target = TERMS_DIR / args["target_file"]
+        if not target.exists():
+            print(f"❌ File not found: {target}")
+            return
+        files = [target]
+    else:
+        print("❌ No input provided. Use --file or --all.")
+        print_help()
+        return
+
+    for file in tqdm(files, desc="Linking index terms", unit="file"):
+        process_file(file, use_md=args["use_md"])
+
+if __name__ == "__main__":
+    main()
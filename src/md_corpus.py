@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Script: md_corpus.py
+Version: 1.0.0
+Purpose: Shared helpers over the converted Markdown corpus: document names, which file stands for a document, heading keys.
+
+convert_to_md.py writes <stem>.md; clean_md_output.py may add <stem>_cleaned.md. Both name
+the same document. The cleaned variant stands for the document only while it is at least as
+new as the raw .md: once convert_to_md.py rewrites the raw file, that one is current until
+clean_md_output.py runs again. chunk_markdown.py and search_index.py pick their files here,
+so both see the same text for a document.
+"""
+
+import re
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+MD_DIR = BASE_DIR / "../data/converted_md"
+
+CLEANED_SUFFIX = "_cleaned"
+_NON_WORD = re.compile(r"[\W_]+")
+
+def normalize_heading(text):
+    """Match key for a heading or body line: lowercase alphanumerics separated by single spaces."""
+    return _NON_WORD.sub(" ", str(text)).strip().lower()
+
+def document_name(md_path):
+    """Document stem of a Markdown file; a _cleaned variant names the same document."""
+    stem = Path(md_path).stem
+    return stem[:-len(CLEANED_SUFFIX)] if stem.endswith(CLEANED_SUFFIX) else stem
+
+def preferred_file(md_path):
+    """The file that stands for md_path's document: the _cleaned variant unless the raw .md is newer."""
+    md_path = Path(md_path)
+    document = document_name(md_path)
+    raw = md_path.with_name(f"{document}.md")
+    cleaned = md_path.with_name(f"{document}{CLEANED_SUFFIX}.md")
+    try:
+        cleaned_mtime = cleaned.stat().st_mtime
+    except FileNotFoundError:
+        return raw if raw.exists() else md_path
+    try:
+        return raw if raw.stat().st_mtime > cleaned_mtime else cleaned
+    except FileNotFoundError:
+        return cleaned
+
+def corpus_files(input_dir=MD_DIR):
+    """Every Markdown document once, as its preferred_file()."""
+    return sorted({preferred_file(f) for f in Path(input_dir).glob("*.md")})
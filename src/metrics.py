@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Script: metrics.py
+Version: 1.0.0
+Purpose: Shared per-stage timing and memory instrumentation emitted as JSON lines (--metrics FILE).
+
+Stages wrap each document in metrics.document(...) and may time pages with
+DocumentMetrics.pages(iterable). When metrics are enabled, one JSON line per document
+is appended to the metrics file:
+
+    {"stage": "extract_text.py", "document": "x.pdf", "seconds": 1.2, "pages": 40,
+     "page_seconds": {"min": ..., "mean": ..., "max": ...}, "bytes_read": ...,
+     "bytes_written": ..., "peak_rss_mb": ..., "ok": true}
+
+When metrics are disabled the context manager only does the cheap bookkeeping and writes nothing.
+"""
+
+import json
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+_sink_path = None
+_collected = None
+
+def enable(path=None, collect=False):
+    """Append records to path (JSON lines) and/or keep them in memory for collected()."""
+    global _sink_path, _collected
+    _sink_path = Path(path) if path else None
+    if _sink_path:
+        _sink_path.parent.mkdir(parents=True, exist_ok=True)
+    _collected = [] if collect else None
+
+def sink_path():
+    return str(_sink_path) if _sink_path else None
+
+def is_enabled():
+    return _sink_path is not None or _collected is not None
+
+def collected():
+    return list(_collected or [])
+
+def add_argument(parser):
+    parser.add_argument("--metrics", metavar="FILE", help="Append per-document timing/memory metrics as JSON lines")
+
+def configure(args):
+    if getattr(args, "metrics", None):
+        enable(args.metrics)
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+def emit(record):
+    if _collected is not None:
+        _collected.append(record)
+    if _sink_path is not None:
+        with open(_sink_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+def _file_size(path):
+    try:
+        return Path(path).stat().st_size
+    except (OSError, TypeError):
+        return 0
+
+class DocumentMetrics:
+    def __init__(self, stage, document):
+        self.stage = stage
+        self.document = document
+        self.page_count = 0
+        self.page_seconds = []
+        self.bytes_read = 0
+        self.outputs = []
+
+    def pages(self, iterable):
+        """Yield from iterable, timing each item from fetch to the end of the caller's loop body."""
+        last = time.perf_counter()
+        for item in iterable:
+            yield item
+            now = time.perf_counter()
+            self.page_seconds.append(now - last)
+            self.page_count += 1
+            last = now
+
+    def add_pages(self, count):
+        """Count pages processed elsewhere (e.g. by worker processes) without per-page timings."""
+        self.page_count += count
+
+    def read(self, path):
+        self.bytes_read += _file_size(path)
+
+    def wrote(self, *paths):
+        self.outputs.extend(paths)
+
+@contextmanager
+def document(stage, document, input_path=None):
+    """Measure one document's processing in a stage; emits a record on exit when enabled."""
+    doc_metrics = DocumentMetrics(stage, str(document))
+    if input_path is not None:
+        doc_metrics.read(input_path)
+    started = time.perf_counter()
+    ok = False
+    try:
+        yield doc_metrics
+        ok = True
+    finally:
+        if is_enabled():
+            seconds = time.perf_counter() - started
+            page_seconds = doc_metrics.page_seconds
+            emit({
+                "stage": stage,
+                "document": doc_metrics.document,
+                "seconds": round(seconds, 4),
+                "pages": doc_metrics.page_count,
+                "pages_per_sec": round(doc_metrics.page_count / seconds, 1) if seconds and doc_metrics.page_count else None,
+                "page_seconds": {
+                    "min": round(min(page_seconds), 5),
+                    "mean": round(sum(page_seconds) / len(page_seconds), 5),
+                    "max": round(max(page_seconds), 5),
+                    "slowest_page": page_seconds.index(max(page_seconds)) + 1,
+                } if page_seconds else None,
+                "bytes_read": doc_metrics.bytes_read,
+                "bytes_written": sum(_file_size(p) for p in doc_metrics.outputs),
+                "peak_rss_mb": peak_rss_mb(),
+                "ok": ok,
+            })
+
+def summarize(records):
+    """Aggregate document records per stage: documents, failures, pages, seconds, bytes, peak RSS."""
+    stages = {}
+    for r in records:
+        s = stages.setdefault(r["stage"], {
+            "documents": 0, "failed": 0, "pages": 0, "seconds": 0.0,
+            "bytes_read": 0, "bytes_written": 0, "peak_rss_mb": 0.0,
+        })
+        s["documents"] += 1
+        s["failed"] += 0 if r["ok"] else 1
+        s["pages"] += r["pages"]
+        s["seconds"] += r["seconds"]
+        s["bytes_read"] += r["bytes_read"]
+        s["bytes_written"] += r["bytes_written"]
+        s["peak_rss_mb"] = max(s["peak_rss_mb"], r["peak_rss_mb"] or 0.0)
+    return stages
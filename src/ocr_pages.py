@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Script: ocr_pages.py
+Version: 1.0.3
+Purpose: OCR the image-only pages of scanned PDFs (Tesseract via PyMuPDF) and patch them into the extracted .txt.
+
+A page needs OCR when it has no text layer (no fonts in its resources) and images cover
+most of it; every other page keeps its extracted text and never pays the OCR cost.
+Flagged pages are OCR'd across a process pool, each worker opening the PDF once.
+
+OCR results are cached per page under ../data/extracted_text/ocr_cache, keyed by the page
+fingerprint from page_text.py (content streams and images) plus language and resolution,
+so re-runs, including extract_text.py --ocr on a revised PDF, never OCR a page twice.
+
+Usage:
+    python ocr_pages.py scan.pdf [--workers N] [--lang eng] [--dpi 300]
+    python ocr_pages.py --all [--detect-only]
+
+Dependencies:
+- PyMuPDF
+- Tesseract OCR with language data (found via TESSDATA_PREFIX or the tesseract install)
+- tqdm
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import fitz  # PyMuPDF
+from tqdm import tqdm
+
+import batch_pool
+import metrics
+from page_text import PagedText, PagedTextWriter, has_page_index, load_page_index, page_fingerprints, sidecar_path
+
+SCRIPT_NAME = "ocr_pages.py"
+SCRIPT_VERSION = "1.0.3"
+SCRIPT_PURPOSE = "OCR image-only PDF pages and patch them into the extracted text"
+
+BASE_DIR = Path(__file__).resolve().parent
+INPUT_DIR = BASE_DIR / "../data/input_pdfs"
+TEXT_DIR = BASE_DIR / "../data/extracted_text"
+CACHE_DIR = BASE_DIR / "../data/extracted_text/ocr_cache"
+
+OCR_LANGUAGE = "eng"
+OCR_DPI = 300
+# Share of the page area images must cover before a page without text is worth OCR
+MIN_IMAGE_COVERAGE = 0.5
+
+# ─── Detection ─────────────────────────────────────────────────────────────────
+
+def tesseract_available():
+    try:
+        fitz.get_tessdata()
+    except RuntimeError:
+        return False
+    return True
+
+def image_coverage(page):
+    """Fraction of the page area covered by images (overlaps counted twice, capped at 1)."""
+    area = abs(page.rect)
+    if not area:
+        return 0.0
+    covered = sum(abs(fitz.Rect(info["bbox"]) & page.rect) for info in page.get_image_info())
+    return min(covered / area, 1.0)
+
+def needs_ocr(page):
+    # The font check only reads resources; images are only measured on pages without any font
+    return not page.get_fonts() and image_coverage(page) >= MIN_IMAGE_COVERAGE
+
+def image_pages(doc):
+    """0-based numbers of the pages that need OCR."""
+    return [page.number for page in doc if needs_ocr(page)]
+
+# ─── Cache ─────────────────────────────────────────────────────────────────────
+
+class OcrCache:
+    """One UTF-8 file per OCR'd page: <cache_dir>/<fp[:2]>/<fingerprint>.<language>.<dpi>.txt"""
+
+    def __init__(self, cache_dir=CACHE_DIR, language=OCR_LANGUAGE, dpi=OCR_DPI):
+        self.cache_dir = Path(cache_dir)
+        self.suffix = f".{language}.{dpi}.txt"
+
+    def path(self, fingerprint):
+        return self.cache_dir / fingerprint[:2] / (fingerprint + self.suffix)
+
+    def get(self, fingerprint):
+        try:
+            return self.path(fingerprint).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+
+    def put(self, fingerprint, text):
+        path = self.path(fingerprint)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(text, encoding="utf-8")
+        os.replace(tmp_path, path)
+
+# ─── OCR ───────────────────────────────────────────────────────────────────────
+
+def ocr_page(page, language=OCR_LANGUAGE, dpi=OCR_DPI):
+    textpage = page.get_textpage_ocr(language=language, dpi=dpi, full=True)
+    return page.get_text(textpage=textpage)
+
+_worker_doc = None
+_worker_options = None
+
+def _open_worker_doc(pdf_path, language, dpi):
+    # Runs once in each worker process so every page reuses the same open document
+    global _worker_doc, _worker_options
+    _worker_doc = fitz.open(pdf_path)
+    _worker_options = (language, dpi)
+
+def _ocr_worker_page(number):
+    return number, ocr_page(_worker_doc[number], *_worker_options)
+
+def ocr_pages(pdf_path, pages, fingerprints, workers=1, doc=None,
+              language=OCR_LANGUAGE, dpi=OCR_DPI, cache_dir=CACHE_DIR):
+    """
+    OCR text for the given 0-based pages as {page number: text}. Cached pages are read back;
+    the rest run across `workers` processes (or in this process on `doc` when workers is 1).
+    """
+    cache = OcrCache(cache_dir, language, dpi)
+    texts = {}
+    missing = []
+    for number in pages:
+        text = cache.get(fingerprints[number])
+        if text is None:
+            missing.append(number)
+        else:
+            texts[number] = text
+    if texts:
+        print(f"♻️ {len(texts)} of {len(pages)} OCR pages reused from the cache")
+    if not missing:
+        return texts
+
+    bar = tqdm(total=len(missing), desc=f"🔍 OCR {Path(pdf_path).name} ({max(workers, 1)} workers)", unit="page")
+    with bar:
+        if workers > 1 and len(missing) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(missing)), initializer=_open_worker_doc,
+                                     initargs=(str(pdf_path), language, dpi)) as pool:
+                for number, text in pool.map(_ocr_worker_page, missing):
+                    cache.put(fingerprints[number], text)
+                    texts[number] = text
+                    bar.update(1)
+        else:
+            owns_doc = doc is None
+            if owns_doc:
+                doc = fitz.open(pdf_path)
+            try:
+                for number in missing:
+                    texts[number] = ocr_page(doc[number], language, dpi)
+                    cache.put(fingerprints[number], texts[number])
+                    bar.update(1)
+            finally:
+                if owns_doc:
+                    doc.close()
+    return texts
+
+def patch_text(txt_path, texts, fingerprints):
+    """
+    Rewrite txt_path (and its sidecar) with the given page texts swapped in; other pages are copied.
+    Copied pages keep their previous fingerprint, as their text is still the previous extraction's,
+    so an incremental extract_text.py run still re-extracts them when the PDF was revised. Patched
+    pages get the current fingerprint only when they had one: pages of a --strip-headers .txt carry
+    none, so incremental runs never splice them into unstripped text.
+    """
+    txt_path = Path(txt_path)
+    partial_path = txt_path.with_name(txt_path.stem + ".partial.txt")
+    try:
+        with PagedText(txt_path) as previous, PagedTextWriter(partial_path, previous.reading_order) as out:
+            for number, entry in enumerate(previous.pages):
+                if number in texts:
+                    out.write_page(texts[number], fingerprints[number] if "fingerprint" in entry else None)
+                else:
+                    out.write_page_bytes(previous.page_bytes(number + 1), entry.get("fingerprint"))
+        os.replace(partial_path, txt_path)
+        os.replace(sidecar_path(partial_path), sidecar_path(txt_path))
+    finally:
+        partial_path.unlink(missing_ok=True)
+
+def process_pdf(pdf_path, workers=1, language=OCR_LANGUAGE, dpi=OCR_DPI, detect_only=False, text_dir=TEXT_DIR):
+    """Detect the image pages of one PDF, OCR them and patch text_dir/<stem>.txt."""
+    pdf_path = Path(pdf_path)
+    txt_path = Path(text_dir) / (pdf_path.stem + ".txt")
+    with metrics.document(SCRIPT_NAME, pdf_path.name, pdf_path) as doc_metrics, fitz.open(pdf_path) as doc:
+        flagged = image_pages(doc)
+        print(f"📄 {pdf_path.name}: {len(flagged)} of {len(doc)} pages need OCR")
+        if detect_only or not flagged:
+            return len(flagged)
+        entries = load_page_index(txt_path)
+        if not txt_path.exists() or not has_page_index(txt_path) or len(entries) != len(doc):
+            print(f"❌ {txt_path.name} is missing or out of date; run extract_text.py --ocr instead")
+            return len(flagged)
+        fingerprints = page_fingerprints(doc)
+        texts = ocr_pages(pdf_path, flagged, fingerprints, workers, doc, language, dpi)
+        doc_metrics.add_pages(len(flagged))
+        patch_text(txt_path, texts, fingerprints)
+        doc_metrics.wrote(txt_path, sidecar_path(txt_path))
+    print(f"✅ Patched {len(texts)} OCR pages into {txt_path.name}")
+    return len(flagged)
+
+def main():
+    parser = argparse.ArgumentParser(description=SCRIPT_PURPOSE)
+    parser.add_argument("filename", nargs="?", help="PDF file to process (from input_pdfs/)")
+    parser.add_argument("--all", action="store_true", help="Process all PDFs in the input folder")
+    parser.add_argument("--workers", type=int, default=batch_pool.default_jobs(),
+                        help="OCR worker processes per PDF (default: all cores)")
+    parser.add_argument("--lang", default=OCR_LANGUAGE, help=f"Tesseract language(s), e.g. eng+deu (default: {OCR_LANGUAGE})")
+    parser.add_argument("--dpi", type=int, default=OCR_DPI, help=f"Rendering resolution for OCR (default: {OCR_DPI})")
+    parser.add_argument("--detect-only", action="store_true", help="Only report which pages need OCR")
+    metrics.add_argument(parser)
+    parser.add_argument("--version", "-v", action="version", version=f"{SCRIPT_NAME} v{SCRIPT_VERSION}")
+    args = parser.parse_args()
+    metrics.configure(args)
+
+    print(f"🛠 {SCRIPT_NAME} - v{SCRIPT_VERSION}")
+    print(f"📘 Purpose: {SCRIPT_PURPOSE}")
+    if not args.detect_only and not tesseract_available():
+        print("❌ Tesseract not found: install it (with language data) or set TESSDATA_PREFIX")
+        sys.exit(1)
+
+    if args.all:
+        files = sorted(INPUT_DIR.glob("*.pdf"))
+    elif args.filename:
+        files = [INPUT_DIR / args.filename]
+        if not files[0].exists():
+            print(f"❌ File not found: {files[0]}")
+            sys.exit(1)
+    else:
+        parser.print_help()
+        return
+
+    # Pages, not PDFs, are spread over the pool: most PDFs have no image pages at all
+    for pdf_path in files:
+        process_pdf(pdf_path, max(1, args.workers), args.lang, args.dpi, args.detect_only)
+
+if __name__ == "__main__":
+    main()
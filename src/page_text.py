@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Script: page_text.py
+Version: 1.2.0
+Purpose: Write and read the page-offset sidecar (.pages.json) that maps page numbers to byte ranges in a .txt.
+
+extract_text.py and pdf_analysis.py write pages through PagedTextWriter, which records
+where each page starts in the UTF-8 .txt. PagedText memory-maps the .txt and returns any
+page slice without reading the rest of the file.
+
+Sidecar layout (<stem>.pages.json):
+    {"version": 1, "reading_order": "columns",
+     "pages": [{"page": 1, "offset": 0, "length": 1834, "fingerprint": "..."}, ...]}
+
+The optional per-page fingerprint (see page_fingerprints) lets extract_text.py re-extract
+only the pages of a revised PDF that actually changed. The optional reading_order names the
+block order the pages were written in (layout_order.py); without it, pages are in PyMuPDF's
+content-stream order, and pages of different orders are never spliced together.
+"""
+
+import bisect
+import hashlib
+import json
+import mmap
+import re
+from pathlib import Path
+
+SIDECAR_VERSION = 1
+PAGE_SEPARATOR = b"\n"
+_XREF_REF = re.compile(r"(\d+) 0 R")
+# Writers may turn an indirect /Length into a direct one on save; the stream bytes are hashed anyway
+_STREAM_LENGTH = re.compile(r"/Length\s+\d+(?:\s+0\s+R)?")
+
+def page_fingerprints(doc):
+    """
+    One fingerprint per page: a hash of the page's raw content streams, its /Resources entry and
+    every object reachable from the resources (fonts, images and form XObjects, raw stream
+    bytes included). Nothing is decompressed or rendered, so this is far cheaper than extracting
+    text; objects shared by many pages are hashed once. A re-save that renumbers objects changes
+    the fingerprints, which only costs a full re-extract.
+    """
+    object_digests = {}
+
+    def object_digest(xref):
+        if xref not in object_digests:
+            object_digests[xref] = b""  # cycle guard while this object's references are followed
+            source = doc.xref_object(xref, compressed=True)
+            digest = hashlib.blake2b(digest_size=16)
+            if doc.xref_is_stream(xref):
+                source = _STREAM_LENGTH.sub("", source)
+                digest.update(doc.xref_stream_raw(xref) or b"")
+            digest.update(source.encode())
+            # Follow nested resources (form XObjects, font files) but never climb into the page tree
+            if "/Type/Page" not in source:
+                for ref in dict.fromkeys(_XREF_REF.findall(source)):
+                    digest.update(object_digest(int(ref)))
+            object_digests[xref] = digest.digest()
+        return object_digests[xref]
+
+    fingerprints = []
+    for page in doc:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((tuple(page.mediabox), page.rotation)).encode())
+        for xref in page.get_contents():
+            digest.update(doc.xref_stream_raw(xref) or b"")
+        kind, resources = doc.xref_get_key(page.xref, "Resources")
+        if kind == "xref":
+            resources = doc.xref_object(int(resources.split()[0]), compressed=True)
+        digest.update(resources.encode())
+        for ref in dict.fromkeys(_XREF_REF.findall(resources)):
+            digest.update(object_digest(int(ref)))
+        fingerprints.append(digest.hexdigest())
+    return fingerprints
+
+def load_page_index(txt_path):
+    """Page entries of an existing sidecar, or None when there is no usable sidecar."""
+    try:
+        with open(sidecar_path(txt_path), "r", encoding="utf-8") as f:
+            return json.load(f)["pages"]
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return None
+
+def sidecar_path(txt_path):
+    txt_path = Path(txt_path)
+    return txt_path.with_name(txt_path.stem + ".pages.json")
+
+def has_page_index(txt_path):
+    return sidecar_path(txt_path).exists()
+
+class PagedTextWriter:
+    """Write page texts to a .txt (each followed by a newline) and record their byte offsets."""
+
+    def __init__(self, txt_path, reading_order=None):
+        self.txt_path = Path(txt_path)
+        self.reading_order = reading_order
+        self.pages = []
+        self._offset = 0
+        self._file = open(self.txt_path, "wb")
+
+    def write_page(self, text, fingerprint=None):
+        self.write_page_bytes(text.encode("utf-8"), fingerprint)
+
+    def write_page_bytes(self, data, fingerprint=None):
+        """Write an already-encoded page, e.g. one copied unchanged from a previous .txt."""
+        self._file.write(data)
+        self._file.write(PAGE_SEPARATOR)
+        entry = {"page": len(self.pages) + 1, "offset": self._offset, "length": len(data)}
+        if fingerprint is not None:
+            entry["fingerprint"] = fingerprint
+        self.pages.append(entry)
+        self._offset += len(data) + len(PAGE_SEPARATOR)
+
+    def close(self):
+        self._file.close()
+        with open(sidecar_path(self.txt_path), "w", encoding="utf-8") as f:
+            sidecar = {"version": SIDECAR_VERSION, "pages": self.pages}
+            if self.reading_order:
+                sidecar["reading_order"] = self.reading_order
+            json.dump(sidecar, f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Never leave a sidecar that describes a half-written .txt
+            self._file.close()
+            sidecar_path(self.txt_path).unlink(missing_ok=True)
+
+class PagedText:
+    """Random access to the pages of an extracted .txt via its .pages.json sidecar."""
+
+    def __init__(self, txt_path):
+        self.txt_path = Path(txt_path)
+        with open(sidecar_path(self.txt_path), "r", encoding="utf-8") as f:
+            sidecar = json.load(f)
+        self.pages = sidecar["pages"]
+        self.reading_order = sidecar.get("reading_order")
+        self._offsets = [p["offset"] for p in self.pages]
+        self._file = open(self.txt_path, "rb")
+        size = self.txt_path.stat().st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    @property
+    def page_count(self):
+        return len(self.pages)
+
+    def page_bytes(self, number):
+        """Raw UTF-8 bytes of a 1-based page number."""
+        if not 1 <= number <= len(self.pages):
+            raise IndexError(f"page {number} out of range 1..{len(self.pages)}")
+        entry = self.pages[number - 1]
+        return self._map[entry["offset"]:entry["offset"] + entry["length"]]
+
+    def page(self, number):
+        """Text of a 1-based page number."""
+        return self.page_bytes(number).decode("utf-8")
+
+    def iter_pages(self, start=1, stop=None):
+        """Yield (page number, text) for pages start..stop inclusive."""
+        stop = len(self.pages) if stop is None else min(stop, len(self.pages))
+        for number in range(max(start, 1), stop + 1):
+            yield number, self.page(number)
+
+    def page_at_offset(self, byte_offset):
+        """1-based page number containing a byte offset of the .txt."""
+        return max(bisect.bisect_right(self._offsets, byte_offset), 1)
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
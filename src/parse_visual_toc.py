@@ -1,33 +1,37 @@
 """
 Script: parse_visual_toc.py
-Version: 1.3.7
+Version: 1.5.0
 Purpose: Attempt to extract a visual Table of Contents (TOC) from the first few pages of a PDF
 """
 
-print("🛠 parse_visual_toc.py - v1.3.7")
-print("📘 Purpose: Attempt to extract a visual Table of Contents (TOC) from the first few pages of a PDF")
-print("📦 Requires: PyMuPDF (install via 'pip install pymupdf')")
-print("")
-
 import sys
 import fitz
 import argparse
 from pathlib import Path
 
+import batch_pool
+import metrics
+
 INPUT_DIR = Path(__file__).resolve().parent / "../data/input_pdfs"
 OUTPUT_DIR = Path(__file__).resolve().parent / "../data/extracted_text"
 
-def extract_visual_toc(pdf_path: Path, verbose=False):
-    output_path = OUTPUT_DIR / (pdf_path.stem + ".visual_toc.txt")
-    print(f"📂 Processing {pdf_path.name}")
-    doc = fitz.open(pdf_path)
-    lines = []
-    for i in range(min(5, len(doc))):
-        page = doc[i]
-        text = page.get_text().strip().splitlines()
-        for line in text:
-            if any(char.isdigit() for char in line) and "." in line:
-                lines.append(line)
+# Only the first few pages are scanned for a printed TOC
+TOC_PAGES = 5
+
+def print_banner():
+    print("🛠 parse_visual_toc.py - v1.5.0")
+    print("📘 Purpose: Attempt to extract a visual Table of Contents (TOC) from the first few pages of a PDF")
+    print("📦 Requires: PyMuPDF (install via 'pip install pymupdf')")
+    print("")
+
+def toc_lines_from_text(text):
+    """Return the lines of one page's text that look like TOC entries."""
+    return [
+        line for line in text.strip().splitlines()
+        if any(char.isdigit() for char in line) and "." in line
+    ]
+
+def write_visual_toc(lines, output_path: Path, verbose=False):
     if not lines:
         output_path.write_text("No visual TOC detected.\n")
     else:
@@ -36,6 +40,21 @@ def extract_visual_toc(pdf_path: Path, verbose=False):
         print(f"📝 Output: {output_path}")
     print("✅ Visual TOC extraction complete.")
 
+def extract_visual_toc(pdf_path: Path, verbose=False, doc=None, output_dir=OUTPUT_DIR):
+    output_path = output_dir / (pdf_path.stem + ".visual_toc.txt")
+    print(f"📂 Processing {pdf_path.name}")
+    with metrics.document("parse_visual_toc.py", pdf_path.name, pdf_path) as doc_metrics:
+        owns_doc = doc is None
+        if owns_doc:
+            doc = fitz.open(pdf_path)
+        lines = []
+        for i in doc_metrics.pages(range(min(TOC_PAGES, len(doc)))):
+            lines.extend(toc_lines_from_text(doc[i].get_text()))
+        if owns_doc:
+            doc.close()
+        write_visual_toc(lines, output_path, verbose)
+        doc_metrics.wrote(output_path)
+
 def prompt_pdf_selection():
     pdfs = sorted(INPUT_DIR.glob("*.pdf"))
     if not pdfs:
@@ -51,15 +70,23 @@ def prompt_pdf_selection():
     return pdfs[int(choice) - 1]
 
 def main():
+    print_banner()
     parser = argparse.ArgumentParser(description="Extract visual TOC from a PDF.")
     parser.add_argument("file", nargs="?", help="PDF filename (searched in ../data/input_pdfs/ if not a full path)")
     parser.add_argument("--all", action="store_true", help="Process all PDFs in ../data/input_pdfs/")
-    parser.add_argument("--version", "-v", action="version", version="parse_visual_toc.py v1.3.7")
+    parser.add_argument("--version", "-v", action="version", version="parse_visual_toc.py v1.5.0")
     parser.add_argument("--verbose", action="store_true", help="Show verbose output")
+    batch_pool.add_argument(parser)
+    metrics.add_argument(parser)
     args = parser.parse_args()
+    metrics.configure(args)
 
     if args.all:
-        for pdf_path in sorted(INPUT_DIR.glob("*.pdf")):
+        pdfs = sorted(INPUT_DIR.glob("*.pdf"))
+        if args.jobs > 1 and len(pdfs) > 1:
+            batch_pool.run_batch(extract_visual_toc, pdfs, args.jobs, "📂 Visual TOC", (args.verbose,))
+            return
+        for pdf_path in pdfs:
             extract_visual_toc(pdf_path, args.verbose)
         return
 
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Script: pdf_analysis.py
+Version: 1.8.2
+Purpose: Single-pass PDF analysis that writes text, headings, outline and visual TOC from one decode per page.
+
+Each document is opened once and every page is decoded once with get_text("dict").
+Plain text, heading candidates and TOC-page lines are all derived from that layout, with
+its blocks put in column reading order first (layout_order.py), and the outline is read
+from the same open document. Outputs match the files written
+by extract_text.py, detect_headings.py, extract_outline.py and parse_visual_toc.py,
+including detect_headings.py's per-page state (<stem>.headings.pages.json), so a later
+incremental detect_headings.py run rescans only pages that changed since.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import fitz  # PyMuPDF
+from tqdm import tqdm
+
+from detect_headings import pages_body_size, state_pages, state_path, write_headings, write_state
+from extract_outline import outline_entries, write_outline
+import metrics
+from heading_classifier import SpanTable, assign_levels, char_histograms, heading_candidates
+from heading_filter import filter_headings
+from layout_order import READING_ORDER, order_page_dict
+from running_headers import RunningHeaders, edge_lines, page_lines
+from page_text import PagedTextWriter, page_fingerprints
+from parse_visual_toc import TOC_PAGES, toc_lines_from_text, write_visual_toc
+
+SCRIPT_NAME = "pdf_analysis.py"
+SCRIPT_VERSION = "1.8.2"
+SCRIPT_PURPOSE = "Single-pass PDF analysis: text, headings, outline and visual TOC from one decode"
+
+# Paths
+BASE_DIR = Path(__file__).resolve().parent
+INPUT_DIR = BASE_DIR / "../data/input_pdfs"
+OUTPUT_DIR = BASE_DIR / "../data/extracted_text"
+
+def page_text_from_dict(page_dict):
+    """Rebuild page.get_text() output from a dict-mode layout (one line per text line)."""
+    parts = []
+    for block in page_dict["blocks"]:
+        for line in block.get("lines", []):
+            parts.append("".join(span["text"] for span in line["spans"]))
+            parts.append("\n")
+    return "".join(parts)
+
+def analyze_document(doc, name, text_out=None, show_progress=True, doc_metrics=None):
+    """
+    Decode every page of an open document once and derive all structure sources.
+    Page text is streamed to text_out (a PagedTextWriter, if given) so the full text is never held in memory;
+    pages carry fingerprints so a later extract_text.py run can splice in only changed pages. The
+    result's "state_pages" and "body_size" are detect_headings.py's per-page state for write_state().
+    """
+    spans = SpanTable()
+    running = RunningHeaders()
+    fingerprints = page_fingerprints(doc)
+    toc_lines = []
+    pages = tqdm(doc, desc=f"🔬 Analyzing {name}", unit="page", disable=not show_progress)
+    if doc_metrics is not None:
+        pages = doc_metrics.pages(pages)
+    for page in pages:
+        # TEXTFLAGS_TEXT skips image payloads, which dict mode would otherwise decode
+        page_dict = order_page_dict(page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT))
+        text = page_text_from_dict(page_dict)
+        if text_out is not None:
+            text_out.write_page(text, fingerprints[page.number])
+        spans.add_page(page_dict, page.number + 1)
+        running.add_page(page.number + 1, edge_lines(page_lines(page_dict), page.rect.height))
+        if page.number < TOC_PAGES:
+            toc_lines.extend(toc_lines_from_text(text))
+
+    # Same steps as detect_headings.py, so both write the same headings.json and page state
+    histograms = char_histograms(spans)
+    body = pages_body_size(histograms)
+    candidates = heading_candidates(spans, body)
+    page_headings = {}
+    for heading in candidates:
+        page_headings.setdefault(heading["page"], []).append(heading)
+    running_texts = running.running_texts(running.running_keys(len(doc)))
+    return {
+        "page_count": len(doc),
+        "headings": assign_levels(filter_headings(candidates, running_texts)[0]),
+        "body_size": body,
+        "state_pages": state_pages(fingerprints, histograms, page_headings, running),
+        "outline": outline_entries(doc),
+        "toc_lines": toc_lines,
+    }
+
+def analyze_pdf(pdf_path: Path, output_dir: Path = OUTPUT_DIR):
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stem = pdf_path.stem
+
+    outputs = [output_dir / f"{stem}.{ext}" for ext in ("txt", "pages.json", "headings.json", "outline.json", "visual_toc.txt")]
+    with metrics.document(SCRIPT_NAME, pdf_path.name, pdf_path) as doc_metrics:
+        doc = fitz.open(pdf_path)
+        with PagedTextWriter(output_dir / f"{stem}.txt", READING_ORDER) as text_out:
+            result = analyze_document(doc, pdf_path.name, text_out, doc_metrics=doc_metrics)
+        doc.close()
+        print(f"✅ Saved: {output_dir / f'{stem}.txt'}")
+
+        headings_path = output_dir / f"{stem}.headings.json"
+        write_headings(result["headings"], headings_path)
+        # Without it, detect_headings.py would reuse page state from before this run
+        write_state(headings_path, result["body_size"], result["state_pages"])
+        outputs.append(state_path(headings_path))
+        write_outline(result["outline"], str(output_dir / f"{stem}.outline.json"))
+        write_visual_toc(result["toc_lines"], output_dir / f"{stem}.visual_toc.txt")
+        doc_metrics.wrote(*outputs)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=SCRIPT_PURPOSE)
+    parser.add_argument("filename", nargs="?", help="PDF file to process (from input_pdfs/)")
+    parser.add_argument("--all", action="store_true", help="Process all PDFs in the input folder")
+    metrics.add_argument(parser)
+    parser.add_argument("--version", "-v", action="version", version=f"{SCRIPT_NAME} v{SCRIPT_VERSION}")
+    args = parser.parse_args()
+    metrics.configure(args)
+
+    print(f"🛠 {SCRIPT_NAME} - v{SCRIPT_VERSION}")
+    print(f"📘 Purpose: {SCRIPT_PURPOSE}")
+
+    if args.all:
+        files = sorted(INPUT_DIR.glob("*.pdf"))
+        if not files:
+            print("❌ No PDF files found in input folder.")
+            sys.exit(1)
+        for pdf_path in files:
+            analyze_pdf(pdf_path)
+        return
+
+    if args.filename:
+        pdf_path = INPUT_DIR / args.filename
+        if not pdf_path.exists():
+            print(f"❌ File not found: {pdf_path}")
+            sys.exit(1)
+        analyze_pdf(pdf_path)
+        return
+
+    files = sorted(INPUT_DIR.glob("*.pdf"))
+    if not files:
+        print("❌ No PDF files found in input folder.")
+        return
+
+    print("\n📄 Available PDFs:")
+    for i, file in enumerate(files):
+        print(f"[{i}] {file.name}")
+    choice = input("\nEnter number: ").strip()
+    try:
+        analyze_pdf(files[int(choice)])
+    except (ValueError, IndexError):
+        print("❌ Invalid selection.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Script: pipeline_runner.py
+Version: 1.0.0
+Purpose: Run pipeline stages in-process on a shared open PDF instead of one subprocess per step.
+
+Each stage is the importable function behind its CLI script, so a PDF is opened once
+and every stage reuses that document. Used by run_extraction_pipeline.py,
+interactive_pipeline.py and run_testbench.py.
+"""
+
+import time
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from convert_to_md import convert_file
+from detect_headings import detect_headings_from_pdf
+from detect_headings import OUTPUT_DIR as HEADINGS_DIR
+from extract_outline import extract_outline
+from extract_text import extract_text_from_pdf
+from extract_text import OUTPUT_DIR as TEXT_DIR
+from parse_visual_toc import extract_visual_toc
+
+SCRIPT_NAME = "pipeline_runner.py"
+SCRIPT_VERSION = "1.0.0"
+SCRIPT_PURPOSE = "Run pipeline stages in-process on a shared open PDF"
+
+# stage name → callable(pdf_path, doc); doc is the shared open document
+STAGES = {
+    "extract_text": lambda pdf_path, doc: extract_text_from_pdf(pdf_path, TEXT_DIR, doc=doc),
+    "detect_headings": lambda pdf_path, doc: detect_headings_from_pdf(pdf_path, HEADINGS_DIR, doc=doc),
+    "extract_outline": lambda pdf_path, doc: extract_outline(str(pdf_path), doc=doc),
+    "parse_visual_toc": lambda pdf_path, doc: extract_visual_toc(pdf_path, doc=doc),
+    "convert_to_md": lambda pdf_path, doc: convert_file(pdf_path.stem),
+}
+
+def run_stage(name, pdf_path, doc):
+    """Run one named stage; returns a result dict and never raises."""
+    started = time.perf_counter()
+    try:
+        STAGES[name](pdf_path, doc)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return {
+        "stage": name,
+        "pdf": pdf_path.name,
+        "ok": error is None,
+        "error": error,
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+
+def run_pdf(pdf_path: Path, stages, stop_on_error=True):
+    """
+    Open pdf_path once and run the named stages in order against that document.
+    Returns one result dict per stage that was run.
+    """
+    results = []
+    doc = fitz.open(pdf_path)
+    try:
+        for name in stages:
+            print(f"▶️ {name}: {pdf_path.name}")
+            result = run_stage(name, pdf_path, doc)
+            results.append(result)
+            if not result["ok"]:
+                print(f"❌ {name} failed on {pdf_path.name}: {result['error']}")
+                if stop_on_error:
+                    break
+    finally:
+        doc.close()
+    return results
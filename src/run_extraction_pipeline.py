@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
-import subprocess
 import sys
 from pathlib import Path
 
+import metrics
+from extract_text import INPUT_DIR
+from pipeline_runner import run_pdf
+
 SCRIPT_NAME = "run_extraction_pipeline.py"
-SCRIPT_VERSION = "1.2.2"
+SCRIPT_VERSION = "1.4.0"
 SCRIPT_PURPOSE = "Batch-run PDF-to-Markdown extraction scripts in sequence"
 
 core_scripts = {
@@ -22,13 +25,14 @@ core_scripts = {
     }
 }
 
-valid_flags = ["--all", "--help", "--version", "-v"]
+valid_flags = ["--all", "--help", "--version", "-v", "--metrics"]
 args_used = [arg for arg in sys.argv[1:] if arg in valid_flags]
+metrics_file = next((sys.argv[i + 1] for i, arg in enumerate(sys.argv[:-1]) if arg == "--metrics"), None)
 
 # ─── Display Header ─────────────────────────────────────────────────────────────
 print(f"🛠 {SCRIPT_NAME} - v{SCRIPT_VERSION}")
 print(f"📘 Purpose: {SCRIPT_PURPOSE}")
-print("🎛 Valid CLI Flags: --all | --help | --version | -v")
+print("🎛 Valid CLI Flags: --all | --help | --version | -v | --metrics FILE")
 print("\n📚 Core scripts used in this pipeline:")
 for script, meta in core_scripts.items():
     print(f"  - {script} (SCRIPT_VERSION = \"{meta['version']}\"): SCRIPT_PURPOSE = \"{meta['purpose']}\"")
@@ -50,21 +54,28 @@ if "--all" not in sys.argv:
     print("❌ Please provide a valid flag. For batch mode, use: --all")
     sys.exit(1)
 
+# Stages run in-process, in the same order as core_scripts, on one open document per PDF
+stages = [script[:-3] for script in core_scripts]
+pdfs = sorted(INPUT_DIR.glob("*.pdf"))
+if not pdfs:
+    print("❌ No PDF files found in input folder.")
+    sys.exit(1)
+
+# Every stage reports per-document metrics; keep them in memory for the summary (and in FILE if given)
+metrics.enable(metrics_file, collect=True)
+
 # Track stats
 pdfs_processed = 0
-scripts_run = 0
+scripts_run = len(stages)
 
-for script in core_scripts:
-    print(f"\n▶️ Running python3 {script} --all")
-    result = subprocess.run(["python3", script, "--all"])
-    scripts_run += 1
-    if result.returncode != 0:
-        print(f"❌ Error in {script}. Aborting.")
+for pdf_path in pdfs:
+    print(f"\n📄 {pdf_path.name}")
+    results = run_pdf(pdf_path, stages)
+    if not all(r["ok"] for r in results):
+        print(f"❌ Error processing {pdf_path.name}. Aborting.")
         sys.exit(1)
-    print(f"✅ Completed {script}.")
-
-    # crude guess: each script processes all 9 PDFs (from menu)
-    pdfs_processed = max(pdfs_processed, 9)
+    pdfs_processed += 1
+    print(f"✅ Completed {pdf_path.name}.")
 
 # ─── Summary ────────────────────────────────────────────────────────────────────
 print("-" * 60)
@@ -72,5 +83,15 @@ print("📊 Pipeline complete.")
 print(f"📄 Scripts executed: {scripts_run}")
 print(f"🗂 Arguments used: {' '.join(args_used)}")
 print(f"📈 PDFs processed per script: {pdfs_processed}")
-print(f"📁 Estimated output files created: {pdfs_processed * scripts_run}")
+print("")
+print(f"{'Stage':22} {'Docs':>5} {'Pages':>7} {'Seconds':>9} {'Pages/s':>9} {'Read MB':>9} {'Written MB':>11} {'Peak RSS MB':>12}")
+total_seconds = 0.0
+for stage, s in metrics.summarize(metrics.collected()).items():
+    rate = s["pages"] / s["seconds"] if s["seconds"] and s["pages"] else 0.0
+    total_seconds += s["seconds"]
+    print(f"{stage:22} {s['documents']:>5} {s['pages']:>7} {s['seconds']:>9.2f} {rate:>9.1f} "
+          f"{s['bytes_read'] / 1e6:>9.2f} {s['bytes_written'] / 1e6:>11.2f} {s['peak_rss_mb']:>12.1f}")
+print(f"⏱ Total stage time: {total_seconds:.2f}s")
+if metrics_file:
+    print(f"📝 Metrics written to: {metrics_file}")
 print("🎉 All extraction steps completed successfully.")
@@ -1,12 +1,14 @@
 """
 Script: run_testbench.py
-Version: 1.0.0
+Version: 1.1.0
 Purpose: Run a full pipeline test on key structure variants in input_pdfs/
 """
 
-import subprocess
 from pathlib import Path
 
+from clean_md_output import process_file as clean_md_file
+from pipeline_runner import run_pdf
+
 # Define test files by structure type
 test_files = [
     "5e_2024_House_Rules_draft_v_0.2.pdf",  # headings
@@ -15,13 +17,15 @@ test_files = [
     "VER1-03_Gift_of_Beauty_(3E).pdf",      # mixed
 ]
 
-def run_script(script_name, args):
-    print(f"🛠 Running {script_name} {' '.join(args)}")
-    result = subprocess.run(["python3", script_name] + args)
-    if result.returncode != 0:
-        print(f"❌ {script_name} failed with code {result.returncode}")
-    else:
-        print(f"✅ {script_name} completed.")
+# Every stage runs in-process against one open document per PDF
+test_stages = ["extract_text", "detect_headings", "extract_outline", "parse_visual_toc", "convert_to_md"]
+
+def report(results):
+    for r in results:
+        if r["ok"]:
+            print(f"✅ {r['stage']} completed in {r['seconds']:.2f}s.")
+        else:
+            print(f"❌ {r['stage']} failed: {r['error']}")
 
 def main():
     base_dir = Path(__file__).resolve().parent
@@ -30,17 +34,22 @@ def main():
 
     for pdf in testpaths:
         print(f"📄 Testing: {pdf.name}")
-        run_script("extract_text.py", [str(pdf)])
-        run_script("detect_headings.py", [str(pdf)])
-        run_script("extract_outline.py", [str(pdf)])
-        run_script("parse_visual_toc.py", [str(pdf)])
-        run_script("convert_to_md.py", [str(pdf)])
+        if not pdf.exists():
+            print(f"⚠️ Missing test file, skipped: {pdf.name}")
+            print("—" * 60)
+            continue
+        report(run_pdf(pdf, test_stages, stop_on_error=False))
         print("—" * 60)
 
     # Clean one file after conversion
     md_path = base_dir / "../data/converted_md/5e_2024_House_Rules_draft_v_0.2.md"
     if md_path.exists():
-        run_script("clean_md_output.py", [md_path.name])
+        print(f"🛠 Cleaning {md_path.name}")
+        try:
+            clean_md_file(md_path)
+            print("✅ clean_md_output completed.")
+        except Exception as e:
+            print(f"❌ clean_md_output failed: {e}")
     else:
         print("⚠️ Markdown file not found for cleaning.")
 
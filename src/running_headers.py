@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Script: running_headers.py
+Version: 1.1.0
+Purpose: Detect running headers, footers and page numbers: text lines repeating at the top or bottom of many pages.
+
+Each page's lines come from its dict-mode layout (get_text("dict")) with their bboxes and
+font sizes. The first and last few lines inside the top and bottom bands of the page are its
+edge lines; each is keyed by its band and its text with digits and case ignored, so "Page 12"
+and "Page 13" share one key. Edge lines with letters set larger than the page's body text keep
+their digits: numbered headings at page tops ("Section 3.2", "Section 4.2") are distinct
+headings, not one running line. A key seen on enough pages is a running line and is stripped
+from every page it appears on: extract_text.py --strip-headers drops those lines from the
+.txt, and detect_headings.py / pdf_analysis.py drop headings that are running lines.
+
+Edge keys are plain strings, so they can be stored per page (detect_headings.py keeps them
+in its page state) and counted again without re-decoding unchanged pages.
+"""
+
+import re
+from collections import Counter, defaultdict
+
+# Share of the page height, from the top and from the bottom, where running lines live
+EDGE_BAND = 0.1
+# At most this many lines per band are candidates (header title + page number + rule text)
+MAX_EDGE_LINES = 3
+# A key is running when it is on at least this many pages and this share of all pages
+MIN_REPEAT_PAGES = 3
+REPEAT_PAGE_SHARE = 0.25
+# Edge lines at least this multiple of the page's body size keep their digits (as heading_classifier.py)
+HEADING_SIZE_RATIO = 1.2
+
+_DIGITS = re.compile(r"\d+")
+
+def line_key(text, keep_digits=False):
+    """Comparison key for a line: lowercase, digit runs replaced by '#' (unless keep_digits), whitespace collapsed."""
+    return " ".join((text if keep_digits else _DIGITS.sub("#", text)).lower().split())
+
+def page_lines(page_dict):
+    """(text, bbox, font size) for every text line of a dict-mode page, in get_text() order."""
+    return [
+        ("".join(span["text"] for span in line["spans"]), line["bbox"],
+         max((span["size"] for span in line["spans"]), default=0.0))
+        for block in page_dict["blocks"]
+        for line in block.get("lines", [])
+    ]
+
+def page_body_size(lines):
+    """The font size that carries the most characters of a page's lines."""
+    chars = defaultdict(int)
+    for text, _, size in lines:
+        chars[round(size * 2) / 2] += len(text.strip())
+    return max(chars, key=lambda size: (chars[size], -size)) if chars else 0.0
+
+def edge_lines(lines, height):
+    """[(line index, key)] for the edge lines of a page; keys start with 't:' (top) or 'b:' (bottom)."""
+    heading_size = page_body_size(lines) * HEADING_SIZE_RATIO
+    top = []
+    bottom = []
+    for index, (text, bbox, size) in enumerate(lines):
+        # Bare page numbers are running lines at any size
+        key = line_key(text, keep_digits=size >= heading_size and any(char.isalpha() for char in text))
+        if not key:
+            continue
+        if bbox[3] <= height * EDGE_BAND:
+            top.append((bbox[1], index, "t:" + key))
+        elif bbox[1] >= height * (1 - EDGE_BAND):
+            bottom.append((-bbox[3], index, "b:" + key))
+    # Nearest to the page edge first
+    edges = sorted(top)[:MAX_EDGE_LINES] + sorted(bottom)[:MAX_EDGE_LINES]
+    return [(index, key) for _, index, key in edges]
+
+class RunningHeaders:
+    """Collect edge lines page by page, then tell which lines of a page are running lines."""
+
+    def __init__(self):
+        self.pages = {}          # page number → [(line index, key)]
+        self.counts = Counter()  # key → number of pages it is on
+
+    def add_page(self, page_number, edges):
+        """Record a page's edge lines; adding a page again replaces its earlier edges."""
+        if page_number in self.pages:
+            self.counts.subtract({key for _, key in self.pages[page_number]})
+        self.pages[page_number] = edges
+        self.counts.update({key for _, key in edges})
+
+    def running_keys(self, page_count=None):
+        page_count = len(self.pages) if page_count is None else page_count
+        needed = max(MIN_REPEAT_PAGES, page_count * REPEAT_PAGE_SHARE)
+        return {key for key, count in self.counts.items() if count >= needed}
+
+    def running_lines(self, page_number, running_keys):
+        """Line indexes of a page that are running lines."""
+        return {index for index, key in self.pages.get(page_number, []) if key in running_keys}
+
+    def running_texts(self, running_keys):
+        """{page number: set of running line keys (band prefix removed)} for heading filters."""
+        by_page = {}
+        for page_number, edges in self.pages.items():
+            keys = {key[2:] for _, key in edges if key in running_keys}
+            if keys:
+                by_page[page_number] = keys
+        return by_page
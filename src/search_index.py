@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Script: search_index.py
+Version: 1.0.2
+Purpose: Full-text search over the converted Markdown corpus (SQLite FTS5), with ranked section results.
+
+Every document in ../data/converted_md is split into sections at its headings; each section
+is stored with its heading, heading path (Chapter > Section > Subsection) and the PDF page
+of its heading (looked up in extracted_text/<stem>.headings.json or .outline.json). An FTS5
+index over heading, path and body answers queries with BM25 ranking, headings weighted
+highest, in milliseconds over the whole corpus.
+
+Updates are incremental: --update re-indexes only documents whose file size or mtime
+changed and drops documents whose Markdown is gone. convert_to_md.py updates the index
+for each file it writes once the index exists. Both paths index a document's _cleaned
+variant only while it is newer than the raw .md (md_corpus.py).
+
+Usage:
+    python search_index.py --update                 build or refresh the index
+    python search_index.py "nyr dyv" --limit 5      ranked sections
+    python search_index.py 'greyhawk NEAR/5 city' --document Classic_Guide_to_Greyhawk
+
+Queries use FTS5 syntax (AND, OR, NOT, "phrases", prefix*, NEAR); text that is not valid
+FTS5 syntax is searched as plain words.
+"""
+
+import argparse
+import json
+import re
+import sqlite3
+import sys
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+
+import metrics
+from md_corpus import corpus_files, document_name, normalize_heading, preferred_file
+
+SCRIPT_NAME = "search_index.py"
+SCRIPT_VERSION = "1.0.2"
+SCRIPT_PURPOSE = "Full-text search over the converted Markdown corpus"
+
+BASE_DIR = Path(__file__).resolve().parent
+MD_DIR = BASE_DIR / "../data/converted_md"
+STRUCTURE_DIR = BASE_DIR / "../data/extracted_text"
+DB_PATH = BASE_DIR / "../data/search/search_index.sqlite"
+
+SCHEMA_VERSION = 1
+PATH_SEPARATOR = " > "
+# bm25() weights for the heading, path and body columns
+COLUMN_WEIGHTS = (5.0, 2.0, 1.0)
+_HEADING = re.compile(r"(#{1,6}) +(.*\S)")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    source TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sections (
+    id INTEGER PRIMARY KEY,
+    document_id INTEGER NOT NULL REFERENCES documents(id),
+    position INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    heading TEXT NOT NULL,
+    path TEXT NOT NULL,
+    page INTEGER,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sections_document ON sections(document_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS sections_fts USING fts5(
+    heading, path, body,
+    content='sections', content_rowid='id',
+    tokenize='porter unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS sections_insert AFTER INSERT ON sections BEGIN
+    INSERT INTO sections_fts(rowid, heading, path, body) VALUES (new.id, new.heading, new.path, new.body);
+END;
+CREATE TRIGGER IF NOT EXISTS sections_delete AFTER DELETE ON sections BEGIN
+    INSERT INTO sections_fts(sections_fts, rowid, heading, path, body)
+    VALUES ('delete', old.id, old.heading, old.path, old.body);
+END;
+"""
+
+# ─── Database ──────────────────────────────────────────────────────────────────
+
+def connect(db_path=DB_PATH):
+    """Open (creating if needed) the index database."""
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(db_path)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    if db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        db.executescript("""
+            DROP TABLE IF EXISTS sections_fts;
+            DROP TABLE IF EXISTS sections;
+            DROP TABLE IF EXISTS documents;
+        """)
+        db.executescript(SCHEMA)
+        db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return db
+
+def index_exists(db_path=DB_PATH):
+    return Path(db_path).exists()
+
+# ─── Sections ──────────────────────────────────────────────────────────────────
+
+def load_heading_pages(document, structure_dir=STRUCTURE_DIR):
+    """Normalized heading text → queue of page numbers, in document order (as convert_to_md.py matches them)."""
+    pages = defaultdict(deque)
+    for ext in ["headings.json", "outline.json"]:
+        path = Path(structure_dir) / f"{document}.{ext}"
+        if not path.exists():
+            continue
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except json.JSONDecodeError:
+            continue
+        for entry in entries:
+            if isinstance(entry, dict):
+                key = normalize_heading(entry.get("text", entry.get("title", "")))
+                if key:
+                    pages[key].append(entry.get("page"))
+        break
+    return pages
+
+def iter_sections(lines, heading_pages=None):
+    """
+    Yield one dict per section (level, heading, path, page, body) as the Markdown streams past.
+    Text before the first heading is a level-0 section with an empty heading.
+    """
+    heading_pages = heading_pages or {}
+    path = []
+    section = {"level": 0, "heading": "", "path": "", "page": None}
+    body = []
+    page = None
+    for line in lines:
+        match = _HEADING.match(line)
+        if not match:
+            if not line.startswith("<!--"):
+                body.append(line)
+            continue
+        text = "".join(body).strip()
+        if text or section["heading"]:
+            yield dict(section, body=text)
+        body = []
+        level, heading = len(match.group(1)), match.group(2).strip()
+        queue = heading_pages.get(normalize_heading(heading))
+        if queue:
+            page = queue.popleft() or page
+        path = [entry for entry in path if entry[0] < level] + [(level, heading)]
+        section = {"level": level, "heading": heading,
+                   "path": PATH_SEPARATOR.join(h for _, h in path), "page": page}
+    text = "".join(body).strip()
+    if text or section["heading"]:
+        yield dict(section, body=text)
+
+def index_document(db, md_path, structure_dir=STRUCTURE_DIR):
+    """(Re)index one Markdown file in a single transaction; returns the number of sections."""
+    md_path = Path(md_path)
+    document = document_name(md_path)
+    stat = md_path.stat()
+    heading_pages = load_heading_pages(document, structure_dir)
+    with db:
+        row = db.execute("SELECT id FROM documents WHERE name = ?", (document,)).fetchone()
+        if row:
+            db.execute("DELETE FROM sections WHERE document_id = ?", (row[0],))
+            db.execute("UPDATE documents SET source = ?, size = ?, mtime = ? WHERE id = ?",
+                       (md_path.name, stat.st_size, stat.st_mtime, row[0]))
+            document_id = row[0]
+        else:
+            document_id = db.execute("INSERT INTO documents (name, source, size, mtime) VALUES (?, ?, ?, ?)",
+                                     (document, md_path.name, stat.st_size, stat.st_mtime)).lastrowid
+        with open(md_path, "r", encoding="utf-8") as f:
+            rows = ((document_id, position, s["level"], s["heading"], s["path"], s["page"], s["body"])
+                    for position, s in enumerate(iter_sections(f, heading_pages)))
+            cursor = db.executemany(
+                "INSERT INTO sections (document_id, position, level, heading, path, page, body) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    return cursor.rowcount
+
+def remove_document(db, document):
+    with db:
+        row = db.execute("SELECT id FROM documents WHERE name = ?", (document,)).fetchone()
+        if row:
+            db.execute("DELETE FROM sections WHERE document_id = ?", (row[0],))
+            db.execute("DELETE FROM documents WHERE id = ?", (row[0],))
+
+def update_document(md_path, db_path=DB_PATH, structure_dir=STRUCTURE_DIR):
+    """
+    Index the document of a freshly written Markdown file (the convert_to_md.py hook). Like
+    update_index(), this indexes md_corpus.preferred_file(): a fresh conversion is newer than
+    any _cleaned variant, so it is what gets indexed.
+    """
+    db = connect(db_path)
+    try:
+        return index_document(db, preferred_file(md_path), structure_dir)
+    finally:
+        db.close()
+
+def update_index(db, md_dir=MD_DIR, structure_dir=STRUCTURE_DIR, rebuild=False):
+    """Bring the index in line with md_dir; only changed documents are re-indexed. Returns (indexed, removed, unchanged)."""
+    files = corpus_files(md_dir)
+    known = {name: (source, size, mtime)
+             for name, source, size, mtime in db.execute("SELECT name, source, size, mtime FROM documents")}
+    indexed = unchanged = 0
+    for md_path in files:
+        document = document_name(md_path)
+        stat = md_path.stat()
+        if not rebuild and known.get(document) == (md_path.name, stat.st_size, stat.st_mtime):
+            unchanged += 1
+            continue
+        with metrics.document(SCRIPT_NAME, md_path.name, md_path) as doc_metrics:
+            sections = index_document(db, md_path, structure_dir)
+            doc_metrics.wrote(db_path_of(db))
+        print(f"✅ Indexed {md_path.name}: {sections} sections")
+        indexed += 1
+    removed = set(known) - {document_name(f) for f in files}
+    for document in removed:
+        remove_document(db, document)
+        print(f"🗑 Removed {document}")
+    if indexed or removed:
+        db.execute("INSERT INTO sections_fts(sections_fts) VALUES ('optimize')")
+        db.commit()
+    return indexed, len(removed), unchanged
+
+def db_path_of(db):
+    return db.execute("PRAGMA database_list").fetchone()[2]
+
+# ─── Queries ───────────────────────────────────────────────────────────────────
+
+def _plain_query(query):
+    """Quote every word so text that is not valid FTS5 syntax still searches for its words."""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in query.split())
+
+def search(db, query, limit=10, document=None):
+    """Ranked sections matching query: dicts with document, heading, path, page, snippet, score."""
+    sql = (
+        "SELECT d.name, s.heading, s.path, s.page, "
+        "snippet(sections_fts, -1, '[', ']', ' … ', 16), bm25(sections_fts, ?, ?, ?) AS score "
+        "FROM sections_fts JOIN sections s ON s.id = sections_fts.rowid "
+        "JOIN documents d ON d.id = s.document_id "
+        "WHERE sections_fts MATCH ?" + (" AND d.name = ?" if document else "") +
+        " ORDER BY score LIMIT ?"
+    )
+    def run(match):
+        params = [*COLUMN_WEIGHTS, match] + ([document] if document else []) + [limit]
+        return db.execute(sql, params).fetchall()
+    try:
+        rows = run(query)
+    except sqlite3.OperationalError:
+        rows = run(_plain_query(query))
+    return [
+        {"document": name, "heading": heading, "path": path, "page": page,
+         "snippet": " ".join(snippet.split()), "score": round(-score, 3)}
+        for name, heading, path, page, snippet, score in rows
+    ]
+
+def print_results(results, seconds):
+    print(f"🔎 {len(results)} result(s) in {seconds * 1000:.1f} ms")
+    for rank, result in enumerate(results, 1):
+        page = f" (p. {result['page']})" if result["page"] else ""
+        print(f"\n[{rank}] {result['document']}{page} — {result['path'] or '(front matter)'}")
+        print(f"    {result['snippet']}")
+
+def main():
+    parser = argparse.ArgumentParser(description=SCRIPT_PURPOSE)
+    parser.add_argument("query", nargs="*", help="Search terms (FTS5 query syntax)")
+    parser.add_argument("--update", action="store_true", help="Index new and changed Markdown files, drop deleted ones")
+    parser.add_argument("--rebuild", action="store_true", help="Re-index every Markdown file")
+    parser.add_argument("--limit", type=int, default=10, help="Maximum results (default: 10)")
+    parser.add_argument("--document", help="Only search this document (file stem)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--db", default=str(DB_PATH), help="Index database path")
+    metrics.add_argument(parser)
+    parser.add_argument("--version", "-v", action="version", version=f"{SCRIPT_NAME} v{SCRIPT_VERSION}")
+    args = parser.parse_args()
+    metrics.configure(args)
+
+    if not args.query or args.update or args.rebuild:
+        print(f"🛠 {SCRIPT_NAME} - v{SCRIPT_VERSION}")
+        print(f"📘 Purpose: {SCRIPT_PURPOSE}")
+    if not args.query and not (args.update or args.rebuild):
+        parser.print_help()
+        return
+
+    db = connect(args.db)
+    try:
+        if args.update or args.rebuild:
+            started = time.perf_counter()
+            indexed, removed, unchanged = update_index(db, rebuild=args.rebuild)
+            print(f"📦 Index updated in {time.perf_counter() - started:.2f}s: "
+                  f"{indexed} indexed, {removed} removed, {unchanged} unchanged")
+        if args.query:
+            started = time.perf_counter()
+            results = search(db, " ".join(args.query), args.limit, args.document)
+            seconds = time.perf_counter() - started
+            if args.json:
+                json.dump(results, sys.stdout, indent=2, ensure_ascii=False)
+                print()
+            else:
+                print_results(results, seconds)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,58 +1,162 @@
 # ✅ Script name: segment_paragraphs.py
-# ✅ Version: v1.0.2
+# ✅ Version: v1.3.0
 # ✅ Purpose: Split extracted .txt files into paragraphs for downstream Markdown structuring
-# ✅ Dependencies: None (standard library only)
+# ✅ Streams: iter_paragraphs() yields paragraphs as lines are read, so memory is bounded by the largest paragraph
+# ✅ Dehyphenates: "adven-" + "turer" becomes "adventurer" when the document itself uses that word (--keep-hyphens to disable)
+# ✅ Dependencies: None (standard library only; metrics.py for --metrics)
 
 import os
 import argparse
+import re
+from collections import Counter
 from pathlib import Path
 
-VERSION = "v1.0.2"
+import metrics
+
+VERSION = "v1.3.0"
 
 INPUT_DIR = Path(__file__).resolve().parent.parent / "data" / "extracted_text"
 
-def segment_text(content):
-    lines = content.splitlines()
-    paragraphs = []
+# Lines shorter than this (page numbers, stray bullets) end a paragraph instead of joining it
+MIN_LINE_CHARS = 3
+READ_BLOCK = 1 << 16
+
+def read_lines(f):
+    """Yield the lines of an open text file with str.splitlines() semantics, reading in blocks."""
+    while block := f.readlines(READ_BLOCK):
+        yield from "".join(block).splitlines()
+
+# Words may contain inner hyphens ("half-elf"); digits and underscores are not word characters
+_WORD = re.compile(r"[^\W\d_]+(?:-[^\W\d_]+)*")
+_TRAILING_FRAGMENT = re.compile(r"([^\W\d_]+)-$")
+_LEADING_FRAGMENT = re.compile(r"[^\W\d_]+")
+# Both halves of an unknown split must be words at least this long to be read as a compound;
+# shorter "words" ("won-derful", "protect-ion") are usually syllables that happen to be words
+MIN_COMPOUND_PART = 4
+
+def build_vocabulary(lines):
+    """
+    Count every (lowercased) word of the document; hyphenated compounds count as one word.
+    The two fragments of a word split across a line break are not counted as words.
+    """
+    vocabulary = Counter()
+    split_before = False
+    for line in lines:
+        words = _WORD.findall(line)
+        split_after = line.rstrip().endswith("-") and bool(words)
+        start = 1 if split_before else 0
+        stop = len(words) - 1 if split_after else len(words)
+        vocabulary.update(word.lower() for word in words[start:stop])
+        split_before = split_after
+    return vocabulary
+
+class Dehyphenator:
+    """
+    Decide how a line ending in "frag-" continues on the next line, using the document's own words:
+    - the joined word ("adventurer") is used elsewhere at least as often as the hyphenated one → soft hyphen, drop it
+    - the hyphenated compound ("half-elf") is used elsewhere → real hyphen, keep it without the line-break space
+    - neither is known → keep the hyphen if both halves are longer words of their own ("barge-dwelling"),
+      otherwise drop it when the continuation starts lowercase
+    """
+
+    def __init__(self, vocabulary):
+        self.vocabulary = vocabulary
+        self.joined = 0
+        self.kept = 0
+
+    def join(self, previous, line):
+        """Return previous and line merged across a hyphen, or None if they should be joined by a space."""
+        left = _TRAILING_FRAGMENT.search(previous)
+        right = _LEADING_FRAGMENT.match(line)
+        if not left or not right:
+            return None
+        joined = (left.group(1) + right.group()).lower()
+        hyphenated = (left.group(1) + "-" + right.group()).lower()
+        joined_count = self.vocabulary.get(joined, 0)
+        hyphenated_count = self.vocabulary.get(hyphenated, 0)
+        if joined_count and joined_count >= hyphenated_count:
+            soft = True
+        elif hyphenated_count:
+            soft = False
+        elif all(len(part) >= MIN_COMPOUND_PART and part.lower() in self.vocabulary
+                 for part in (left.group(1), right.group())):
+            soft = False
+        else:
+            soft = right.group()[0].islower()
+        if soft:
+            self.joined += 1
+            return previous[:-1] + line
+        self.kept += 1
+        return previous + line
+
+def iter_paragraphs(lines, dehyphenator=None):
+    """
+    Yield paragraphs (runs of non-blank lines joined by spaces) from an iterable of lines.
+    With a Dehyphenator, words split across lines by a trailing hyphen are rejoined.
+    """
     buffer = []
-
     for line in lines:
         stripped = line.strip()
-        if not stripped or len(stripped) < 3:
+        if len(stripped) < MIN_LINE_CHARS:
             if buffer:
-                paragraphs.append(" ".join(buffer).strip())
+                yield " ".join(buffer)
                 buffer = []
+        elif dehyphenator is not None and buffer and buffer[-1].endswith("-"):
+            merged = dehyphenator.join(buffer[-1], stripped)
+            if merged is None:
+                buffer.append(stripped)
+            else:
+                buffer[-1] = merged
         else:
             buffer.append(stripped)
 
     if buffer:
-        paragraphs.append(" ".join(buffer).strip())
-    return paragraphs
+        yield " ".join(buffer)
+
+def segment_text(content):
+    return list(iter_paragraphs(content.splitlines()))
 
-def process_file(filepath, output_dir):
+def file_dehyphenator(filepath):
+    """Dehyphenator for a text file, from a streaming pre-scan of its vocabulary."""
+    with open(filepath, "r", encoding="utf-8") as f:
+        return Dehyphenator(build_vocabulary(read_lines(f)))
+
+def iter_file_paragraphs(filepath, dehyphenator=None):
+    """Yield the paragraphs of a text file while reading it."""
+    with open(filepath, "r", encoding="utf-8") as f:
+        yield from iter_paragraphs(read_lines(f), dehyphenator)
+
+def process_file(filepath, output_dir, dehyphenate=True):
     # Skip re-segmented files
     if ".segmented." in filepath.name:
         print(f"⏭️ Skipping already segmented file: {filepath.name}")
         return
 
-    with open(filepath, "r", encoding="utf-8") as f:
-        content = f.read()
-
-    paragraphs = segment_text(content)
-    filename = Path(filepath).stem + ".segmented.txt"
-    outpath = output_dir / filename
+    with metrics.document("segment_paragraphs.py", filepath.name, filepath) as doc_metrics:
+        filename = Path(filepath).stem + ".segmented.txt"
+        outpath = output_dir / filename
 
-    with open(outpath, "w", encoding="utf-8") as out:
-        out.write("\n\n".join(paragraphs))
+        dehyphenator = file_dehyphenator(filepath) if dehyphenate else None
+        with open(outpath, "w", encoding="utf-8") as out:
+            for i, paragraph in enumerate(iter_file_paragraphs(filepath, dehyphenator)):
+                if i:
+                    out.write("\n\n")
+                out.write(paragraph)
+        doc_metrics.wrote(outpath)
 
     print(f"✅ Segmented and saved: {outpath.name}")
+    if dehyphenator is not None:
+        print(f"🔗 Rejoined {dehyphenator.joined} hyphenated line breaks ({dehyphenator.kept} compounds kept hyphenated)")
 
 def main():
     parser = argparse.ArgumentParser(description="Segment raw text files into paragraph blocks.")
     parser.add_argument("--file", type=str, help="Specify a single .txt file to segment")
     parser.add_argument("--all", action="store_true", help="Process all .txt files in the input folder")
+    parser.add_argument("--keep-hyphens", action="store_true", help="Do not rejoin words hyphenated across line breaks")
     parser.add_argument("--version", "-v", action="version", version=f"%(prog)s {VERSION}")
+    metrics.add_argument(parser)
     args = parser.parse_args()
+    metrics.configure(args)
 
     print(f"🧠 segment_paragraphs.py - {VERSION}\n")
 
@@ -65,13 +169,13 @@ def main():
 
     if args.all:
         for txt in txt_files:
-            process_file(txt, output_dir)
+            process_file(txt, output_dir, not args.keep_hyphens)
         return
 
     if args.file:
         single = INPUT_DIR / args.file
         if single.exists():
-            process_file(single, output_dir)
+            process_file(single, output_dir, not args.keep_hyphens)
         else:
             print(f"❌ File not found: {single}")
         return
@@ -91,7 +195,7 @@ def main():
 
     try:
         selected = txt_files[int(choice)]
-        process_file(selected, output_dir)
+        process_file(selected, output_dir, not args.keep_hyphens)
     except (ValueError, IndexError):
         print("❌ Invalid selection.")
 
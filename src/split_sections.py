@@ -1,23 +1,39 @@
 #!/usr/bin/env python3
 """
 Script: split_sections.py
-Version: 1.0.0
+Version: 1.3.1
 Purpose: Split large .md or .txt files by heading level into smaller segment files.
 Author: ChatGPT for Hoody's PDF → Markdown Project
+
+Alongside the _partN.md files, a section index (<stem>.sections.json) records each part's
+heading, level, heading path and byte range in the source file. The range ends at the next
+heading of the split level or above, so a section never takes in the next chapter's heading. load_section() uses it to
+read one section straight from the source by seeking, so retrieval never needs the parts.
+
+--tree builds the whole heading tree in one scan and writes nested directories
+(chapter/section/subsection) under <stem>/tree/: a section within --max-bytes becomes one
+file, a larger one becomes a directory holding its intro and its subsections, recursively.
 """
 
+import json
+import re
+import shutil
 import sys
 from pathlib import Path
 from tqdm import tqdm
 
+import metrics
+
 SCRIPT_NAME = "split_sections.py"
-SCRIPT_VERSION = "1.0.0"
+SCRIPT_VERSION = "1.3.1"
 SCRIPT_PURPOSE = "Split large Markdown or text files by heading level"
 
 # Paths
 BASE_DIR = Path(__file__).resolve().parent
 EXTRACTED_DIR = BASE_DIR / "../data/extracted_text"
 OUTPUT_DIR = BASE_DIR / "../data/extracted_text/split"
+# --tree size budget per chunk (~4k tokens of English text)
+DEFAULT_MAX_BYTES = 16000
 
 # CLI flags
 def parse_args():
@@ -26,7 +42,11 @@ def parse_args():
         "show_version": "--version" in sys.argv or "-v" in sys.argv,
         "run_all": "--all" in sys.argv,
         "level": int(next((sys.argv[i + 1] for i, arg in enumerate(sys.argv) if arg == "--level"), 2)),
-        "target_file": next((sys.argv[i + 1] for i, arg in enumerate(sys.argv) if arg == "--file"), None)
+        "target_file": next((sys.argv[i + 1] for i, arg in enumerate(sys.argv) if arg == "--file"), None),
+        "metrics": next((sys.argv[i + 1] for i, arg in enumerate(sys.argv) if arg == "--metrics"), None),
+        "section": next((sys.argv[i + 1] for i, arg in enumerate(sys.argv) if arg == "--section"), None),
+        "tree": "--tree" in sys.argv,
+        "max_bytes": int(next((sys.argv[i + 1] for i, arg in enumerate(sys.argv) if arg == "--max-bytes"), DEFAULT_MAX_BYTES))
     }
 
 def print_header():
@@ -39,39 +59,239 @@ def print_help():
 Usage:
   python split_sections.py --file filename.md [--level 2]
   python split_sections.py --all [--level 2]
+  python split_sections.py --file filename.md --tree [--max-bytes 16000]
+  python split_sections.py --file filename.md --section "Chapter 1 > Foreword" [--tree]
 
 Options:
   --file <filename>     Process a single .md or .txt file
   --all                 Process all .md and .txt files in extracted_text
   --level <n>           Heading level to split at (default: 2)
+  --tree                Split the whole heading tree in one pass into nested directories
+  --max-bytes <n>       --tree: split a section further only when it is larger (default: 16000)
+  --section <path>      Print one section (heading path, " > " separated) from the section index
+  --metrics <file>      Append per-document timing/memory metrics as JSON lines
   --version, -v         Show script version
   --help, -h            Show this help message
 """)
 
-def split_file(filepath: Path, level: int):
-    lines = filepath.read_text(encoding="utf-8").splitlines()
+INDEX_VERSION = 1
+PATH_SEPARATOR = " > "
+_HEADING = re.compile(r"(#{1,6})(?: |$)")
+
+def tree_dir(filepath: Path, output_dir: Path = OUTPUT_DIR):
+    return output_dir / filepath.stem / "tree"
+
+def index_path(filepath: Path, output_dir: Path = OUTPUT_DIR, tree=False):
+    directory = tree_dir(filepath, output_dir) if tree else output_dir / filepath.stem
+    return directory / f"{filepath.stem}.sections.json"
+
+def _heading(line):
+    """(level, text) of a Markdown heading line, or None."""
+    match = _HEADING.match(line)
+    if not match:
+        return None
+    return len(match.group(1)), line[match.end():].strip()
+
+def split_file(filepath: Path, level: int, output_dir: Path = OUTPUT_DIR):
+    with metrics.document(SCRIPT_NAME, filepath.name, filepath) as doc_metrics:
+        return _split_file(filepath, level, output_dir, doc_metrics)
+
+def _split_file(filepath: Path, level: int, output_dir: Path, doc_metrics):
+    """Stream the source once, writing each part as it is reached and recording its byte range."""
     heading_prefix = "#" * level
-    parts = []
-    current = []
-
-    for line in lines:
-        if line.startswith(heading_prefix) and (len(line) == len(heading_prefix) or line[len(heading_prefix)] == " "):
-            if current:
-                parts.append(current)
-            current = [line]
+    out_dir = output_dir / filepath.stem
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    sections = []
+    ancestors = []  # (level, text) of the enclosing headings above the split level
+    part_file = None
+    offset = 0
+
+    def close_part():
+        if part_file is not None:
+            part_file.close()
+            if sections[-1]["end"] is None:
+                sections[-1]["end"] = offset
+
+    try:
+        with open(filepath, "rb") as src:
+            for raw in src:
+                # Decode per line, then split like str.splitlines() so parts match a whole-file read
+                for line_with_end in raw.decode("utf-8").splitlines(keepends=True):
+                    line = line_with_end.splitlines()[0]
+                    heading = _heading(line)
+                    is_split = line.startswith(heading_prefix) and (len(line) == len(heading_prefix)
+                                                                     or line[len(heading_prefix)] == " ")
+                    if heading and heading[0] < level:
+                        ancestors = [a for a in ancestors if a[0] < heading[0]] + [heading]
+                        # The part file runs on to the next split heading, but the section ends here
+                        if sections and sections[-1]["end"] is None:
+                            sections[-1]["end"] = offset
+
+                    if is_split or part_file is None:
+                        close_part()
+                        number = len(sections) + 1
+                        part_path = out_dir / f"{filepath.stem}_part{number}.md"
+                        part_file = open(part_path, "w", encoding="utf-8")
+                        doc_metrics.wrote(part_path)
+                        path = [text for _, text in ancestors]
+                        if is_split:
+                            path.append(heading[1] if heading else line[level:].strip())
+                        sections.append({
+                            "part": part_path.name,
+                            "heading": path[-1] if is_split else None,
+                            "level": level if is_split else 0,
+                            "path": path,
+                            "start": offset,
+                            "end": None,
+                        })
+                    else:
+                        part_file.write("\n")
+                    part_file.write(line)
+                    offset += len(line_with_end.encode("utf-8"))
+    finally:
+        close_part()
+
+    index = _write_index(filepath, index_path(filepath, output_dir), sections, level=level)
+    doc_metrics.wrote(index_path(filepath, output_dir))
+
+    print(f"✅ Saved {len(sections)} segments for {filepath.name}")
+    return index
+
+def _write_index(filepath: Path, path: Path, sections, **settings):
+    stat = filepath.stat()
+    index = {
+        "version": INDEX_VERSION,
+        "source": str(filepath.resolve()),
+        "source_size": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+        **settings,
+        "sections": sections,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    return index
+
+def scan_heading_tree(filepath: Path):
+    """
+    One pass over the source: every heading (levels 1-6) becomes a node with its byte range,
+    which runs to the next heading of the same or a higher level. The root covers the file.
+    """
+    root = {"level": 0, "heading": None, "path": [], "start": 0, "end": None, "children": []}
+    stack = [root]
+    offset = 0
+    with open(filepath, "rb") as src:
+        for raw in src:
+            for line_with_end in raw.decode("utf-8").splitlines(keepends=True):
+                heading = _heading(line_with_end.splitlines()[0])
+                if heading:
+                    level, text = heading
+                    while stack[-1]["level"] >= level:
+                        stack.pop()["end"] = offset
+                    parent = stack[-1]
+                    node = {"level": level, "heading": text, "path": parent["path"] + [text],
+                            "start": offset, "end": None, "children": []}
+                    parent["children"].append(node)
+                    stack.append(node)
+                offset += len(line_with_end.encode("utf-8"))
+    for node in stack:
+        node["end"] = offset
+    return root
+
+_SLUG = re.compile(r"[^a-z0-9]+")
+
+def _slug(text):
+    return _SLUG.sub("-", (text or "").lower()).strip("-")[:40].rstrip("-") or "section"
+
+def tree_file(filepath: Path, max_bytes: int = DEFAULT_MAX_BYTES, output_dir: Path = OUTPUT_DIR):
+    with metrics.document(SCRIPT_NAME, filepath.name, filepath) as doc_metrics:
+        return _tree_file(filepath, max_bytes, output_dir, doc_metrics)
+
+def _tree_file(filepath: Path, max_bytes: int, output_dir: Path, doc_metrics):
+    """Split recursively: only sections larger than max_bytes are broken into their subsections."""
+    root = scan_heading_tree(filepath)
+    out_dir = tree_dir(filepath, output_dir)
+    if out_dir.exists():
+        shutil.rmtree(out_dir)  # a different budget gives a different layout; never mix the two
+    out_dir.mkdir(parents=True)
+    sections = []
+
+    with open(filepath, "rb") as src:
+        def write_chunk(node, path, start, end):
+            src.seek(start)
+            path.write_bytes(src.read(end - start))
+            doc_metrics.wrote(path)
+            sections.append({
+                "part": path.relative_to(out_dir).as_posix(),
+                "heading": node["heading"],
+                "level": node["level"],
+                "path": node["path"],
+                "start": start,
+                "end": end,
+            })
+
+        def emit(node, directory, name):
+            if node["end"] - node["start"] <= max_bytes or not node["children"]:
+                write_chunk(node, directory / f"{name}.md", node["start"], node["end"])
+            else:
+                (directory / name).mkdir()
+                emit_children(node, directory / name)
+
+        def emit_children(node, directory):
+            intro_end = node["children"][0]["start"]
+            if intro_end > node["start"]:
+                write_chunk(node, directory / "00_intro.md", node["start"], intro_end)
+            for number, child in enumerate(node["children"], 1):
+                emit(child, directory, f"{number:02d}_{_slug(child['heading'])}")
+
+        # Sections are visited in document order, so the source is read front to back once
+        if root["end"] <= max_bytes or not root["children"]:
+            write_chunk(root, out_dir / f"{filepath.stem}.md", 0, root["end"])
         else:
-            current.append(line)
-    if current:
-        parts.append(current)
+            emit_children(root, out_dir)
 
-    out_dir = OUTPUT_DIR / filepath.stem
-    out_dir.mkdir(parents=True, exist_ok=True)
+    index = _write_index(filepath, index_path(filepath, output_dir, tree=True), sections, max_bytes=max_bytes)
+    doc_metrics.wrote(index_path(filepath, output_dir, tree=True))
+    oversized = sum(1 for s in sections if s["end"] - s["start"] > max_bytes)
+    print(f"✅ Saved {len(sections)} chunks for {filepath.name} under {out_dir}"
+          + (f" ({oversized} without subsections exceed {max_bytes} bytes)" if oversized else ""))
+    return index
 
-    for i, part in enumerate(parts, 1):
-        part_path = out_dir / f"{filepath.stem}_part{i}.md"
-        part_path.write_text("\n".join(part), encoding="utf-8")
+def load_index(filepath: Path, output_dir: Path = OUTPUT_DIR, tree=False):
+    with open(index_path(filepath, output_dir, tree), "r", encoding="utf-8") as f:
+        return json.load(f)
 
-    print(f"✅ Saved {len(parts)} segments for {filepath.name}")
+def find_sections(index, heading_path):
+    """
+    Sections whose heading path ends with heading_path (a list, or a " > " separated string),
+    compared case-insensitively. "Foreword" and "Chapter 1 > Foreword" both match the same section.
+    """
+    if isinstance(heading_path, str):
+        heading_path = heading_path.split(PATH_SEPARATOR)
+    wanted = [part.strip().lower() for part in heading_path]
+    return [
+        section for section in index["sections"]
+        if [part.lower() for part in section["path"][-len(wanted):]] == wanted
+    ]
+
+def load_section(filepath: Path, heading_path, output_dir: Path = OUTPUT_DIR, index=None, tree=False):
+    """
+    Return the Markdown of the first section matching heading_path, read from the source file by
+    seeking to its byte range. Raises KeyError if no section matches and ValueError if the source
+    changed since the index was written.
+    """
+    index = index or load_index(filepath, output_dir, tree)
+    matches = find_sections(index, heading_path)
+    if not matches:
+        raise KeyError(f"No section {heading_path!r} in {filepath.name}")
+    source = Path(index["source"])
+    stat = source.stat()
+    if (stat.st_size, stat.st_mtime_ns) != (index["source_size"], index["source_mtime_ns"]):
+        raise ValueError(f"Section index for {source.name} is stale; re-run {SCRIPT_NAME}")
+    section = matches[0]
+    with open(source, "rb") as f:
+        f.seek(section["start"])
+        return f.read(section["end"] - section["start"]).decode("utf-8")
 
 def main():
     args = parse_args()
@@ -84,6 +304,24 @@ def main():
         return
 
     print_header()
+    if args["metrics"]:
+        metrics.enable(args["metrics"])
+
+    if args["section"]:
+        if not args["target_file"]:
+            print("❌ --section needs --file")
+            return
+        target = EXTRACTED_DIR / args["target_file"]
+        if not index_path(target, tree=args["tree"]).exists():
+            if args["tree"]:
+                tree_file(target, args["max_bytes"])
+            else:
+                split_file(target, args["level"])
+        try:
+            print(load_section(target, args["section"], tree=args["tree"]))
+        except (KeyError, ValueError) as e:
+            print(f"❌ {e}")
+        return
 
     files = []
     if args["run_all"]:
@@ -100,7 +338,10 @@ def main():
         return
 
     for file in tqdm(files, desc="Splitting files", unit="file"):
-        split_file(file, args["level"])
+        if args["tree"]:
+            tree_file(file, args["max_bytes"])
+        else:
+            split_file(file, args["level"])
 
 if __name__ == "__main__":
     main()
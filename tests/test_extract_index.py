@@ -0,0 +1,40 @@
+import time
+
+from extract_index import extract_index_entries, is_index_line, is_index_page
+
+def test_index_lines_still_match():
+    assert is_index_line("Greyhawk ........ 123")
+    assert is_index_line("Greyhawk, 12, 45-47, 103")
+    assert is_index_line("Oerth. See Flanaess")
+    assert is_index_line("Oerth, 12; see also Flanaess")
+    assert not is_index_line("The city lies on the Selintan river.")
+
+def test_long_line_without_locator_is_rejected_quickly():
+    # Used to backtrack quadratically: a 2.8k line took close to a second
+    lines = ["word " * 560, "word " * 300 + "see (x) more words " * 10 + "x", "word " * 300 + "12 " * 300 + "x"]
+    start = time.perf_counter()
+    for line in lines:
+        assert not is_index_line(line)
+    assert not is_index_page("\n".join(lines * 20))
+    assert extract_index_entries(lines) == []
+    assert time.perf_counter() - start < 0.1
+
+def test_see_also_lines_belong_to_the_entry_above():
+    entries = extract_index_entries([
+        "Greyhawk, 12",
+        "      see also Free City",
+        "Oerth, 3",
+        "  history, 56",
+        "    see also Flanaess; Oerik",
+        "Wyrms",
+        "  see Dragons",
+    ])
+    assert entries == [
+        {"term": "Greyhawk", "page": 12},
+        {"term": "Greyhawk", "see": ["Free City"], "also": True},
+        {"term": "Oerth", "page": 3},
+        {"term": "history", "page": 56, "parent": "Oerth"},
+        {"term": "history", "see": ["Flanaess", "Oerik"], "also": True, "parent": "Oerth"},
+        {"term": "Wyrms", "see": ["Dragons"], "also": False},
+    ]
+    assert is_index_line("      see also Free City")
@@ -0,0 +1,48 @@
+import fitz
+
+from extract_text import extract_text_from_pdf
+from ocr_pages import patch_text
+from page_text import PagedText, load_page_index, page_fingerprints
+
+def make_pdf(path, pages=4):
+    with fitz.open() as doc:
+        for number in range(1, pages + 1):
+            page = doc.new_page()
+            page.insert_text((72, 30), "The Sample Module")
+            page.insert_text((72, 200), f"Body text of page {number}.")
+            page.insert_text((300, 820), str(number))
+        doc.save(path)
+
+def test_patching_stripped_text_keeps_it_out_of_incremental_runs(tmp_path):
+    pdf_path = tmp_path / "sample.pdf"
+    make_pdf(pdf_path)
+    txt_path = tmp_path / "sample.txt"
+
+    extract_text_from_pdf(pdf_path, tmp_path, strip_headers=True)
+    assert "The Sample Module" not in txt_path.read_text(encoding="utf-8")
+    with fitz.open(pdf_path) as doc:
+        patch_text(txt_path, {1: "OCR text of page 2.\n"}, page_fingerprints(doc))
+    assert all("fingerprint" not in entry for entry in load_page_index(txt_path))
+
+    # The stripped pages must not be spliced in: every page is extracted again
+    extract_text_from_pdf(pdf_path, tmp_path)
+    with PagedText(txt_path) as paged:
+        assert all("The Sample Module" in text for _, text in paged.iter_pages())
+
+def test_patching_a_revised_pdf_keeps_changed_pages_stale(tmp_path):
+    pdf_path = tmp_path / "sample.pdf"
+    make_pdf(pdf_path, pages=3)
+    txt_path = tmp_path / "sample.txt"
+    extract_text_from_pdf(pdf_path, tmp_path)
+
+    # Revised draft: same page count, new text on page 3
+    with fitz.open(pdf_path) as doc:
+        doc[2].insert_text((72, 400), "Revised paragraph.")
+        doc.save(tmp_path / "revised.pdf")
+    (tmp_path / "revised.pdf").replace(pdf_path)
+
+    with fitz.open(pdf_path) as doc:
+        patch_text(txt_path, {0: "OCR text of page 1.\n"}, page_fingerprints(doc))
+    extract_text_from_pdf(pdf_path, tmp_path)
+    with PagedText(txt_path) as paged:
+        assert "Revised paragraph." in paged.page(3)
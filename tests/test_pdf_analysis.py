@@ -0,0 +1,32 @@
+import fitz
+
+from detect_headings import detect_headings_from_pdf, state_path
+from pdf_analysis import analyze_pdf
+
+def make_pdf(path, extra_heading=False):
+    with fitz.open() as doc:
+        for number in range(1, 5):
+            page = doc.new_page()
+            page.insert_text((72, 100), f"Chapter {number}", fontsize=18)
+            for line in range(20):
+                page.insert_text((72, 140 + line * 14), f"Body text line {line} on page {number}.", fontsize=10)
+            if extra_heading and number == 3:
+                page.insert_text((72, 700), "Appendix", fontsize=18)
+        doc.save(path)
+
+def test_pdf_analysis_refreshes_detect_headings_page_state(tmp_path):
+    pdf_path = tmp_path / "module.pdf"
+    make_pdf(pdf_path)
+    detect_headings_from_pdf(pdf_path, tmp_path)
+
+    make_pdf(pdf_path, extra_heading=True)
+    analyze_pdf(pdf_path, tmp_path)
+    headings_path = tmp_path / "module.headings.json"
+    written = headings_path.read_bytes()
+    state = state_path(headings_path).read_bytes()
+
+    # The state pdf_analysis wrote matches the revised PDF: nothing is rescanned or changed
+    detect_headings_from_pdf(pdf_path, tmp_path)
+    assert headings_path.read_bytes() == written
+    assert state_path(headings_path).read_bytes() == state
+    assert b"Appendix" in written
@@ -0,0 +1,30 @@
+import json
+
+import fitz
+
+from detect_headings import detect_headings_from_pdf
+from extract_text import extract_text_from_pdf
+
+def make_pdf(path, pages=12):
+    with fitz.open() as doc:
+        for number in range(1, pages + 1):
+            page = doc.new_page()
+            page.insert_text((72, 30), f"The Sample Module {number}", fontsize=8)
+            page.insert_text((72, 70), f"Section {number}.2", fontsize=16)
+            for line in range(20):
+                page.insert_text((72, 120 + line * 14), f"Body text line {line} on page {number}.", fontsize=10)
+        doc.save(path)
+
+def test_numbered_headings_at_page_tops_are_not_running_headers(tmp_path):
+    pdf_path = tmp_path / "numbered.pdf"
+    make_pdf(pdf_path)
+
+    detect_headings_from_pdf(pdf_path, tmp_path, incremental=False)
+    headings = json.loads((tmp_path / "numbered.headings.json").read_text(encoding="utf-8"))
+    assert [heading["text"] for heading in headings] == [f"Section {number}.2" for number in range(1, 13)]
+
+    # The small running header with its page number is still stripped
+    extract_text_from_pdf(pdf_path, tmp_path, strip_headers=True)
+    text = (tmp_path / "numbered.txt").read_text(encoding="utf-8")
+    assert "The Sample Module" not in text
+    assert "Section 7.2" in text
@@ -0,0 +1,49 @@
+import os
+
+import search_index
+
+def test_hook_and_update_index_agree_on_the_cleaned_variant(tmp_path):
+    md_dir = tmp_path / "converted_md"
+    md_dir.mkdir()
+    (md_dir / "module.md").write_text("# Raw Heading\nraw body\n", encoding="utf-8")
+    (md_dir / "module_cleaned.md").write_text("# Clean Heading\nclean body\n", encoding="utf-8")
+    db_path = tmp_path / "search.sqlite"
+
+    search_index.update_document(md_dir / "module.md", db_path, tmp_path)
+    db = search_index.connect(db_path)
+    try:
+        assert db.execute("SELECT source FROM documents").fetchall() == [("module_cleaned.md",)]
+        assert [r["heading"] for r in search_index.search(db, "body")] == ["Clean Heading"]
+        # The hook already stored what update_index() would: nothing left to re-index
+        assert search_index.update_index(db, md_dir, tmp_path) == (0, 0, 1)
+    finally:
+        db.close()
+
+def test_fresh_conversion_is_indexed_over_an_older_cleaned_file(tmp_path):
+    md_dir = tmp_path / "converted_md"
+    md_dir.mkdir()
+    raw = md_dir / "module.md"
+    cleaned = md_dir / "module_cleaned.md"
+    raw.write_text("# Heading\nold body\n", encoding="utf-8")
+    cleaned.write_text("# Heading\nold body\n", encoding="utf-8")
+    os.utime(raw, (1000, 1000))
+    os.utime(cleaned, (2000, 2000))
+    db_path = tmp_path / "search.sqlite"
+    db = search_index.connect(db_path)
+    try:
+        search_index.update_index(db, md_dir, tmp_path)
+        # Re-converted with new text: the raw .md is now newer than the cleaned one
+        raw.write_text("# Heading\na griffon nests here\n", encoding="utf-8")
+        os.utime(raw, (3000, 3000))
+        assert search_index.update_index(db, md_dir, tmp_path)[0] == 1
+        assert len(search_index.search(db, "griffon")) == 1
+    finally:
+        db.close()
+
+    (md_dir / "module.md").write_text("# Heading\na hippogriff nests here\n", encoding="utf-8")
+    search_index.update_document(raw, db_path, tmp_path)
+    db = search_index.connect(db_path)
+    try:
+        assert len(search_index.search(db, "hippogriff")) == 1
+    finally:
+        db.close()
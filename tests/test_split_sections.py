@@ -0,0 +1,23 @@
+from split_sections import load_section, split_file
+
+SOURCE = """# Chapter 1
+Intro to chapter 1.
+## First
+First body.
+## Second
+Second body.
+# Chapter 2
+Intro to chapter 2.
+## Third
+Third body.
+"""
+
+def test_nested_split_sections_stop_at_the_next_chapter(tmp_path):
+    source = tmp_path / "module.md"
+    source.write_text(SOURCE, encoding="utf-8")
+    output_dir = tmp_path / "split"
+    split_file(source, 2, output_dir)
+
+    assert load_section(source, "Chapter 1 > First", output_dir) == "## First\nFirst body.\n"
+    assert load_section(source, "Chapter 1 > Second", output_dir) == "## Second\nSecond body.\n"
+    assert load_section(source, "Chapter 2 > Third", output_dir) == "## Third\nThird body.\n"